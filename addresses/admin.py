@@ -1,5 +1,5 @@
 from django.contrib import admin
-from addresses.models import AddressModel
+from addresses.models import AddressModel, CepModel
 # Register your models here.
 
 @admin.register(AddressModel)
@@ -20,4 +20,12 @@ class AddressAdmin(admin.ModelAdmin):
     list_per_page = 20
     ordering = ['-id']
     autocomplete_fields = ['user']
-    list_select_related = ['user']
\ No newline at end of file
+    list_select_related = ['user']
+
+@admin.register(CepModel)
+class CepAdmin(admin.ModelAdmin):
+    list_display = ['zip_code', 'street', 'neighborhood', 'city', 'state', 'source', 'updated_at']
+    search_fields = ['zip_code', 'street', 'city']
+    search_help_text = "Busque por CEP, Rua ou Cidade."
+    list_filter = ['source', 'state']
+    list_per_page = 50
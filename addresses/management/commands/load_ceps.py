@@ -0,0 +1,77 @@
+import csv
+import gzip
+
+from django.core.management.base import BaseCommand, CommandError
+
+from addresses.models import CepModel
+from addresses.services.cep_lookup import clear_cep_cache, normalize_cep
+
+# Colunas aceitas no arquivo (nomes do ViaCEP ou da própria tabela)
+COLUMN_ALIASES = {
+    'zip_code': ('cep', 'zip_code'),
+    'street': ('logradouro', 'street'),
+    'neighborhood': ('bairro', 'neighborhood'),
+    'city': ('localidade', 'cidade', 'city'),
+    'state': ('uf', 'state'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Loads (or updates) the local CEP table from a CSV file (optionally .gz) with cep, logradouro, bairro, cidade/localidade and uf columns.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='Path to the CSV file.')
+        parser.add_argument('--delimiter', type=str, default=',', help='CSV delimiter (default: ",").')
+        parser.add_argument('--encoding', type=str, default='utf-8')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows written per INSERT.')
+
+    def handle(self, *args, **options):
+        opener = gzip.open if options['path'].endswith('.gz') else open
+        try:
+            with opener(options['path'], 'rt', encoding=options['encoding'], newline='') as file:
+                reader = csv.DictReader(file, delimiter=options['delimiter'])
+                columns = self._resolve_columns(reader.fieldnames or [])
+                loaded, skipped = self._load(reader, columns, options['batch_size'])
+        except OSError as e:
+            raise CommandError(f'Could not read {options["path"]}: {e}')
+
+        clear_cep_cache()
+        self.stdout.write(self.style.SUCCESS(f'Loaded {loaded} CEPs ({skipped} invalid rows skipped).'))
+
+    def _resolve_columns(self, fieldnames):
+        normalized = {name.strip().lower(): name for name in fieldnames}
+        columns = {}
+        for field, aliases in COLUMN_ALIASES.items():
+            column = next((normalized[alias] for alias in aliases if alias in normalized), None)
+            if column is None and field not in ('street', 'neighborhood'):
+                raise CommandError(f'Missing column for {field}; expected one of {", ".join(aliases)}.')
+            columns[field] = column
+        return columns
+
+    def _load(self, reader, columns, batch_size):
+        loaded = skipped = 0
+        batch = []
+        for row in reader:
+            values = {field: (row.get(column) or '').strip() if column else '' for field, column in columns.items()}
+            values['zip_code'] = normalize_cep(values['zip_code'])
+            if len(values['zip_code']) != 8 or not values['city'] or len(values['state']) != 2:
+                skipped += 1
+                continue
+
+            batch.append(CepModel(**values, source=CepModel.Source.FILE))
+            if len(batch) >= batch_size:
+                loaded += self._write(batch)
+                batch = []
+        if batch:
+            loaded += self._write(batch)
+        return loaded, skipped
+
+    def _write(self, batch):
+        # Upsert: CEPs já existentes são atualizados com os dados do arquivo
+        CepModel.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=['zip_code'],
+            update_fields=['street', 'neighborhood', 'city', 'state', 'source', 'updated_at'],
+        )
+        return len(batch)
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('addresses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CepModel',
+            fields=[
+                ('zip_code', models.CharField(help_text='Apenas os 8 digitos', max_length=8, primary_key=True, serialize=False, verbose_name='CEP')),
+                ('street', models.CharField(blank=True, max_length=250, verbose_name='Rua')),
+                ('neighborhood', models.CharField(blank=True, max_length=250, verbose_name='Bairro')),
+                ('city', models.CharField(max_length=150, verbose_name='Cidade')),
+                ('state', models.CharField(max_length=2, verbose_name='Estado')),
+                ('source', models.CharField(choices=[('file', 'Arquivo'), ('viacep', 'ViaCEP')], default='file', max_length=10, verbose_name='Origem')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'CEP',
+                'verbose_name_plural': 'CEPs',
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('addresses', '0002_cepmodel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='addressmodel',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
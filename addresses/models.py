@@ -17,3 +17,28 @@ class AddressModel(models.Model):
     state = models.CharField('Estado', max_length=2, help_text='Sigla do Estado, ex: RS, SC, SP, etc.')
     country = models.CharField('País', max_length=50, default='Brasil')
     is_primary = models.BooleanField('Endereço Principal', default=False, help_text='É seu endereço principal?')
+    # Usado nos validadores (ETag) dos pedidos, que exibem o endereço
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class CepModel(models.Model):
+    """Base local de CEPs, carregada em lote (load_ceps) e completada sob demanda pelo ViaCEP."""
+
+    class Source(models.TextChoices):
+        FILE = 'file', 'Arquivo'
+        VIACEP = 'viacep', 'ViaCEP'
+
+    zip_code = models.CharField('CEP', max_length=8, primary_key=True, help_text='Apenas os 8 digitos')
+    street = models.CharField('Rua', max_length=250, blank=True)
+    neighborhood = models.CharField('Bairro', max_length=250, blank=True)
+    city = models.CharField('Cidade', max_length=150)
+    state = models.CharField('Estado', max_length=2)
+    source = models.CharField('Origem', max_length=10, choices=Source.choices, default=Source.FILE)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'CEP'
+        verbose_name_plural = 'CEPs'
+
+    def __str__(self):
+        return f'{self.zip_code} - {self.city}/{self.state}'
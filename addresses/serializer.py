@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from .models import AddressModel
-import requests
+from .services.cep_lookup import CepNotFound, lookup_cep
 
 
 class AddressSerializer(serializers.ModelSerializer):
@@ -32,23 +32,16 @@ class AddressSerializer(serializers.ModelSerializer):
             })
         
         try:
-            response = requests.get(f'https://viacep.com.br/ws/{cep}/json/')
-            response.raise_for_status()
-            viacep_data = response.json()
-
-            if viacep_data.get('erro'):
-                raise serializers.ValidationError({
-                    "zip_code": 'CEP não encontrado'
-                })
-            
-            logradouro_api = viacep_data.get('logradouro')
-            if logradouro_api:
-                data['street'] = logradouro_api
-                data['neighborhood'] = viacep_data.get('bairro')
-                data['city'] = viacep_data.get('localidade')
-                data['state'] = viacep_data.get('uf')
+            cep_data = lookup_cep(cep)
+        except CepNotFound:
+            raise serializers.ValidationError({
+                "zip_code": 'CEP não encontrado'
+            })
 
-        except requests.exceptions.RequestException:
-            print(f"AVISO: Validação de CEP para {cep} falhou. Usando dados do usuário.")
-            pass
-        return data
\ No newline at end of file
+        # Sem dados do CEP (ViaCEP fora do ar), usa o endereço informado pelo usuário
+        if cep_data and cep_data['street']:
+            data['street'] = cep_data['street']
+            data['neighborhood'] = cep_data['neighborhood']
+            data['city'] = cep_data['city']
+            data['state'] = cep_data['state']
+        return data
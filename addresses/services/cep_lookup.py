@@ -0,0 +1,94 @@
+import logging
+
+import requests
+from decouple import config
+
+from addresses.models import CepModel
+from common import http_client
+from common.lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Quantos CEPs ficam em memória em cada processo
+CEP_CACHE_SIZE = config('CEP_CACHE_SIZE', default=4096, cast=int)
+VIACEP_URL = 'https://viacep.com.br/ws/{cep}/json/'
+# O fallback roda dentro da requisição do usuário: timeout curto e sem novas tentativas
+VIACEP_TIMEOUT_SECONDS = (2, 3)
+
+CEP_FIELDS = ('zip_code', 'street', 'neighborhood', 'city', 'state')
+
+
+class CepNotFound(Exception):
+    """O CEP não existe (segundo o ViaCEP)."""
+
+
+_cache = LRUCache(CEP_CACHE_SIZE)
+
+
+def normalize_cep(value) -> str:
+    return ''.join(filter(str.isdigit, str(value or '')))
+
+
+def clear_cep_cache() -> None:
+    _cache.clear()
+
+
+def _fetch_from_viacep(cep: str):
+    """
+    Busca o CEP no ViaCEP e grava o resultado na base local.
+    Retorna:
+        dict | None: Os dados do CEP, ou None se o ViaCEP estiver indisponível.
+    Lança:
+        CepNotFound: Se o ViaCEP responder que o CEP não existe.
+    """
+    try:
+        response = http_client.get(VIACEP_URL.format(cep=cep), timeout=VIACEP_TIMEOUT_SECONDS, retries=0)
+        response.raise_for_status()
+        viacep_data = response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.warning('Consulta do CEP %s no ViaCEP falhou: %s', cep, e)
+        return None
+
+    if viacep_data.get('erro'):
+        raise CepNotFound(f'CEP não encontrado - {cep}')
+
+    record, _ = CepModel.objects.update_or_create(
+        zip_code=cep,
+        defaults={
+            'street': viacep_data.get('logradouro') or '',
+            'neighborhood': viacep_data.get('bairro') or '',
+            'city': viacep_data.get('localidade') or '',
+            'state': viacep_data.get('uf') or '',
+            'source': CepModel.Source.VIACEP,
+        }
+    )
+    return {field: getattr(record, field) for field in CEP_FIELDS}
+
+
+def lookup_cep(value):
+    """
+    Resolve um CEP: cache em memória (LRU), depois a base local (busca pela chave primária)
+    e, só se o CEP não estiver na base, o ViaCEP (read-through, o resultado é gravado na base).
+    Args:
+        value (str): O CEP, com ou sem máscara.
+    Retorna:
+        dict | None: {zip_code, street, neighborhood, city, state}, ou None se o CEP não está
+        na base e o ViaCEP está indisponível.
+    Lança:
+        ValueError: Se o CEP não tiver 8 digitos.
+        CepNotFound: Se o CEP não existir.
+    """
+    cep = normalize_cep(value)
+    if len(cep) != 8:
+        raise ValueError('O CEP deve conter 8 digitos')
+
+    cep_data = _cache.get(cep)
+    if cep_data is not None:
+        return cep_data
+
+    cep_data = CepModel.objects.filter(zip_code=cep).values(*CEP_FIELDS).first()
+    if cep_data is None:
+        cep_data = _fetch_from_viacep(cep)
+    if cep_data is not None:
+        _cache.set(cep, cep_data)
+    return cep_data
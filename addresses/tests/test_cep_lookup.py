@@ -0,0 +1,136 @@
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from addresses.models import AddressModel, CepModel
+from addresses.services.cep_lookup import CepNotFound, lookup_cep
+
+pytestmark = pytest.mark.django_db
+
+
+def viacep_response(data):
+    response = MagicMock()
+    response.json.return_value = data
+    return response
+
+
+@pytest.fixture
+def mock_viacep():
+    with patch('common.http_client.get') as mock_get:
+        yield mock_get
+
+
+@pytest.fixture
+def cep_lages():
+    return CepModel.objects.create(
+        zip_code='88502060', street='Rua Antônio Gonçalves de Farias', neighborhood='Centro', city='Lages', state='SC'
+    )
+
+
+@pytest.fixture
+def client():
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username='morador'))
+    return client
+
+
+def test_local_cep_is_found_with_one_query_and_then_cached(cep_lages, mock_viacep, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        assert lookup_cep('88502-060')['city'] == 'Lages'
+    with django_assert_num_queries(0):
+        assert lookup_cep('88502060')['street'] == cep_lages.street
+
+    mock_viacep.assert_not_called()
+
+
+def test_unknown_cep_falls_back_to_viacep_and_is_stored(mock_viacep):
+    mock_viacep.return_value = viacep_response({
+        'cep': '01001-000', 'logradouro': 'Praça da Sé', 'bairro': 'Sé', 'localidade': 'São Paulo', 'uf': 'SP'
+    })
+
+    assert lookup_cep('01001-000')['city'] == 'São Paulo'
+
+    stored = CepModel.objects.get(pk='01001000')
+    assert stored.source == CepModel.Source.VIACEP
+    assert stored.street == 'Praça da Sé'
+    mock_viacep.assert_called_once()
+    assert mock_viacep.call_args.kwargs['timeout']
+
+
+def test_cep_that_does_not_exist_raises(mock_viacep):
+    mock_viacep.return_value = viacep_response({'erro': True})
+
+    with pytest.raises(CepNotFound):
+        lookup_cep('99999999')
+    assert not CepModel.objects.exists()
+
+
+def test_viacep_down_returns_none(mock_viacep):
+    mock_viacep.side_effect = requests.exceptions.ConnectionError('down')
+    assert lookup_cep('01001000') is None
+
+
+def test_invalid_cep_raises_value_error():
+    with pytest.raises(ValueError):
+        lookup_cep('123')
+
+
+def test_address_uses_local_cep_data(client, cep_lages, mock_viacep):
+    response = client.post('/api/v1/addresses/', data={
+        'zip_code': '88502-060', 'street': 'Rua digitada', 'number': '44',
+        'neighborhood': 'Outro', 'city': 'Outra', 'state': 'RS'
+    }, format='json')
+
+    assert response.status_code == status.HTTP_201_CREATED
+    address = AddressModel.objects.get()
+    assert (address.street, address.city, address.state) == (cep_lages.street, 'Lages', 'SC')
+    mock_viacep.assert_not_called()
+
+
+def test_address_creation_works_with_viacep_down(client, mock_viacep):
+    mock_viacep.side_effect = requests.exceptions.Timeout('timeout')
+
+    response = client.post('/api/v1/addresses/', data={
+        'zip_code': '01001-000', 'street': 'Praça da Sé', 'number': '1',
+        'neighborhood': 'Sé', 'city': 'São Paulo', 'state': 'SP'
+    }, format='json')
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert AddressModel.objects.get().street == 'Praça da Sé'
+
+
+def test_address_with_unknown_cep_is_rejected(client, mock_viacep):
+    mock_viacep.return_value = viacep_response({'erro': True})
+
+    response = client.post('/api/v1/addresses/', data={
+        'zip_code': '99999-999', 'street': 'Rua', 'number': '1',
+        'neighborhood': 'Bairro', 'city': 'Cidade', 'state': 'SC'
+    }, format='json')
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'zip_code' in response.json()
+
+
+def test_load_ceps_command_upserts_rows(tmp_path, cep_lages):
+    file = tmp_path / 'ceps.csv'
+    file.write_text(
+        'cep;logradouro;bairro;cidade;uf\n'
+        '88502-060;Rua Nova;Centro;Lages;SC\n'
+        '01001000;Praça da Sé;Sé;São Paulo;SP\n'
+        '123;Inválido;;Cidade;SC\n',
+        encoding='utf-8'
+    )
+
+    out = StringIO()
+    call_command('load_ceps', str(file), delimiter=';', batch_size=1, stdout=out)
+
+    assert 'Loaded 2 CEPs (1 invalid rows skipped)' in out.getvalue()
+    assert CepModel.objects.count() == 2
+    assert CepModel.objects.get(pk='88502060').street == 'Rua Nova'
+    assert CepModel.objects.get(pk='01001000').city == 'São Paulo'
@@ -1,5 +1,16 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
 from books.models import AuthorModel, BookModel, CategoryModel
+from books.services.bulk_update import bulk_update_books, read_csv_rows
+
+
+class BulkUpdateUploadForm(forms.Form):
+    file = forms.FileField(label='Arquivo CSV', help_text='Colunas: id ou isbn_13, stock e/ou price.')
+    dry_run = forms.BooleanField(label='Apenas validar', required=False)
+
 
 @admin.register(AuthorModel)
 class AuthorAdmin(admin.ModelAdmin):
@@ -41,15 +52,56 @@ class BookAdmin(admin.ModelAdmin):
     list_per_page = 15
     ordering = ('-created_at',)
     filter_horizontal = ('authors', 'categories')
+    change_list_template = 'admin/books/bookmodel/change_list.html'
+
+    # Quantos erros por linha mostrar na mensagem do admin
+    MAX_ERRORS_SHOWN = 20
+
+    def get_urls(self):
+        custom_urls = [
+            path(
+                'bulk-update/',
+                self.admin_site.admin_view(self.bulk_update_view),
+                name='books_bookmodel_bulk_update',
+            ),
+        ]
+        return custom_urls + super().get_urls()
+
+    def bulk_update_view(self, request):
+        if not self.has_change_permission(request):
+            return redirect('admin:books_bookmodel_changelist')
+
+        form = BulkUpdateUploadForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            dry_run = form.cleaned_data['dry_run']
+            try:
+                result = bulk_update_books(read_csv_rows(form.cleaned_data['file']), dry_run=dry_run)
+            except ValueError as e:
+                self.message_user(request, str(e), messages.ERROR)
+            else:
+                verb = 'seriam atualizados' if dry_run else 'atualizados'
+                self.message_user(request, f'{result.updated} livros {verb}.', messages.SUCCESS)
+                for error in result.errors[:self.MAX_ERRORS_SHOWN]:
+                    self.message_user(request, f"Linha {error['row']}: {error['detail']}", messages.WARNING)
+                if len(result.errors) > self.MAX_ERRORS_SHOWN:
+                    self.message_user(request, f'... e mais {len(result.errors) - self.MAX_ERRORS_SHOWN} linhas com erro.', messages.WARNING)
+                if not dry_run:
+                    return redirect('admin:books_bookmodel_changelist')
 
-    def get_queryset(self, request):
-        return super().get_queryset(request).prefetch_related('authors', 'categories')
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Atualizar estoque e preço em lote',
+            'form': form,
+        }
+        return TemplateResponse(request, 'admin/books/bookmodel/bulk_update.html', context)
 
+    # Autores e categorias vêm das colunas desnormalizadas: a lista não consulta as relações
     def get_authors(self, obj):
-        return ", ".join([author.name for author in obj.authors.all()])
+        return ", ".join(obj.authors_display)
     get_authors.short_description = "Authors"
 
     def get_categories(self, obj):
-        return ", ".join([category.name for category in obj.categories.all()])
+        return ", ".join(obj.categories_display)
     get_categories.short_description = "Categories"
     
\ No newline at end of file
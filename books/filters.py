@@ -0,0 +1,77 @@
+import django_filters
+from rest_framework import filters
+
+from books.models import BookModel
+from books.services.facets import PRICE_BAND_KEYS, price_band_q
+from books.services.search import search_books
+
+
+class NumberInFilter(django_filters.BaseInFilter, django_filters.NumberFilter):
+    """Lista de números separados por vírgula (ex: ?category=1,2)."""
+
+
+class BookFilterSet(django_filters.FilterSet):
+    """
+    Filtros do catálogo (barra lateral da loja). Valores de um mesmo filtro são combinados com OU; filtros diferentes, com E.
+    - ?category=1,2 e ?author=3: ids de categorias/autores.
+    - ?publisher=: editora (sem diferenciar maiúsculas).
+    - ?price_min= e ?price_max=: faixa de preço (inclusiva); ?price_band=25-50: uma faixa das facetas (PRICE_BANDS).
+    - ?in_stock=true|false: com ou sem estoque.
+    """
+    category = NumberInFilter(method='filter_category')
+    author = NumberInFilter(method='filter_author')
+    publisher = django_filters.CharFilter(field_name='publisher', lookup_expr='iexact')
+    price_min = django_filters.NumberFilter(field_name='price', lookup_expr='gte')
+    price_max = django_filters.NumberFilter(field_name='price', lookup_expr='lte')
+    price_band = django_filters.MultipleChoiceFilter(choices=[(key, key) for key in PRICE_BAND_KEYS], method='filter_price_band')
+    in_stock = django_filters.BooleanFilter(method='filter_in_stock')
+
+    class Meta:
+        model = BookModel
+        fields = ['category', 'author', 'publisher', 'price_min', 'price_max', 'price_band', 'in_stock']
+
+    # Subconsulta na tabela de relação em vez de JOIN: sem linhas duplicadas (nem DISTINCT) quando o livro tem várias
+    def filter_category(self, queryset, name, value):
+        links = BookModel.categories.through.objects.filter(categorymodel_id__in=value)
+        return queryset.filter(id__in=links.values('bookmodel_id'))
+
+    def filter_author(self, queryset, name, value):
+        links = BookModel.authors.through.objects.filter(authormodel_id__in=value)
+        return queryset.filter(id__in=links.values('bookmodel_id'))
+
+    def filter_price_band(self, queryset, name, value):
+        if not value:
+            return queryset
+        condition = price_band_q(value[0])
+        for key in value[1:]:
+            condition |= price_band_q(key)
+        return queryset.filter(condition)
+
+    def filter_in_stock(self, queryset, name, value):
+        return queryset.filter(stock__gt=0) if value else queryset.filter(stock=0)
+
+
+class CatalogSearchFilter(filters.SearchFilter):
+    """
+    Usa a busca do catálogo (ISBN exato, full-text e trigramas) no parâmetro ?search=.
+    Em bancos sem busca full-text, cai no SearchFilter padrão sobre search_fields.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+
+        results = search_books(queryset, query)
+        if results is None:
+            return super().filter_queryset(request, queryset, view)
+        return results
+
+
+class CatalogOrderingFilter(filters.OrderingFilter):
+    """Mantém a ordenação por relevância da busca, a não ser que o cliente peça outra com ?ordering=."""
+
+    def get_ordering(self, request, queryset, view):
+        if 'search_rank' in queryset.query.annotations and not request.query_params.get(self.ordering_param):
+            return ['-search_rank', '-id']
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,61 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from books.models import BookModel
+from books.services import autocomplete as autocomplete_service
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks the autocomplete endpoint logic on the current catalog: index build time, then p50/p95 of '
+        'in-memory lookups and of the database fallback for random title prefixes. '
+        'Use benchmark_catalog_search to create a synthetic catalog first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        titles = list(BookModel.objects.filter(is_active=True).values_list('title', flat=True)[:10_000])
+        if not titles:
+            raise CommandError('The catalog is empty.')
+
+        prefixes = []
+        for _ in range(options['queries']):
+            words = autocomplete_service.normalize(rng.choice(titles)).split() or ['a']
+            word = rng.choice(words)
+            prefixes.append(word[:rng.randint(1, len(word))])
+
+        started = time.perf_counter()
+        index = autocomplete_service._build_index('benchmark')
+        if index is None:
+            self.stdout.write(self.style.WARNING(
+                f'Catalog above AUTOCOMPLETE_MAX_INDEX_BOOKS ({autocomplete_service.MAX_INDEX_BOOKS}): no in-memory index.'
+            ))
+        else:
+            self.stdout.write(
+                f'Index build: {time.perf_counter() - started:.2f}s, {len(index)} entries for {len(index.books)} books'
+            )
+            self._report('memory', [lambda prefix=prefix: index.search(prefix, autocomplete_service.DEFAULT_LIMIT) for prefix in prefixes])
+
+        self._report('database', [
+            lambda prefix=prefix: autocomplete_service._search_database(prefix, autocomplete_service.DEFAULT_LIMIT)
+            for prefix in prefixes[:200]
+        ])
+
+    def _report(self, label, calls):
+        timings = []
+        for call in calls:
+            started = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(
+            f'{label:>8}: p50 {statistics.median(timings) * 1000:.3f}ms, p95 {p95 * 1000:.3f}ms, max {timings[-1] * 1000:.3f}ms'
+        )
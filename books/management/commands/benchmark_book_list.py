@@ -0,0 +1,87 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from books.models import AuthorModel, BookModel, CategoryModel
+from books.services.display_columns import refresh_display_columns
+from books.views.book_view import BookViewSetAPI
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares a catalog list page rendered with the full BookSerializer against the compact list '
+        'representation (and a ?fields= sparse fieldset): payload size, database time and serialization time. '
+        'Synthetic books are created inside a transaction that is rolled back at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=100, help='Books per page.')
+        parser.add_argument('--rounds', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._populate(options['books'])
+            variants = {
+                'full': ('retrieve', None),
+                'compact': ('list', None),
+                'fields': ('list', 'id,title,price'),
+            }
+            for label, (action, fields) in variants.items():
+                self._measure(label, action, fields, options['rounds'])
+            transaction.set_rollback(True)
+
+    def _populate(self, count):
+        author = AuthorModel.objects.create(name='Autor Benchmark')
+        category = CategoryModel.objects.create(name='Categoria Benchmark')
+        books = BookModel.objects.bulk_create([
+            BookModel(
+                title=f'Livro de benchmark {number}',
+                slug=f'livro-de-benchmark-{number}',
+                publisher='Editora Benchmark',
+                description='Uma descrição longa do livro. ' * 40,
+                price=49.90,
+                stock=10,
+                is_active=True,
+                weight_g=300,
+                height_cm=23,
+                width_cm=16,
+                length_cm=3,
+                thumbnail_url='https://books.google.com/books/content?id=benchmark',
+            ) for number in range(count)
+        ])
+        BookModel.authors.through.objects.bulk_create([
+            BookModel.authors.through(bookmodel_id=book.pk, authormodel_id=author.pk) for book in books
+        ])
+        BookModel.categories.through.objects.bulk_create([
+            BookModel.categories.through(bookmodel_id=book.pk, categorymodel_id=category.pk) for book in books
+        ])
+        refresh_display_columns(book.pk for book in books)
+        self.limit = count
+
+    def _measure(self, label, action, fields, rounds):
+        params = {'fields': fields} if fields else {}
+        view = BookViewSetAPI(action_map={'get': 'list'})
+        view.format_kwarg = None
+        view.request = view.initialize_request(RequestFactory().get('/api/v1/books/', params))
+        # "full" simula a listagem antiga: queryset e serializer do detalhe
+        view.action = action
+
+        query_times, serialize_times = [], []
+        for _ in range(rounds):
+            view.__dict__.pop('requested_fields', None)
+            started = time.perf_counter()
+            books = list(view.get_queryset().order_by('-created_at')[:self.limit])
+            query_times.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            payload = JSONRenderer().render(view.get_serializer(books, many=True).data)
+            serialize_times.append(time.perf_counter() - started)
+
+        self.stdout.write(
+            f'{label:>8}: {len(payload) / 1024:7.1f} KiB, query p50 {statistics.median(query_times) * 1000:.2f}ms, '
+            f'serialization p50 {statistics.median(serialize_times) * 1000:.2f}ms'
+        )
@@ -0,0 +1,120 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from books.models import AuthorModel, BookModel, CategoryModel
+from books.services.display_columns import refresh_display_columns
+from books.services.search import search_books, supports_full_text_search, update_search_vectors
+
+BENCHMARK_PREFIX = 'bench-'
+
+WORDS = [
+    'amor', 'guerra', 'noite', 'cidade', 'mar', 'sombra', 'segredo', 'jardim', 'viagem', 'memória',
+    'tempo', 'silêncio', 'história', 'caminho', 'fogo', 'céu', 'ilha', 'sertão', 'rio', 'montanha',
+    'verão', 'inverno', 'casa', 'estrela', 'sonho', 'vento', 'lua', 'sol', 'floresta', 'deserto',
+    'romance', 'mistério', 'destino', 'família', 'coração', 'liberdade', 'espelho', 'labirinto', 'janela', 'ponte',
+]
+FIRST_NAMES = ['Ana', 'Carlos', 'Mariana', 'João', 'Beatriz', 'Paulo', 'Clarice', 'Jorge', 'Cecília', 'Rubem']
+LAST_NAMES = ['Souza', 'Lima', 'Andrade', 'Machado', 'Lispector', 'Amado', 'Meireles', 'Braga', 'Ramos', 'Queiroz']
+CATEGORIES = ['Ficção', 'Romance', 'Poesia', 'História', 'Biografia', 'Fantasia', 'Suspense', 'Infantil', 'Ciência', 'Filosofia']
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks catalog search (ISBN, full-text, typo tolerant and author queries) on a synthetic catalog. '
+        'Benchmark books are marked with a "bench-" Google Books ID and reused between runs; use --cleanup to remove them. '
+        'Full-text search needs PostgreSQL; on other databases the simple search is measured instead.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=1_000_000, help='Size of the synthetic catalog.')
+        parser.add_argument('--queries', type=int, default=200, help='Queries per kind.')
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--cleanup', action='store_true', help='Delete the benchmark books and exit.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            deleted, _ = BookModel.objects.filter(google_books_id__startswith=BENCHMARK_PREFIX).delete()
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} benchmark rows.'))
+            return
+
+        if not supports_full_text_search():
+            self.stdout.write(self.style.WARNING('Not running on PostgreSQL: measuring the simple search fallback.'))
+
+        rng = random.Random(options['seed'])
+        self._populate(rng, options['books'], options['batch_size'])
+
+        queryset = BookModel.objects.filter(is_active=True)
+        isbns = list(
+            BookModel.objects.filter(google_books_id__startswith=BENCHMARK_PREFIX).values_list('isbn_13', flat=True)[:options['queries']]
+        )
+        kinds = {
+            'isbn': [rng.choice(isbns) for _ in range(options['queries'])],
+            'words': [' '.join(rng.sample(WORDS, 2)) for _ in range(options['queries'])],
+            'typo': [self._typo(rng, rng.choice(WORDS)) for _ in range(options['queries'])],
+            'author': [f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}' for _ in range(options['queries'])],
+        }
+
+        for kind, queries in kinds.items():
+            timings = []
+            for query in queries:
+                started = time.perf_counter()
+                results = search_books(queryset, query)
+                if results is None:
+                    results = queryset.filter(title__icontains=query).distinct()
+                list(results.values_list('pk', flat=True)[:20])
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            self.stdout.write(
+                f'{kind:>7}: p50 {statistics.median(timings) * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms, max {timings[-1] * 1000:.1f}ms'
+            )
+
+    def _typo(self, rng, word):
+        position = rng.randrange(1, len(word) - 1)
+        return word[:position] + word[position + 1] + word[position] + word[position + 2:]
+
+    def _populate(self, rng, count, batch_size):
+        existing = BookModel.objects.filter(google_books_id__startswith=BENCHMARK_PREFIX).count()
+        if existing >= count:
+            return
+
+        authors = [
+            AuthorModel.objects.get_or_create(name=f'{first} {last}')[0]
+            for first in FIRST_NAMES for last in LAST_NAMES
+        ]
+        categories = [CategoryModel.objects.get_or_create(name=name)[0] for name in CATEGORIES]
+        AuthorThrough = BookModel.authors.through
+        CategoryThrough = BookModel.categories.through
+
+        self.stdout.write(f'Creating {count - existing} benchmark books...')
+        for start in range(existing, count, batch_size):
+            with transaction.atomic():
+                books = BookModel.objects.bulk_create([
+                    BookModel(
+                        google_books_id=f'{BENCHMARK_PREFIX}{number}',
+                        isbn_13=f'990{number:010d}',
+                        title=' '.join(rng.sample(WORDS, rng.randint(2, 5))).capitalize(),
+                        publisher=f'Editora {rng.choice(LAST_NAMES)}',
+                        description=' '.join(rng.choices(WORDS, k=40)),
+                        price=rng.randint(20, 150),
+                        is_active=True,
+                    ) for number in range(start, min(start + batch_size, count))
+                ])
+                AuthorThrough.objects.bulk_create([
+                    AuthorThrough(bookmodel_id=book.pk, authormodel_id=rng.choice(authors).pk) for book in books
+                ])
+                CategoryThrough.objects.bulk_create([
+                    CategoryThrough(bookmodel_id=book.pk, categorymodel_id=rng.choice(categories).pk) for book in books
+                ])
+
+        self.stdout.write('Building search vectors...')
+        update_search_vectors()
+        refresh_display_columns()
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE books_bookmodel')
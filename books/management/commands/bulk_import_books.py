@@ -0,0 +1,78 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from books.services.bulk_import import BATCH_SIZE, CONCURRENCY, RATE_PER_SECOND, Checkpoint, import_volumes
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports many books from Google Books: reads one volume ID (or, with --queries, one search query) per line '
+        'from a file or stdin, fetches them concurrently under a rate limit and writes them in batches. '
+        'Interrupted runs resume from the checkpoint file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', type=str, help='File with one volume ID or query per line ("-" for stdin).')
+        parser.add_argument('--queries', action='store_true', help='Treat each line as a search query and import its results.')
+        parser.add_argument('--concurrency', type=int, default=CONCURRENCY, help='Concurrent requests to Google Books.')
+        parser.add_argument('--rate', type=float, default=RATE_PER_SECOND, help='Max requests per second (0 = unlimited).')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Lines written per transaction.')
+        parser.add_argument('--stock', type=int, default=0, help='Initial stock of the imported books.')
+        parser.add_argument(
+            '--checkpoint', type=str, default=None,
+            help='File recording finished lines (default: <source>.done; stdin runs have none unless given).',
+        )
+
+    def handle(self, *args, **options):
+        keys = self._read_keys(options['source'])
+
+        checkpoint_path = options['checkpoint'] or (None if options['source'] == '-' else f"{options['source']}.done")
+        checkpoint = Checkpoint(checkpoint_path) if checkpoint_path else None
+        total = len([key for key in keys if not checkpoint or key not in checkpoint.done])
+        if checkpoint and checkpoint.done:
+            self.stdout.write(f'Resuming: {len(keys) - total} lines already done according to {checkpoint_path}.')
+        self.stdout.write(f'Importing {total} lines with {options["concurrency"]} workers at up to {options["rate"]} req/s...')
+
+        def on_batch(stats):
+            remaining = (total - stats.read) / (stats.read / stats.elapsed) if stats.read else 0
+            self.stdout.write(
+                f'{stats.read}/{total} lines | {stats.imported} imported, {stats.skipped} skipped, {stats.failed} failed '
+                f'| {stats.per_second:.1f} books/s | ETA {remaining:.0f}s'
+            )
+
+        def on_failure(key, error):
+            self.stderr.write(f'{key}: {error}')
+
+        stats = import_volumes(
+            keys,
+            queries=options['queries'],
+            stock=options['stock'],
+            batch_size=options['batch_size'],
+            concurrency=options['concurrency'],
+            rate=options['rate'],
+            checkpoint=checkpoint,
+            on_batch=on_batch,
+            on_failure=on_failure,
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Finished in {stats.elapsed:.1f}s: {stats.imported} imported, {stats.skipped} skipped, {stats.failed} failed '
+            f'({stats.requests} requests, {stats.per_second:.1f} books/s).'
+        ))
+        if stats.failed:
+            self.stdout.write(self.style.WARNING('Lines that failed on network or API errors were not checkpointed; run the command again to retry them.'))
+
+    def _read_keys(self, source):
+        if source == '-':
+            return self._parse(sys.stdin)
+        try:
+            with open(source, encoding='utf-8') as file:
+                return self._parse(file)
+        except OSError as e:
+            raise CommandError(f'Could not read {source}: {e}')
+
+    def _parse(self, lines):
+        # Uma entrada por linha, sem repetições; linhas vazias e comentários (#) são ignorados
+        lines = (line.strip() for line in lines)
+        return list(dict.fromkeys(line for line in lines if line and not line.startswith('#')))
@@ -0,0 +1,31 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from books.services.bulk_update import bulk_update_books, read_csv_rows
+
+
+class Command(BaseCommand):
+    help = 'Updates stock and/or price of many books from a CSV (id or isbn_13, stock, price), e.g. the nightly supplier feed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', type=str, help='CSV file ("-" for stdin).')
+        parser.add_argument('--dry-run', action='store_true', help='Only validate the rows; nothing is written.')
+
+    def handle(self, *args, **options):
+        try:
+            if options['file'] == '-':
+                rows = read_csv_rows(sys.stdin)
+            else:
+                with open(options['file'], 'rb') as file:
+                    rows = read_csv_rows(file)
+            result = bulk_update_books(rows, dry_run=options['dry_run'])
+        except OSError as e:
+            raise CommandError(f'Could not read {options["file"]}: {e}')
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for error in result.errors:
+            self.stderr.write(f"Row {error['row']}: {error['detail']}")
+        verb = 'would be updated' if options['dry_run'] else 'updated'
+        self.stdout.write(self.style.SUCCESS(f'{result.updated} books {verb}, {len(result.errors)} rows with errors.'))
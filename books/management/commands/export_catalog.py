@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from books.services.catalog_export import (
+    EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_rows, next_updated_since, parse_updated_since, render_export,
+)
+
+
+class Command(BaseCommand):
+    help = 'Streams every book (with authors and categories) as NDJSON or CSV to a file or stdout, with flat memory usage.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-format', choices=EXPORT_FORMATS, default='ndjson')
+        parser.add_argument('--output', type=str, default='-', help='Destination file ("-" for stdout).')
+        parser.add_argument('--updated-since', type=str, default=None, help='Only books changed since this ISO 8601 date/time.')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help='Books read per database round trip.')
+
+    def handle(self, *args, **options):
+        updated_since = None
+        if options['updated_since']:
+            try:
+                updated_since = parse_updated_since(options['updated_since'])
+            except ValueError as e:
+                raise CommandError(f'Invalid --updated-since: {e}')
+
+        started_at = timezone.now()
+        lines = render_export(options['output_format'], export_rows(updated_since, chunk_size=options['chunk_size']))
+        if options['output'] == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+        else:
+            try:
+                with open(options['output'], 'w', encoding='utf-8', newline='') as file:
+                    file.writelines(lines)
+            except OSError as e:
+                raise CommandError(f'Could not write {options["output"]}: {e}')
+
+        # Vai para o stderr para não misturar com a exportação no stdout
+        self.stderr.write(
+            f'Export started at {started_at.isoformat()}; '
+            f'use {next_updated_since(started_at).isoformat()} as the next --updated-since.'
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from books.services.catalog_cache import bump_catalog_version
+from books.services.display_columns import refresh_display_columns
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the denormalized author/category columns of every book in batches. Use after loads that bypass model signals.'
+
+    def handle(self, *args, **options):
+        updated = refresh_display_columns()
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f'Display columns rebuilt for {updated} books.'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from books.services.search import supports_full_text_search, update_search_vectors
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the full-text search vector of every book (PostgreSQL only). Use after bulk imports that bypass model signals.'
+
+    def handle(self, *args, **options):
+        if not supports_full_text_search():
+            self.stdout.write(self.style.WARNING('Full-text search requires PostgreSQL; nothing to do.'))
+            return
+
+        updated = update_search_vectors()
+        self.stdout.write(self.style.SUCCESS(f'Search vectors rebuilt for {updated} books.'))
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:38
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# Mesmo vetor de books.services.search.book_search_vector, em SQL para não depender do código atual
+BACKFILL_SEARCH_VECTOR = """
+UPDATE books_bookmodel b SET search_vector =
+    setweight(to_tsvector('portuguese', coalesce(b.title, '')), 'A')
+    || setweight(to_tsvector('portuguese', coalesce((
+        SELECT string_agg(a.name, ' ') FROM books_authormodel a
+        JOIN books_bookmodel_authors ba ON ba.authormodel_id = a.id
+        WHERE ba.bookmodel_id = b.id
+    ), '')), 'A')
+    || setweight(to_tsvector('portuguese', coalesce((
+        SELECT string_agg(c.name, ' ') FROM books_categorymodel c
+        JOIN books_bookmodel_categories bc ON bc.categorymodel_id = c.id
+        WHERE bc.bookmodel_id = b.id
+    ), '')), 'B')
+    || setweight(to_tsvector('portuguese', coalesce(b.publisher, '')), 'C')
+    || setweight(to_tsvector('portuguese', coalesce(b.description, '')), 'D');
+"""
+
+CREATE_INDEXES = """
+CREATE INDEX IF NOT EXISTS books_book_search_vector_gin ON books_bookmodel USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS books_book_title_trgm_gin ON books_bookmodel USING gin (title gin_trgm_ops);
+"""
+
+DROP_INDEXES = """
+DROP INDEX IF EXISTS books_book_search_vector_gin;
+DROP INDEX IF EXISTS books_book_title_trgm_gin;
+"""
+
+
+def create_search_indexes(apps, schema_editor):
+    # Indices GIN e trigramas só existem no PostgreSQL; nos outros bancos a busca simples continua valendo
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(BACKFILL_SEARCH_VECTOR)
+    schema_editor.execute(CREATE_INDEXES)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(DROP_INDEXES)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0004_alter_bookmodel_source'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='bookmodel',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+CREATE_INDEXES = """
+CREATE INDEX IF NOT EXISTS books_book_title_upper_prefix ON books_bookmodel (UPPER(title) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS books_author_name_upper_prefix ON books_authormodel (UPPER(name) text_pattern_ops);
+"""
+
+DROP_INDEXES = """
+DROP INDEX IF EXISTS books_book_title_upper_prefix;
+DROP INDEX IF EXISTS books_author_name_upper_prefix;
+"""
+
+
+def create_prefix_indexes(apps, schema_editor):
+    # Índices para UPPER(coluna) LIKE 'PREFIXO%' no autocomplete quando o catálogo não cabe em memória
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(CREATE_INDEXES)
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(DROP_INDEXES)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0005_bookmodel_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0006_autocomplete_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookmodel',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='books_active_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:02
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def fill_display_columns(apps, schema_editor):
+    # Mesma regra de books.services.display_columns, com os modelos históricos
+    BookModel = apps.get_model('books', 'BookModel')
+    relations = (
+        (BookModel.authors.through, 'authormodel', 'authors_display', 'authors_display_ids'),
+        (BookModel.categories.through, 'categorymodel', 'categories_display', 'categories_display_ids'),
+    )
+    fields = [field for _, _, *names in relations for field in names]
+
+    last_pk = 0
+    while True:
+        batch = list(BookModel.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:BATCH_SIZE])
+        if not batch:
+            return
+        books = {pk: BookModel(pk=pk) for pk in batch}
+        for through, related, display_field, ids_field in relations:
+            links = defaultdict(list)
+            rows = through.objects.filter(bookmodel_id__in=batch).order_by('pk')
+            for book_id, related_id, name in rows.values_list('bookmodel_id', f'{related}_id', f'{related}__name'):
+                links[book_id].append((related_id, name))
+            for pk, book in books.items():
+                setattr(book, display_field, [name for _, name in links[pk]])
+                setattr(book, ids_field, [related_id for related_id, _ in links[pk]])
+        BookModel.objects.bulk_update(books.values(), fields)
+        last_pk = batch[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0007_active_created_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookmodel',
+            name='authors_display_ids',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='bookmodel',
+            name='authors_display',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='bookmodel',
+            name='categories_display',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='bookmodel',
+            name='categories_display_ids',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(fill_display_columns, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
@@ -43,11 +44,23 @@ class BookModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Busca full-text (PostgreSQL): mantido por books.services.search.update_search_vectors
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+
+    # Nomes e ids de autores/categorias copiados das relações, para a listagem e o admin lerem só esta tabela:
+    # mantidos por books.services.display_columns.refresh_display_columns (signals, importação e rebuild_display_columns)
+    authors_display = models.JSONField(default=list, blank=True, editable=False)
+    authors_display_ids = models.JSONField(default=list, blank=True, editable=False)
+    categories_display = models.JSONField(default=list, blank=True, editable=False)
+    categories_display_ids = models.JSONField(default=list, blank=True, editable=False)
+
     class Meta:
         indexes = [
             models.Index(fields=["title"]),
             models.Index(fields=["isbn_13"]),
             models.Index(fields=["google_books_id"]),
+            # Paginação por cursor da listagem (só livros ativos)
+            models.Index(fields=["-created_at", "-id"], condition=models.Q(is_active=True), name="books_active_created_id_idx"),
         ]
     
     def __str__(self):
@@ -1 +1 @@
-from .book_serializer import BookSerializer
\ No newline at end of file
+from .book_serializer import BookListSerializer, BookSerializer
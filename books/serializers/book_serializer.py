@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from books.models import AuthorModel, CategoryModel, BookModel
 from django.core.exceptions import ValidationError 
+from common.serializers import SparseFieldsetMixin
 
 
 
@@ -19,7 +20,40 @@ class CategorySerializer(serializers.ModelSerializer):
         ]
 
 
-class BookSerializer(serializers.ModelSerializer):
+# Colunas do BookModel lidas por campos que não têm o mesmo nome de uma coluna (usado no only() das listagens)
+MODEL_COLUMNS_BY_FIELD = {
+    'formatted_price': ('price',),
+    'is_ready_for_shipping': ('weight_g', 'height_cm', 'width_cm', 'length_cm'),
+}
+# Na listagem compacta, os autores vêm da coluna desnormalizada (sem prefetch da relação)
+LIST_MODEL_COLUMNS_BY_FIELD = {**MODEL_COLUMNS_BY_FIELD, 'authors': ('authors_display',)}
+
+
+class BookListSerializer(serializers.ModelSerializer):
+    """
+    Representação compacta da listagem do catálogo: sem descrição, dimensões nem serializers aninhados.
+    Os nomes dos autores vêm de BookModel.authors_display, então a listagem lê só a tabela de livros.
+    """
+    authors = serializers.SerializerMethodField()
+
+    class Meta:
+        model = BookModel
+        fields = [
+            "id",
+            "title",
+            "slug",
+            "authors",
+            "price",
+            "thumbnail_url",
+            "stock",
+        ]
+        read_only_fields = fields
+
+    def get_authors(self, obj: BookModel) -> list:
+        return list(obj.authors_display)
+
+
+class BookSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     authors = AuthorSerializer(read_only=True, many=True)
     author_ids = serializers.PrimaryKeyRelatedField(
         queryset=AuthorModel.objects.all(),
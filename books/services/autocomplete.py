@@ -0,0 +1,230 @@
+import bisect
+import hashlib
+from array import array
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+from decouple import config
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from django.db.models.functions import Upper
+
+from books.models import AuthorModel, BookModel
+from books.services.catalog_cache import catalog_version
+
+# Acima desta quantidade de livros ativos o índice em memória não é montado e a busca vai direto ao banco.
+# Cada livro custa o título e os nomes dos autores (uma vez cada) mais ~20 bytes por palavra indexada
+MAX_INDEX_BOOKS = config('AUTOCOMPLETE_MAX_INDEX_BOOKS', default=200_000, cast=int)
+# Entradas do índice examinadas por busca (limita o custo de prefixos curtos, como "a")
+SCAN_LIMIT = config('AUTOCOMPLETE_SCAN_LIMIT', default=500, cast=int)
+# Por quanto tempo uma resposta pode ser cacheada (cliente/CDN e, no fallback, o cache do Django)
+CACHE_SECONDS = config('AUTOCOMPLETE_CACHE_SECONDS', default=60, cast=int)
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+
+# Ordem das sugestões: início do título, outra palavra do título, nome do autor
+TITLE_START, TITLE_WORD, AUTHOR = 0, 1, 2
+
+
+def normalize(text: str) -> str:
+    """
+    Minúsculas, sem acentos e sem pontuação, para comparar prefixos.
+    >>> normalize('  Grande Sertão: Veredas ')
+    'grande sertao veredas'
+    """
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char)).casefold()
+    return ' '.join(re.findall(r'\w+', text))
+
+
+def _word_offsets(text: str) -> list:
+    """
+    Onde começa cada palavra de um texto normalizado: o texto a partir dali é um prefixo buscável.
+    >>> _word_offsets('dom casmurro')
+    [0, 4]
+    """
+    return [0] + [position + 1 for position, char in enumerate(text) if char == ' ']
+
+
+class _PrefixIndex:
+    """
+    Entradas (texto, posição da palavra, tipo, book_id) ordenadas pelo texto a partir da palavra;
+    uma busca é um bisect seguido de uma varredura curta. Cada texto normalizado é guardado uma vez
+    e as entradas ficam em arrays de inteiros, em vez de uma string por sufixo.
+    """
+
+    def __init__(self, version: str, books: dict, texts: list, entries: list):
+        self.version = version
+        self.books = books  # {book_id: (título, (autores...))}
+        self.texts = texts
+        self.text_ids = array('L', (entry[0] for entry in entries))
+        self.offsets = array('H', (entry[1] for entry in entries))
+        self.kinds = array('B', (entry[2] for entry in entries))
+        self.book_ids = array('Q', (entry[3] for entry in entries))
+
+    def __len__(self) -> int:
+        return len(self.book_ids)
+
+    def _key(self, position: int) -> str:
+        return self.texts[self.text_ids[position]][self.offsets[position]:]
+
+    def search(self, query: str, limit: int) -> list:
+        start = bisect.bisect_left(range(len(self)), query, key=self._key)
+        ranks = {}
+        for position in range(start, min(start + SCAN_LIMIT, len(self))):
+            if not self.texts[self.text_ids[position]].startswith(query, self.offsets[position]):
+                break
+            book_id, kind = self.book_ids[position], self.kinds[position]
+            ranks[book_id] = min(kind, ranks.get(book_id, kind))
+
+        best = sorted(ranks, key=lambda book_id: (ranks[book_id], self.books[book_id][0], book_id))[:limit]
+        return [_suggestion(book_id, *self.books[book_id]) for book_id in best]
+
+
+def _suggestion(book_id, title, authors) -> dict:
+    return {'id': book_id, 'title': title, 'authors': list(authors)}
+
+
+def _build_index(version: str):
+    books = BookModel.objects.filter(is_active=True)
+    if books.count() > MAX_INDEX_BOOKS:
+        return None
+
+    authors = defaultdict(list)
+    author_rows = BookModel.authors.through.objects.filter(bookmodel__is_active=True).order_by('pk')
+    for book_id, name in author_rows.values_list('bookmodel_id', 'authormodel__name'):
+        authors[book_id].append(name)
+
+    index_books = {}
+    texts = []
+    author_text_ids = {}  # Um autor com muitos livros tem o nome normalizado guardado uma vez só
+    entries = []
+    for book_id, title in books.values_list('pk', 'title').iterator(chunk_size=5000):
+        book_authors = tuple(authors.get(book_id, ()))
+        index_books[book_id] = (title, book_authors)
+        texts.append(normalize(title))
+        text_id = len(texts) - 1
+        for offset in _word_offsets(texts[text_id]):
+            entries.append((text_id, offset, TITLE_START if offset == 0 else TITLE_WORD, book_id))
+        for name in book_authors:
+            if name not in author_text_ids:
+                texts.append(normalize(name))
+                author_text_ids[name] = len(texts) - 1
+            text_id = author_text_ids[name]
+            entries.extend((text_id, offset, AUTHOR, book_id) for offset in _word_offsets(texts[text_id]))
+    entries.sort(key=lambda entry: (texts[entry[0]][entry[1]:], entry[2], entry[3]))
+    return _PrefixIndex(version, index_books, texts, entries)
+
+
+_index = None
+_index_missing_version = None  # Versão para a qual o catálogo passou de MAX_INDEX_BOOKS
+_rebuild_lock = threading.Lock()
+
+
+def _start_background(target) -> None:
+    def run():
+        try:
+            target()
+        finally:
+            # A thread abriu a própria conexão com o banco (uma por thread): fecha, senão cada remontagem deixa uma aberta
+            connection.close()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def _rebuild(version: str) -> None:
+    global _index, _index_missing_version
+    try:
+        index = _build_index(version)
+        if index is None:
+            _index, _index_missing_version = None, version
+        else:
+            _index, _index_missing_version = index, None
+    finally:
+        _rebuild_lock.release()
+
+
+def _current_index():
+    """
+    O índice do processo para a versão atual do catálogo.
+    - Primeira busca do processo: monta o índice (com o lock, uma vez só).
+    - Catálogo mudou: continua usando o índice antigo enquanto um novo é montado em segundo plano.
+    Retorna None quando o catálogo é grande demais para ficar em memória.
+    """
+    version = catalog_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    if index is None and _index_missing_version == version:
+        return None
+
+    if index is not None:
+        if _rebuild_lock.acquire(blocking=False):
+            _start_background(lambda: _rebuild(version))
+        return index
+
+    _rebuild_lock.acquire()
+    if (_index is not None and _index.version == version) or _index_missing_version == version:
+        _rebuild_lock.release()
+        return _index
+    _rebuild(version)
+    return _index
+
+
+def _search_database(query: str, limit: int) -> list:
+    # Usa os índices de prefixo em UPPER(title)/UPPER(name) (text_pattern_ops) no PostgreSQL
+    prefix = query.upper()
+    author_ids = AuthorModel.objects.annotate(name_upper=Upper('name')).filter(name_upper__startswith=prefix).values('pk')
+    rows = list(
+        BookModel.objects.filter(is_active=True)
+        .annotate(title_upper=Upper('title'))
+        .filter(Q(title_upper__startswith=prefix) | Q(authors__in=author_ids))
+        .order_by('title', 'pk')
+        .values_list('pk', 'title')
+        .distinct()[:limit]
+    )
+
+    authors = defaultdict(list)
+    author_rows = BookModel.authors.through.objects.filter(bookmodel_id__in=[pk for pk, _ in rows]).order_by('pk')
+    for book_id, name in author_rows.values_list('bookmodel_id', 'authormodel__name'):
+        authors[book_id].append(name)
+    return [_suggestion(pk, title, authors.get(pk, ())) for pk, title in rows]
+
+
+def autocomplete(query: str, limit: int = DEFAULT_LIMIT) -> list:
+    """
+    Sugestões de livros para uma caixa de busca, pelo prefixo do título (de qualquer palavra dele) ou do autor.
+    Usa o índice em memória do processo; se o catálogo for grande demais, consulta o banco
+    (prefixo do título/autor, ignorando maiúsculas) e cacheia o resultado por prefixo.
+    Args:
+        query (str): O que o usuário digitou até agora.
+        limit (int): Quantidade máxima de sugestões.
+    Retorna:
+        list[dict]: [{id, title, authors}], começos de título primeiro.
+    """
+    normalized = normalize(query)
+    if not normalized:
+        return []
+
+    index = _current_index()
+    if index is not None:
+        return index.search(normalized, limit)
+
+    prefix = query.strip()
+    digest = hashlib.sha256(prefix.casefold().encode()).hexdigest()
+    cache_key = f'books:autocomplete:{catalog_version()}:{limit}:{digest}'
+    suggestions = cache.get(cache_key)
+    if suggestions is None:
+        suggestions = _search_database(prefix, limit)
+        cache.set(cache_key, suggestions, timeout=CACHE_SECONDS)
+    return suggestions
+
+
+def clear_autocomplete_index() -> None:
+    """Descarta o índice em memória (usado nos testes)."""
+    global _index, _index_missing_version
+    _index = None
+    _index_missing_version = None
@@ -0,0 +1,265 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import requests
+from decouple import config
+from django.db import transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+from books.models import BookModel
+from books.services.catalog_cache import bump_catalog_version
+from books.services.display_columns import refresh_display_columns
+from books.services.google_books_api import fetch_volume, search_google_api, volume_fields
+from books.services.name_resolver import resolve_authors, resolve_categories
+from books.services.search import update_search_vectors
+
+# Requisições por segundo à API do Google Books, somando todas as threads (0 = sem limite)
+RATE_PER_SECOND = config('GOOGLE_BOOKS_IMPORT_RATE_PER_SECOND', default=10, cast=float)
+# Requisições simultâneas; até HTTP_POOL_MAXSIZE as conexões são reaproveitadas
+CONCURRENCY = config('GOOGLE_BOOKS_IMPORT_CONCURRENCY', default=8, cast=int)
+# Entradas (IDs ou buscas) gravadas por transação
+BATCH_SIZE = config('GOOGLE_BOOKS_IMPORT_BATCH_SIZE', default=500, cast=int)
+
+
+class RateLimiter:
+    """
+    Token bucket compartilhado entre threads: no máximo `rate` chamadas por segundo, com rajadas de até `burst`.
+    Cada acquire() reserva a sua vez e dorme fora do lock até ela chegar.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(burst)
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            self.sleep(wait)
+
+
+class Checkpoint:
+    """
+    Arquivo com as entradas já concluídas (uma por linha), para retomar uma importação interrompida.
+    Uma entrada só é gravada depois que o lote dela foi confirmado no banco.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                self.done = {line.rstrip('\n') for line in file if line.strip()}
+
+    def record(self, keys) -> None:
+        keys = [key for key in keys if key not in self.done]
+        if not keys:
+            return
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.writelines(f'{key}\n' for key in keys)
+            file.flush()
+            os.fsync(file.fileno())
+        self.done.update(keys)
+
+
+@dataclass
+class ImportStats:
+    read: int = 0
+    imported: int = 0
+    skipped: int = 0
+    failed: int = 0
+    requests: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def per_second(self) -> float:
+        return self.imported / self.elapsed if self.elapsed else 0.0
+
+
+def _batches(keys, size: int):
+    batch = []
+    for key in keys:
+        batch.append(key)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _drop_duplicates(volumes: list) -> tuple:
+    """Remove volumes que repetem google_books_id/ISBN dentro do lote ou de livros já cadastrados."""
+    seen = {'google_books_id': set(), 'isbn_13': set(), 'isbn_10': set()}
+    unique = []
+    for fields in volumes:
+        values = {name: fields['book'][name] for name in seen if fields['book'][name]}
+        if any(value in seen[name] for name, value in values.items()):
+            continue
+        for name, value in values.items():
+            seen[name].add(value)
+        unique.append(fields)
+
+    condition = Q(pk__in=[])
+    for name, values in seen.items():
+        if values:
+            condition |= Q(**{f'{name}__in': values})
+    existing = {name: set() for name in seen}
+    for row in BookModel.objects.filter(condition).values(*seen):
+        for name in seen:
+            existing[name].add(row[name])
+
+    new = [
+        fields for fields in unique
+        if not any(fields['book'][name] and fields['book'][name] in existing[name] for name in seen)
+    ]
+    return new, len(volumes) - len(new)
+
+
+@transaction.atomic
+def write_volumes(volumes: list, stock: int = 0) -> tuple:
+    """
+    Grava um lote de volumes (ver volume_fields) com um número fixo de consultas, qualquer que seja o tamanho do lote
+    (exceto o INSERT dos livros, que o banco divide pelo seu limite de parâmetros por consulta).
+    Livros já cadastrados (mesmo google_books_id ou ISBN) são ignorados.
+    Retorna:
+        tuple: (importados, ignorados)
+    """
+    volumes, skipped = _drop_duplicates(volumes)
+    if not volumes:
+        return 0, skipped
+
+    authors = resolve_authors(name for fields in volumes for name in fields['authors'])
+    categories = resolve_categories(name for fields in volumes for name in fields['categories'])
+
+    # bulk_create não chama save(): o slug é preenchido aqui
+    BookModel.objects.bulk_create(
+        [BookModel(**fields['book'], slug=slugify(fields['book']['title']), stock=stock) for fields in volumes],
+        ignore_conflicts=True,
+    )
+    book_ids = dict(
+        BookModel.objects.filter(google_books_id__in=[fields['book']['google_books_id'] for fields in volumes])
+        .values_list('google_books_id', 'pk')
+    )
+
+    author_links, category_links = [], []
+    for fields in volumes:
+        book_id = book_ids.get(fields['book']['google_books_id'])
+        if book_id is None:
+            continue
+        author_links.extend(
+            BookModel.authors.through(bookmodel_id=book_id, authormodel_id=authors[name]) for name in set(fields['authors'])
+        )
+        category_links.extend(
+            BookModel.categories.through(bookmodel_id=book_id, categorymodel_id=categories[name])
+            for name in set(fields['categories'])
+        )
+    BookModel.authors.through.objects.bulk_create(author_links, ignore_conflicts=True)
+    BookModel.categories.through.objects.bulk_create(category_links, ignore_conflicts=True)
+
+    # Os signals não rodam em bulk_create: vetor de busca, colunas de exibição e versão do catálogo são atualizados uma vez por lote
+    update_search_vectors(book_ids.values())
+    refresh_display_columns(book_ids.values())
+    bump_catalog_version()
+    return len(book_ids), skipped + len(volumes) - len(book_ids)
+
+
+def _fetch(limiter: RateLimiter, key: str, queries: bool):
+    # Roda nas threads: só HTTP, nenhum acesso ao banco
+    limiter.acquire()
+    try:
+        if queries:
+            return search_google_api(key).get('items', []), None
+        return [fetch_volume(key)], None
+    except (requests.exceptions.RequestException, ValueError) as e:
+        return None, e
+
+
+def import_volumes(keys, *, queries: bool = False, stock: int = 0, batch_size: int = BATCH_SIZE,
+                   concurrency: int = CONCURRENCY, rate: float = RATE_PER_SECOND,
+                   checkpoint: Checkpoint = None, on_batch=None, on_failure=None) -> ImportStats:
+    """
+    Importa muitos volumes do Google Books: as requisições rodam em paralelo (pool limitado e rate limit),
+    enquanto o lote anterior é gravado com bulk_create.
+    Args:
+        keys (iterable): IDs de volumes ou, com queries=True, termos de busca (cada um importa a página de resultados).
+        stock (int): Estoque inicial dos livros criados.
+        checkpoint (Checkpoint): Entradas já concluídas são puladas e as novas são registradas a cada lote.
+        on_batch (callable): Chamado com o ImportStats depois de cada lote gravado.
+        on_failure (callable): Chamado com (entrada, erro) para cada entrada que falhou.
+    Retorna:
+        ImportStats: Totais da importação.
+    Observações:
+        - Falhas de rede/API não são registradas no checkpoint e são tentadas de novo na próxima execução.
+        - Volumes inexistentes são registrados (tentar de novo não adianta).
+    """
+    stats = ImportStats()
+    limiter = RateLimiter(rate, burst=max(1, concurrency))
+    done = checkpoint.done if checkpoint else set()
+    pending_keys = (key for key in dict.fromkeys(keys) if key not in done)
+
+    def submit(executor, batch):
+        stats.read += len(batch)
+        to_fetch = batch
+        if not queries:
+            # IDs já cadastrados não gastam requisição
+            existing = set(BookModel.objects.filter(google_books_id__in=batch).values_list('google_books_id', flat=True))
+            stats.skipped += len(existing)
+            to_fetch = [key for key in batch if key not in existing]
+        stats.requests += len(to_fetch)
+        return batch, [(key, executor.submit(_fetch, limiter, key, queries)) for key in to_fetch]
+
+    def write(batch, futures):
+        finished = set(batch)
+        volumes = []
+        for key, future in futures:
+            items, error = future.result()
+            if error is None:
+                for item in items:
+                    try:
+                        volumes.append(volume_fields(item))
+                    except ValueError:
+                        stats.skipped += 1
+                continue
+            stats.failed += 1
+            if on_failure:
+                on_failure(key, error)
+            if not isinstance(error, ValueError):
+                finished.discard(key)
+
+        imported, skipped = write_volumes(volumes, stock=stock)
+        stats.imported += imported
+        stats.skipped += skipped
+        if checkpoint:
+            checkpoint.record([key for key in batch if key in finished])
+        if on_batch:
+            on_batch(stats)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        previous = None
+        for batch in _batches(pending_keys, max(1, batch_size)):
+            current = submit(executor, batch)
+            if previous:
+                write(*previous)
+            previous = current
+        if previous:
+            write(*previous)
+    return stats
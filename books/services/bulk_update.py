@@ -0,0 +1,223 @@
+import csv
+import io
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from decouple import config
+from django.db import connection, transaction
+from django.utils import timezone
+
+from books.models import BookModel
+from books.services.catalog_cache import bump_catalog_version, forget_stocks
+
+# Linhas aceitas por envio (API e admin); o feed noturno do fornecedor tem ~50 mil
+MAX_ROWS = config('BOOK_BULK_UPDATE_MAX_ROWS', default=100_000, cast=int)
+# Livros por consulta/UPDATE
+CHUNK_SIZE = config('BOOK_BULK_UPDATE_CHUNK_SIZE', default=1000, cast=int)
+
+# Colunas lidas para validar as linhas (regra de BookModel.clean para livros ativos com preço)
+_LOOKUP_COLUMNS = ('pk', 'isbn_13', 'is_active', 'weight_g', 'height_cm', 'width_cm', 'length_cm')
+_PRICE_FIELD = BookModel._meta.get_field('price')
+
+
+@dataclass
+class BulkUpdateResult:
+    updated: int = 0
+    errors: list = field(default_factory=list)  # [{'row': n, 'detail': '...'}], n a partir de 1
+
+    def add_error(self, row: int, detail: str) -> None:
+        self.errors.append({'row': row, 'detail': detail})
+
+
+def read_csv_rows(file) -> list:
+    """
+    Linhas de um CSV (arquivo binário ou texto) com cabeçalho id ou isbn_13, stock e/ou price.
+    Aceita "," ou ";" como separador (planilhas em português usam ";" e vírgula decimal).
+    Lança:
+        ValueError: Se o arquivo não for texto UTF-8.
+    """
+    content = file.read()
+    if isinstance(content, bytes):
+        try:
+            content = content.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ValueError('O arquivo deve ser um CSV em UTF-8.')
+    header = content.split('\n', 1)[0]
+    delimiter = ';' if header.count(';') > header.count(',') else ','
+    reader = csv.DictReader(io.StringIO(content), delimiter=delimiter)
+    return [{(name or '').strip().lower(): value for name, value in row.items()} for row in reader]
+
+
+def _blank(value) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _parse_stock(value):
+    try:
+        stock = int(str(value).strip())
+    except ValueError:
+        raise ValueError('stock deve ser um número inteiro.')
+    if stock < 0:
+        raise ValueError('stock não pode ser negativo.')
+    return stock
+
+
+def _parse_price(value):
+    text = str(value).strip()
+    if ',' in text and '.' not in text:
+        text = text.replace(',', '.')
+    try:
+        price = Decimal(text)
+    except InvalidOperation:
+        raise ValueError('price deve ser um número (ex: 29.90).')
+    if not price.is_finite() or price <= 0:
+        raise ValueError('O preço se definido, deve ser maior que zero!')
+    cents = Decimal(1).scaleb(-_PRICE_FIELD.decimal_places)
+    if price != price.quantize(cents) or len(price.quantize(cents).as_tuple().digits) > _PRICE_FIELD.max_digits:
+        raise ValueError(
+            f'price deve ter no máximo {_PRICE_FIELD.decimal_places} casas decimais e {_PRICE_FIELD.max_digits} dígitos.'
+        )
+    return price
+
+
+def _parse_row(row) -> tuple:
+    """(('id', pk) ou ('isbn_13', isbn), {stock/price informados}), ou ValueError."""
+    if not isinstance(row, dict):
+        raise ValueError('Cada linha deve ser um objeto com id ou isbn_13, stock e/ou price.')
+
+    if not _blank(row.get('id')):
+        try:
+            key = ('id', int(str(row['id']).strip()))
+        except ValueError:
+            raise ValueError('id deve ser um número inteiro.')
+    elif not _blank(row.get('isbn_13')):
+        key = ('isbn_13', str(row['isbn_13']).replace('-', '').replace(' ', ''))
+    else:
+        raise ValueError('Informe id ou isbn_13.')
+
+    changes = {}
+    if not _blank(row.get('stock')):
+        changes['stock'] = _parse_stock(row['stock'])
+    if not _blank(row.get('price')):
+        changes['price'] = _parse_price(row['price'])
+    if not changes:
+        raise ValueError('Informe stock e/ou price.')
+    return key, changes
+
+
+def _chunks(values: list):
+    for start in range(0, len(values), CHUNK_SIZE):
+        yield values[start:start + CHUNK_SIZE]
+
+
+def _lookup(lookup: str, values) -> dict:
+    books = {}
+    for chunk in _chunks(sorted(set(values))):
+        for book in BookModel.objects.filter(**{f'{lookup}__in': chunk}).values(*_LOOKUP_COLUMNS):
+            books[book['pk'] if lookup == 'pk' else book[lookup]] = book
+    return books
+
+
+def _ready_for_shipping(book: dict) -> bool:
+    return all(book[name] is not None and book[name] > 0 for name in ('weight_g', 'height_cm', 'width_cm', 'length_cm'))
+
+
+def validate_rows(rows: list, result: BulkUpdateResult) -> dict:
+    """
+    Valida as linhas em memória (uma consulta por CHUNK_SIZE ids/ISBNs) e registra os erros em result.
+    Retorna:
+        dict: {book_id: {'stock': ..., 'price': ...}} só com as linhas válidas.
+    """
+    parsed = []
+    for number, row in enumerate(rows, start=1):
+        try:
+            parsed.append((number, *_parse_row(row)))
+        except ValueError as e:
+            result.add_error(number, str(e))
+
+    by_id = _lookup('pk', [value for _, (kind, value), _ in parsed if kind == 'id'])
+    by_isbn = _lookup('isbn_13', [value for _, (kind, value), _ in parsed if kind == 'isbn_13'])
+
+    updates = {}
+    first_row = {}
+    for number, (kind, value), changes in parsed:
+        book = (by_id if kind == 'id' else by_isbn).get(value)
+        if book is None:
+            result.add_error(number, 'Livro não encontrado.')
+        elif book['pk'] in updates:
+            result.add_error(number, f"Livro repetido (já informado na linha {first_row[book['pk']]}).")
+        elif 'price' in changes and book['is_active'] and not _ready_for_shipping(book):
+            result.add_error(
+                number,
+                'Um livro ativo e com preço deve ter todas as informações de peso e dimensões para o cálculo do frete!',
+            )
+        else:
+            updates[book['pk']] = changes
+            first_row[book['pk']] = number
+
+    # Os erros de leitura e os de consulta saem de passagens diferentes: devolve na ordem das linhas
+    result.errors.sort(key=lambda error: error['row'])
+    return updates
+
+
+def _update_from_values(updates: dict, now) -> None:
+    # PostgreSQL: um UPDATE ... FROM (VALUES ...) por lote; COALESCE mantém o campo que a linha não informou
+    table = connection.ops.quote_name(BookModel._meta.db_table)
+    for chunk in _chunks(list(updates.items())):
+        values = ', '.join(['(%s::bigint, %s::integer, %s::numeric)'] * len(chunk))
+        params = [now]
+        for book_id, changes in chunk:
+            params += [book_id, changes.get('stock'), changes.get('price')]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} AS b SET stock = COALESCE(v.stock, b.stock), price = COALESCE(v.price, b.price), '
+                f'updated_at = %s FROM (VALUES {values}) AS v(id, stock, price) WHERE b.id = v.id',
+                params,
+            )
+
+
+def _bulk_update(updates: dict, now) -> None:
+    # Demais bancos: bulk_update agrupado pelos campos informados, para uma linha só de preço não sobrescrever o estoque
+    groups = {}
+    for book_id, changes in updates.items():
+        groups.setdefault(tuple(sorted(changes)), []).append(BookModel(pk=book_id, updated_at=now, **changes))
+    for fields, books in groups.items():
+        BookModel.objects.bulk_update(books, [*fields, 'updated_at'], batch_size=CHUNK_SIZE)
+
+
+@transaction.atomic
+def apply_updates(updates: dict) -> int:
+    """
+    Grava estoque/preço em lote e invalida o que depende deles: o cache de estoque dos livros e,
+    se algum preço mudou, a versão do catálogo (respostas cacheadas mostram o preço).
+    """
+    if not updates:
+        return 0
+    now = timezone.now()
+    if connection.vendor == 'postgresql':
+        _update_from_values(updates, now)
+    else:
+        _bulk_update(updates, now)
+
+    forget_stocks([book_id for book_id, changes in updates.items() if 'stock' in changes])
+    if any('price' in changes for changes in updates.values()):
+        bump_catalog_version()
+    return len(updates)
+
+
+def bulk_update_books(rows: list, dry_run: bool = False) -> BulkUpdateResult:
+    """
+    Atualiza estoque e/ou preço de muitos livros de uma vez.
+    As linhas válidas são gravadas mesmo que outras tenham erro; cada erro traz o número da linha.
+    Args:
+        rows (list[dict]): {'id' ou 'isbn_13', 'stock' e/ou 'price'}.
+        dry_run (bool): Só valida; nada é gravado (updated traz quantos livros seriam atualizados).
+    Lança:
+        ValueError: Se houver mais de MAX_ROWS linhas.
+    """
+    if len(rows) > MAX_ROWS:
+        raise ValueError(f'Envie no máximo {MAX_ROWS} linhas por vez.')
+    result = BulkUpdateResult()
+    updates = validate_rows(rows, result)
+    result.updated = len(updates) if dry_run else apply_updates(updates)
+    return result
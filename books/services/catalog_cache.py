@@ -0,0 +1,162 @@
+import hashlib
+import uuid
+
+from decouple import config
+from django.core.cache import cache
+from django.db import transaction
+
+from books.models import BookModel
+
+# Por quanto tempo uma resposta da API do catálogo fica no cache (a versão do catálogo já invalida mudanças)
+RESPONSE_CACHE_SECONDS = config('CATALOG_RESPONSE_CACHE_SECONDS', default=300, cast=int)
+# Por quanto tempo o estoque de um livro fica no cache (a geração do estoque já invalida baixas/devoluções)
+STOCK_CACHE_SECONDS = config('CATALOG_STOCK_CACHE_SECONDS', default=300, cast=int)
+
+CATALOG_VERSION_KEY = 'books:catalog:version'
+STOCK_GENERATION_KEY = 'books:stock:generation'
+
+
+def catalog_version() -> str:
+    """
+    Versão do catálogo compartilhada entre os processos. Muda a cada alteração em livros,
+    autores ou categorias (exceto mudanças só de estoque), invalidando respostas e índices derivados.
+    """
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version() -> None:
+    """
+    Troca a versão quando a transação atual confirmar (ou na hora, fora de uma), para que uma leitura
+    concorrente não grave dados ainda não confirmados sob a versão nova.
+    """
+    transaction.on_commit(lambda: cache.set(CATALOG_VERSION_KEY, uuid.uuid4().hex, timeout=None))
+
+
+def stock_generation() -> str:
+    """
+    Geração do cache de estoque, trocada por forget_stocks. Quem lê o estoque do banco guarda o valor
+    sob a geração lida ANTES da consulta: se uma baixa confirmar no meio, o valor velho fica numa
+    geração que ninguém mais consulta, em vez de voltar para o cache depois de ter sido apagado.
+    """
+    generation = cache.get(STOCK_GENERATION_KEY)
+    if generation is None:
+        cache.add(STOCK_GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+        generation = cache.get(STOCK_GENERATION_KEY)
+    return generation
+
+
+def _stock_key(book_id, generation: str) -> str:
+    return f'books:stock:{generation}:{book_id}'
+
+
+def get_stocks(book_ids) -> dict:
+    """
+    Estoque atual dos livros: do cache, e do banco (uma query) só para os que não estão nele.
+    Retorna:
+        dict: {book_id: stock}
+    """
+    generation = stock_generation()
+    keys = {_stock_key(book_id, generation): book_id for book_id in set(book_ids)}
+    cached = cache.get_many(keys)
+    stocks = {keys[key]: stock for key, stock in cached.items()}
+
+    missing = [book_id for key, book_id in keys.items() if key not in cached]
+    if missing:
+        loaded = dict(BookModel.objects.filter(pk__in=missing).values_list('pk', 'stock'))
+        cache.set_many({_stock_key(book_id, generation): stock for book_id, stock in loaded.items()}, timeout=STOCK_CACHE_SECONDS)
+        stocks.update(loaded)
+    return stocks
+
+
+def forget_stocks(book_ids) -> None:
+    """Invalida o estoque cacheado (troca a geração) quando a transação atual confirmar (ou na hora, fora de uma)."""
+    if book_ids:
+        transaction.on_commit(lambda: cache.set(STOCK_GENERATION_KEY, uuid.uuid4().hex, timeout=None))
+
+
+def _items(data):
+    # Itens de livro de uma resposta da API: a página (results) da listagem ou o próprio detalhe
+    if isinstance(data, dict) and isinstance(data.get('results'), list):
+        return data['results']
+    return [data] if isinstance(data, dict) else []
+
+
+def overlay_stock(data):
+    """Sobrescreve o campo stock dos livros da resposta com o estoque atual (get_stocks)."""
+    items = [item for item in _items(data) if 'stock' in item and 'id' in item]
+    if items:
+        stocks = get_stocks(item['id'] for item in items)
+        for item in items:
+            item['stock'] = stocks.get(item['id'], item['stock'])
+    return data
+
+
+def _stock_items(data) -> list:
+    return [item for item in _items(data) if 'stock' in item and 'id' in item]
+
+
+def stock_signature(data) -> list:
+    """(id, stock) dos livros da resposta: junto com a chave da resposta, determina o conteúdo (usado no ETag)."""
+    return [(item['id'], item['stock']) for item in _stock_items(data)]
+
+
+def stock_signature_for(book_ids: list) -> list:
+    """O mesmo que stock_signature, só a partir dos ids (estoque do cache de estoque), sem montar a resposta."""
+    stocks = get_stocks(book_ids)
+    return [(book_id, stocks.get(book_id)) for book_id in book_ids]
+
+
+def _book_ids_key(key: str) -> str:
+    return f'{key}:ids'
+
+
+def get_response_book_ids(key: str):
+    """Ids dos livros (com estoque exibido) da resposta da chave, guardados por remember_response_book_ids; ou None."""
+    return cache.get(_book_ids_key(key))
+
+
+def remember_response_book_ids(key: str, data) -> None:
+    """Guarda os ids dos livros da resposta, para o próximo GET condicional calcular o ETag sem consultar a página."""
+    cache.set(_book_ids_key(key), [item['id'] for item in _stock_items(data)], timeout=RESPONSE_CACHE_SECONDS)
+
+
+def response_cache_key(request, action: str, pk=None) -> str:
+    """Chave da resposta: versão do catálogo, ação, livro e query params normalizados (ordem e vazios ignorados)."""
+    params = sorted(
+        (name, value) for name, values in request.query_params.lists() for value in values if value != ''
+    )
+    raw = f'{request.scheme}://{request.get_host()}|{action}|{pk}|{params}'
+    digest = hashlib.sha256(raw.encode()).hexdigest()
+    return f'books:response:{catalog_version()}:{digest}'
+
+
+def get_cached_response(key: str):
+    """Retorna os dados cacheados da resposta (com o estoque atualizado), ou None."""
+    data = cache.get(key)
+    if data is None:
+        return None
+    return overlay_stock(data)
+
+
+def _without_stock(data):
+    # Cópia da resposta com o estoque em branco: o campo fica (o overlay sabe que foi pedido), o valor vem sempre do cache de estoque
+    if isinstance(data, dict) and isinstance(data.get('results'), list):
+        return {**data, 'results': [_without_stock(item) for item in data['results']]}
+    if isinstance(data, dict) and 'stock' in data and 'id' in data:
+        return {**data, 'stock': None}
+    return data
+
+
+def cache_response(key: str, data, generation: str) -> None:
+    """
+    Guarda a resposta sem o estoque (get_cached_response o preenche com get_stocks) e aproveita o
+    estoque recém-lido do banco para o cache de estoque, sob a geração lida antes de montar a resposta.
+    """
+    cache.set(key, _without_stock(data), timeout=RESPONSE_CACHE_SECONDS)
+    stocks = {_stock_key(item['id'], generation): item['stock'] for item in _stock_items(data)}
+    if stocks:
+        cache.set_many(stocks, timeout=STOCK_CACHE_SECONDS)
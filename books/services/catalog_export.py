@@ -0,0 +1,134 @@
+import csv
+import datetime
+import json
+from collections import defaultdict
+from itertools import islice
+
+from decouple import config
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from books.models import BookModel
+
+# Livros lidos por vez do cursor do banco (server-side no PostgreSQL); a memória não cresce com o catálogo
+EXPORT_CHUNK_SIZE = config('CATALOG_EXPORT_CHUNK_SIZE', default=2000, cast=int)
+# Margem subtraída do cursor anunciado: transações que começaram antes da exportação e confirmaram depois
+# gravam um updated_at anterior ao início dela, e ficariam de fora da próxima exportação incremental
+EXPORT_CURSOR_OVERLAP_SECONDS = config('CATALOG_EXPORT_CURSOR_OVERLAP_SECONDS', default=300, cast=int)
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+EXPORT_COLUMNS = (
+    'id', 'google_books_id', 'title', 'slug', 'isbn_13', 'isbn_10', 'publisher', 'published_date',
+    'description', 'page_count', 'price', 'stock', 'is_active', 'thumbnail_url', 'source',
+    'weight_g', 'height_cm', 'width_cm', 'length_cm', 'created_at', 'updated_at',
+)
+EXPORT_FIELDS = EXPORT_COLUMNS + ('authors', 'categories')
+# Separador dos nomes de autores/categorias em uma célula do CSV
+CSV_LIST_SEPARATOR = ' | '
+
+
+def parse_updated_since(value: str):
+    """
+    Data/hora (ISO 8601) a partir da qual os livros alterados são exportados; uma data sem hora vale desde 00:00.
+    Horários sem fuso usam o fuso do projeto.
+    Lança:
+        ValueError: Se o valor não for uma data/hora ISO 8601.
+    """
+    parsed = parse_datetime(value) or parse_date(value)
+    if parsed is None:
+        raise ValueError("Use uma data/hora ISO 8601, ex: 2025-01-31 ou 2025-01-31T12:00:00-03:00.")
+    if not isinstance(parsed, datetime.datetime):
+        parsed = datetime.datetime.combine(parsed, datetime.time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def next_updated_since(started_at: datetime.datetime) -> datetime.datetime:
+    """
+    Cursor da próxima exportação incremental: o início desta menos EXPORT_CURSOR_OVERLAP_SECONDS.
+    Livros alterados dentro da margem saem de novo na próxima exportação (o consumidor deve fazer upsert por id).
+    """
+    return started_at - datetime.timedelta(seconds=EXPORT_CURSOR_OVERLAP_SECONDS)
+
+
+def _names_by_book(through, name_lookup: str, book_ids: list) -> dict:
+    names = defaultdict(list)
+    rows = through.objects.filter(bookmodel_id__in=book_ids).order_by('pk').values_list('bookmodel_id', name_lookup)
+    for book_id, name in rows:
+        names[book_id].append(name)
+    return names
+
+
+def export_rows(updated_since=None, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """
+    Todos os livros (ativos ou não, ordenados por id) como dicts, com os nomes dos autores e categorias.
+    As linhas vêm de um único cursor (iterator), e os nomes são buscados com uma consulta por relação a cada
+    chunk_size livros, então a memória usada não depende do tamanho do catálogo.
+    Args:
+        updated_since (datetime): Só livros com updated_at a partir deste instante (sincronização incremental).
+    Retorna:
+        Iterator[dict]: Uma entrada por livro, com as chaves de EXPORT_FIELDS.
+    """
+    queryset = BookModel.objects.order_by('pk')
+    if updated_since is not None:
+        queryset = queryset.filter(updated_at__gte=updated_since)
+    rows = queryset.values(*EXPORT_COLUMNS).iterator(chunk_size=chunk_size)
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        book_ids = [row['id'] for row in chunk]
+        authors = _names_by_book(BookModel.authors.through, 'authormodel__name', book_ids)
+        categories = _names_by_book(BookModel.categories.through, 'categorymodel__name', book_ids)
+        for row in chunk:
+            row['authors'] = authors.get(row['id'], [])
+            row['categories'] = categories.get(row['id'], [])
+            yield row
+
+
+class _Echo:
+    # "Arquivo" do csv.writer que devolve a linha em vez de gravá-la, para ser enviada em streaming
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return CSV_LIST_SEPARATOR.join(value)
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return '' if value is None else value
+
+
+def render_ndjson(rows):
+    """Um objeto JSON por linha."""
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def render_csv(rows):
+    """CSV com cabeçalho; autores e categorias ficam em uma célula, separados por CSV_LIST_SEPARATOR."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([_csv_value(row[field]) for field in EXPORT_FIELDS])
+
+
+def render_export(export_format: str, rows):
+    """
+    Lança:
+        ValueError: Se o formato não for um de EXPORT_FORMATS.
+    """
+    if export_format == 'ndjson':
+        return render_ndjson(rows)
+    if export_format == 'csv':
+        return render_csv(rows)
+    raise ValueError(f"Formato inválido. Disponíveis: {', '.join(EXPORT_FORMATS)}.")
@@ -0,0 +1,61 @@
+from collections import defaultdict
+
+from decouple import config
+
+from books.models import BookModel
+
+# Livros recalculados por lote (uma consulta por relação + um bulk_update por lote)
+DISPLAY_COLUMNS_BATCH_SIZE = config('BOOK_DISPLAY_COLUMNS_BATCH_SIZE', default=2000, cast=int)
+
+DISPLAY_FIELDS = ('authors_display', 'authors_display_ids', 'categories_display', 'categories_display_ids')
+
+
+def _links_by_book(through, related: str, book_ids: list) -> dict:
+    # Na ordem em que foram associados (pk da tabela de relação), a mesma da exportação
+    links = defaultdict(list)
+    rows = through.objects.filter(bookmodel_id__in=book_ids).order_by('pk')
+    for book_id, related_id, name in rows.values_list('bookmodel_id', f'{related}_id', f'{related}__name'):
+        links[book_id].append((related_id, name))
+    return links
+
+
+def _refresh_batch(book_ids: list) -> int:
+    authors = _links_by_book(BookModel.authors.through, 'authormodel', book_ids)
+    categories = _links_by_book(BookModel.categories.through, 'categorymodel', book_ids)
+    books = [
+        BookModel(
+            pk=book_id,
+            authors_display=[name for _, name in authors[book_id]],
+            authors_display_ids=[related_id for related_id, _ in authors[book_id]],
+            categories_display=[name for _, name in categories[book_id]],
+            categories_display_ids=[related_id for related_id, _ in categories[book_id]],
+        )
+        for book_id in book_ids
+    ]
+    return BookModel.objects.bulk_update(books, DISPLAY_FIELDS)
+
+
+def refresh_display_columns(book_ids=None) -> int:
+    """
+    Recalcula as colunas desnormalizadas de autores e categorias (nomes e ids) dos livros informados
+    (ou de todos, em lotes por pk), com um número fixo de consultas por lote de DISPLAY_COLUMNS_BATCH_SIZE livros.
+    Retorna:
+        int: Quantidade de livros atualizados.
+    """
+    if book_ids is not None:
+        book_ids = sorted(set(book_ids))
+        return sum(
+            _refresh_batch(book_ids[start:start + DISPLAY_COLUMNS_BATCH_SIZE])
+            for start in range(0, len(book_ids), DISPLAY_COLUMNS_BATCH_SIZE)
+        )
+
+    total = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            BookModel.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:DISPLAY_COLUMNS_BATCH_SIZE]
+        )
+        if not batch:
+            return total
+        total += _refresh_batch(batch)
+        last_pk = batch[-1]
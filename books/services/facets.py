@@ -0,0 +1,73 @@
+from decouple import config
+from django.db.models import Count, Q
+
+from books.models import BookModel
+
+# Quantos autores/categorias/editoras cada faceta retorna (os com mais livros)
+FACET_LIMIT = config('CATALOG_FACET_LIMIT', default=20, cast=int)
+
+# Faixas de preço (R$) das facetas e do filtro ?price_band=: [min, max), None = sem limite
+PRICE_BANDS = (
+    ('0-25', None, 25),
+    ('25-50', 25, 50),
+    ('50-100', 50, 100),
+    ('100+', 100, None),
+)
+PRICE_BAND_KEYS = tuple(key for key, _, _ in PRICE_BANDS)
+
+
+def price_band_q(key: str) -> Q:
+    """Condição de preço da faixa (min <= price < max)."""
+    _, low, high = next(band for band in PRICE_BANDS if band[0] == key)
+    condition = Q(price__isnull=False)
+    if low is not None:
+        condition &= Q(price__gte=low)
+    if high is not None:
+        condition &= Q(price__lt=high)
+    return condition
+
+
+def _relation_counts(through, related: str, book_ids, limit: int) -> list:
+    # Um GROUP BY na tabela de relação, restrito aos livros da consulta atual (subconsulta, sem trazer ids para o Python)
+    rows = (
+        through.objects.filter(bookmodel_id__in=book_ids)
+        .values(f'{related}_id', f'{related}__name')
+        .annotate(count=Count('bookmodel_id'))
+        .order_by('-count', f'{related}__name')[:limit]
+    )
+    return [{'id': row[f'{related}_id'], 'name': row[f'{related}__name'], 'count': row['count']} for row in rows]
+
+
+def facet_counts(queryset, limit: int = FACET_LIMIT) -> dict:
+    """
+    Contagens do catálogo para a barra lateral da loja, sobre os livros do queryset (já filtrado/buscado).
+    São sempre 4 consultas, qualquer que seja o tamanho do catálogo: um agregado (total, faixas de preço
+    e em estoque) e um GROUP BY para categorias, autores e editoras.
+    Retorna:
+        dict: {'total', 'in_stock', 'price_bands': [{key, min, max, count}],
+               'categories'/'authors'/'publishers': [{id?, name, count}]}
+    """
+    books = queryset.order_by()
+    book_ids = books.values('id')
+
+    totals = books.aggregate(
+        total=Count('id'),
+        in_stock=Count('id', filter=Q(stock__gt=0)),
+        **{f'band_{index}': Count('id', filter=price_band_q(key)) for index, key in enumerate(PRICE_BAND_KEYS)},
+    )
+    publishers = (
+        books.exclude(publisher__isnull=True).exclude(publisher='')
+        .values('publisher').annotate(count=Count('id')).order_by('-count', 'publisher')[:limit]
+    )
+
+    return {
+        'total': totals['total'],
+        'in_stock': totals['in_stock'],
+        'price_bands': [
+            {'key': key, 'min': low, 'max': high, 'count': totals[f'band_{index}']}
+            for index, (key, low, high) in enumerate(PRICE_BANDS)
+        ],
+        'categories': _relation_counts(BookModel.categories.through, 'categorymodel', book_ids, limit),
+        'authors': _relation_counts(BookModel.authors.through, 'authormodel', book_ids, limit),
+        'publishers': [{'name': row['publisher'], 'count': row['count']} for row in publishers],
+    }
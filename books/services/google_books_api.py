@@ -3,6 +3,13 @@ from django.conf import settings
 import requests
 
 from books.models import BookModel, AuthorModel, CategoryModel
+from books.services.google_books_cache import (
+    SEARCH_CACHE_SECONDS, VOLUME_CACHE_SECONDS, cached_get_json, search_key, volume_key,
+)
+from books.services.name_resolver import resolve_authors, resolve_categories
+
+VOLUMES_URL = "https://www.googleapis.com/books/v1/volumes"
+
 
 def search_google_api(query: str) -> dict:
     """
@@ -15,8 +22,9 @@ def search_google_api(query: str) -> dict:
         requests.exceptions.RequestException: Se houver um problema com a requisição HTTP.
     Observação:
         Requer uma chave de API válida do Google Books definida em settings.GOOGLE_BOOKS_API_KEY.
+        As páginas de resultado ficam em cache (ver google_books_cache), pela busca normalizada.
     """
-    url = "https://www.googleapis.com/books/v1/volumes"
+    url = VOLUMES_URL
     api_key = settings.GOOGLE_BOOKS_API_KEY
     
     params = {
@@ -26,12 +34,75 @@ def search_google_api(query: str) -> dict:
     }
 
     try:
-        response = requests.get(url=url, params=params, timeout=10)
-        response.raise_for_status()
-        return response.json()
+        return cached_get_json(search_key(query, params['maxResults']), url, params, SEARCH_CACHE_SECONDS)
     except requests.exceptions.RequestException as e:
         raise
 
+def fetch_volume(google_id: str) -> dict:
+    """
+    Busca um volume (livro) na API do Google Books (ou no cache de respostas, ver google_books_cache).
+    Retorna:
+        dict: O volume, com 'id' e 'volumeInfo'.
+    Lança:
+        ValueError: Se o volume não for encontrado.
+        requests.exceptions.RequestException: Se ocorrer um erro na requisição à API do Google Books.
+    """
+    try:
+        return cached_get_json(
+            volume_key(google_id), f"{VOLUMES_URL}/{google_id}", {"key": settings.GOOGLE_BOOKS_API_KEY},
+            VOLUME_CACHE_SECONDS,
+        )
+    except requests.exceptions.HTTPError as e:
+        if e.response.status_code in (400, 404):
+            raise ValueError("Livro não encontrado na API do Google.")
+        raise
+
+
+def _clip(value, field_name: str):
+    # Textos da API maiores que a coluna (ex: títulos longos) são cortados em vez de quebrar o INSERT
+    max_length = BookModel._meta.get_field(field_name).max_length
+    return value[:max_length] if isinstance(value, str) else value
+
+
+def _clip_name(model, name: str) -> str:
+    return name.strip()[:model._meta.get_field('name').max_length]
+
+
+def volume_fields(volume: dict) -> dict:
+    """
+    Campos do BookModel a partir de um volume do Google Books (resultado da busca ou do detalhe).
+    Retorna:
+        dict: {'book': {campos do livro}, 'authors': [nomes], 'categories': [nomes]}
+    Lança:
+        ValueError: Se o volume não possuir título.
+    """
+    info = volume.get('volumeInfo', {})
+    if not info.get('title'):
+        raise ValueError("Volume retornado pela API não possui Titulo!")
+
+    identifiers = info.get('industryIdentifiers', [])
+    isbn_13 = next((i['identifier'] for i in identifiers if i.get('type') == 'ISBN_13'), None)
+    isbn_10 = next((i['identifier'] for i in identifiers if i.get('type') == 'ISBN_10'), None)
+
+    book = {
+        'google_books_id': volume.get('id'),
+        'title': info.get("title"),
+        'publisher': info.get('publisher'),
+        'published_date': info.get('publishedDate'),
+        'description': info.get('description'),
+        'page_count': info.get('pageCount') or 0,
+        'thumbnail_url': info.get("imageLinks", {}).get("thumbnail"),
+        'isbn_13': isbn_13,
+        'isbn_10': isbn_10,
+        'source': 'google_books',
+    }
+    return {
+        'book': {name: _clip(value, name) for name, value in book.items()},
+        'authors': [_clip_name(AuthorModel, name) for name in info.get("authors", []) if name.strip()],
+        'categories': [_clip_name(CategoryModel, name) for name in info.get("categories", []) if name.strip()],
+    }
+
+
 @transaction.atomic
 def import_from_google_api(google_id: str) -> BookModel:
     """
@@ -45,50 +116,21 @@ def import_from_google_api(google_id: str) -> BookModel:
                     ou se o volume retornado não possuir título.
         requests.exceptions.RequestException: Se ocorrer um erro na requisição à API do Google Books.
     Notas:
-        - Cria ou recupera autores e categorias associados ao livro.
+        - Cria ou recupera autores e categorias associados ao livro (em lote, ver name_resolver).
         - Utiliza transação atômica para garantir integridade dos dados.
+        - Para importar muitos livros, use books.services.bulk_import (comando bulk_import_books).
     """
     if BookModel.objects.filter(google_books_id=google_id).exists():
         raise ValueError('Livro já cadastrado!')
-    
-    url = f"https://www.googleapis.com/books/v1/volumes/{google_id}"
-    api_key = settings.GOOGLE_BOOKS_API_KEY
 
-    try:
-        response = requests.get(url=url, params={"key": api_key}, timeout=10)
-        response.raise_for_status()
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 400:
-            raise ValueError("Livro não encontrado na API do Google.")
-        raise
-    except requests.exceptions.RequestException:
-        raise
+    fields = volume_fields(fetch_volume(google_id))
+    fields['book']['google_books_id'] = google_id
 
-    data = response.json()
-    info = data.get('volumeInfo', {})
+    authors = resolve_authors(fields['authors'])
+    categories = resolve_categories(fields['categories'])
 
-    if not info.get('title'):
-        raise ValueError("Volume retornado pela API não possui Titulo!")
-    
-    authors = [AuthorModel.objects.get_or_create(name=name)[0] for name in info.get("authors", [])]
-    categories = [CategoryModel.objects.get_or_create(name=name)[0] for name in info.get("categories", [])]
-
-    isbn_13 = next((i['identifier'] for i in info.get('industryIdentifiers', []) if i['type'] == 'ISBN_13'), None)
-    isbn_10 = next((i['identifier'] for i in info.get('industryIdentifiers', []) if i['type'] == 'ISBN_10'), None)
-
-    book = BookModel.objects.create(
-        google_books_id=google_id,
-        title=info.get("title"),
-        publisher=info.get('publisher'),
-        published_date=info.get('publishedDate'),
-        description=info.get('description'),
-        page_count=info.get('pageCount') or 0,
-        thumbnail_url=info.get("imageLinks", {}).get("thumbnail"),
-        isbn_13=isbn_13,
-        isbn_10=isbn_10,
-        source='google_books'
-    )
-    book.authors.set(authors)
-    book.categories.set(categories)
-
-    return book
\ No newline at end of file
+    book = BookModel.objects.create(**fields['book'])
+    book.authors.set(authors.values())
+    book.categories.set(categories.values())
+
+    return book
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import requests
+from decouple import config
+from django.conf import settings
+
+from common import http_client
+from common.lru import LRUCache
+
+# Por quanto tempo um volume/uma busca é servido do cache sem consultar o Google; depois disso a resposta é
+# revalidada (If-None-Match), e um 304 não gasta a cota de download
+VOLUME_CACHE_SECONDS = config('GOOGLE_BOOKS_VOLUME_CACHE_SECONDS', default=7 * 24 * 3600, cast=int)
+SEARCH_CACHE_SECONDS = config('GOOGLE_BOOKS_SEARCH_CACHE_SECONDS', default=24 * 3600, cast=int)
+# Respostas mantidas em memória por processo, na frente do cache em disco
+MEMORY_CACHE_SIZE = config('GOOGLE_BOOKS_MEMORY_CACHE_SIZE', default=1000, cast=int)
+# Modo offline: responde só do cache (vencido ou não), sem nenhuma chamada ao Google (ex: reimportar um catálogo)
+OFFLINE = config('GOOGLE_BOOKS_OFFLINE', default=False, cast=bool)
+
+_memory = LRUCache(MEMORY_CACHE_SIZE)
+
+
+class CacheMissError(requests.exceptions.ConnectionError):
+    """Modo offline e a resposta não está no cache."""
+
+
+def volume_key(google_id: str) -> str:
+    return f'volume:{google_id}'
+
+
+def search_key(query: str, max_results: int) -> str:
+    """
+    Buscas iguais a menos de maiúsculas e espaços usam a mesma entrada.
+    >>> search_key('  Dom   CASMURRO ', 20)
+    'search:20:dom casmurro'
+    """
+    return f"search:{max_results}:{' '.join(query.casefold().split())}"
+
+
+def _path(key: str):
+    directory = settings.GOOGLE_BOOKS_CACHE_DIR
+    if not directory:
+        return None
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return os.path.join(directory, digest[:2], f'{digest}.json')
+
+
+def _load(key: str):
+    entry = _memory.get(key)
+    if entry is not None:
+        return entry
+    path = _path(key)
+    if path is None:
+        return None
+    try:
+        with open(path, encoding='utf-8') as file:
+            entry = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if entry.get('key') != key:
+        return None
+    _memory.set(key, entry)
+    return entry
+
+
+def _store(key: str, entry: dict) -> None:
+    _memory.set(key, entry)
+    path = _path(key)
+    if path is None:
+        return
+    # Arquivo temporário + os.replace: leitores (outras threads/processos) nunca veem um JSON pela metade
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+            json.dump(entry, file, ensure_ascii=False)
+        os.replace(temporary, path)
+    except OSError:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def cached_get_json(key: str, url: str, params: dict, ttl: int):
+    """
+    GET na API do Google Books passando pelo cache (memória, depois disco).
+    - Dentro do TTL: devolve a resposta guardada, sem rede.
+    - Vencida: revalida com If-None-Match; 304 renova a entrada.
+    - Se o Google falhar (rede, 429 ou 5xx) e houver uma resposta guardada, ela é devolvida mesmo vencida.
+    O dict retornado é compartilhado com o cache: não o altere.
+    Args:
+        key (str): Chave normalizada (volume_key/search_key); a chave da API não faz parte dela.
+        ttl (int): Segundos em que a resposta é servida sem revalidar.
+    Lança:
+        CacheMissError: Em modo offline, se a resposta não estiver no cache.
+        requests.exceptions.RequestException: Se a chamada falhar (ex: HTTPError 404) e não houver resposta guardada.
+    """
+    entry = _load(key)
+    now = time.time()
+    if entry is not None and (OFFLINE or now - entry['fetched_at'] < ttl):
+        return entry['data']
+    if OFFLINE:
+        raise CacheMissError(f'Modo offline: {key} não está no cache do Google Books.')
+
+    headers = {'If-None-Match': entry['etag']} if entry is not None and entry.get('etag') else {}
+    try:
+        response = http_client.get(url, params=params, headers=headers)
+    except requests.exceptions.RequestException:
+        if entry is not None:
+            return entry['data']
+        raise
+
+    if entry is not None:
+        if response.status_code == 304:
+            _store(key, {**entry, 'fetched_at': now})
+            return entry['data']
+        if response.status_code == 429 or response.status_code >= 500:
+            return entry['data']
+
+    response.raise_for_status()
+    data = response.json()
+    _store(key, {'key': key, 'etag': response.headers.get('ETag'), 'fetched_at': now, 'data': data})
+    return data
+
+
+def clear_memory_cache() -> None:
+    """Esvazia a cópia em memória (usado nos testes); o cache em disco é mantido."""
+    _memory.clear()
@@ -0,0 +1,74 @@
+from decouple import config
+from django.db import transaction
+
+from books.models import AuthorModel, CategoryModel
+from common.lru import LRUCache
+
+# Nomes de autores/categorias (nome -> id) mantidos em memória por processo, compartilhados por todas as importações
+NAME_CACHE_SIZE = config('CATALOG_NAME_CACHE_SIZE', default=50000, cast=int)
+# Por quanto tempo um id fica na memória; no próprio processo, renomear/excluir um autor ou categoria limpa o cache na hora
+NAME_CACHE_SECONDS = config('CATALOG_NAME_CACHE_SECONDS', default=600, cast=int)
+
+_caches = {
+    AuthorModel: LRUCache(NAME_CACHE_SIZE),
+    CategoryModel: LRUCache(NAME_CACHE_SIZE),
+}
+
+
+def resolve_names(model, names) -> dict:
+    """
+    Ids dos autores ou categorias pelos nomes, criando os que não existem.
+    Nomes fora do cache custam uma consulta IN; os que faltam são criados com um único INSERT que ignora
+    conflitos (outra importação pode criar o mesmo nome ao mesmo tempo) e relidos em seguida.
+    Args:
+        model: AuthorModel ou CategoryModel.
+        names (iterable): Nomes, com ou sem repetições.
+    Retorna:
+        dict: {nome: id}
+    """
+    cache = _caches[model]
+    ids = {}
+    missing = set()
+    for name in set(names):
+        pk = cache.get(name)
+        if pk is None:
+            missing.add(name)
+        else:
+            ids[name] = pk
+    if not missing:
+        return ids
+
+    found = dict(model.objects.filter(name__in=missing).values_list('name', 'pk'))
+    to_create = missing - found.keys()
+    if to_create:
+        model.objects.bulk_create([model(name=name) for name in to_create], ignore_conflicts=True)
+        found.update(model.objects.filter(name__in=to_create).values_list('name', 'pk'))
+
+    # Só entra no cache o que foi confirmado: um rollback deixaria ids de linhas que não existem
+    transaction.on_commit(lambda: _remember(cache, found))
+    ids.update(found)
+    return ids
+
+
+def _remember(cache: LRUCache, ids: dict) -> None:
+    for name, pk in ids.items():
+        cache.set(name, pk, ttl=NAME_CACHE_SECONDS)
+
+
+def resolve_authors(names) -> dict:
+    return resolve_names(AuthorModel, names)
+
+
+def resolve_categories(names) -> dict:
+    return resolve_names(CategoryModel, names)
+
+
+def forget_names(model) -> None:
+    """Esvazia o cache de nomes do modelo (renomeação ou exclusão de um autor/categoria)."""
+    _caches[model].clear()
+
+
+def clear_name_cache() -> None:
+    """Esvazia os caches de autores e categorias (usado nos testes)."""
+    for cache in _caches.values():
+        cache.clear()
@@ -0,0 +1,111 @@
+import re
+
+from decouple import config
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db import connection
+from django.db.models import F, FloatField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Cast, Coalesce
+
+from books.models import AuthorModel, BookModel, CategoryModel
+
+# Dicionário do Postgres usado no stemming (ex: "romances" encontra "romance")
+SEARCH_CONFIG = 'portuguese'
+# Livros por UPDATE ao reconstruir os vetores de busca
+SEARCH_VECTOR_BATCH_SIZE = config('CATALOG_SEARCH_VECTOR_BATCH_SIZE', default=5000, cast=int)
+
+_ISBN_RE = re.compile(r'^(\d{13}|\d{9}[\dX])$')
+
+
+def supports_full_text_search() -> bool:
+    return connection.vendor == 'postgresql'
+
+
+def normalize_isbn(query: str):
+    """
+    Retorna o ISBN (sem hifens e espaços) se a busca parecer um ISBN-10 ou ISBN-13, senão None.
+    >>> normalize_isbn('978-85-359-0277-1')
+    '9788535902771'
+    >>> normalize_isbn('85-359-0277-x')
+    '853590277X'
+    >>> normalize_isbn('dom casmurro') is None
+    True
+    """
+    candidate = re.sub(r'[\s-]', '', query or '').upper()
+    return candidate if _ISBN_RE.match(candidate) else None
+
+
+def _related_names(model, related_query_name: str):
+    # Nomes dos autores/categorias de cada livro concatenados, como subquery correlacionada
+    return Subquery(
+        model.objects.filter(**{related_query_name: OuterRef('pk')})
+        .values(related_query_name)
+        .annotate(names=StringAgg('name', ' '))
+        .values('names')[:1]
+    )
+
+
+def book_search_vector():
+    """Título e autores pesam mais que categorias, editora e descrição no ranking."""
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(_related_names(AuthorModel, 'author_books'), weight='A', config=SEARCH_CONFIG)
+        + SearchVector(_related_names(CategoryModel, 'category_books'), weight='B', config=SEARCH_CONFIG)
+        + SearchVector('publisher', weight='C', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='D', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(book_ids=None) -> int:
+    """
+    Recalcula a coluna search_vector dos livros informados (ou de todos, em lotes por pk).
+    Não faz nada fora do PostgreSQL.
+    Retorna:
+        int: Quantidade de livros atualizados.
+    """
+    if not supports_full_text_search():
+        return 0
+
+    if book_ids is not None:
+        return BookModel.objects.filter(pk__in=list(book_ids)).update(search_vector=book_search_vector())
+
+    total = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            BookModel.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:SEARCH_VECTOR_BATCH_SIZE]
+        )
+        if not batch:
+            return total
+        total += BookModel.objects.filter(pk__in=batch).update(search_vector=book_search_vector())
+        last_pk = batch[-1]
+
+
+def search_books(queryset, query: str):
+    """
+    Busca no catálogo:
+        - Busca que parece ISBN: igualdade nos indices únicos de isbn_13/isbn_10.
+        - PostgreSQL: full-text (indice GIN em search_vector, com stemming em português) ou
+          similaridade de trigramas no título (tolera erros de digitação), ordenado por relevância.
+    Retorna:
+        QuerySet | None: O queryset filtrado, ou None se o banco não suporta a busca full-text
+        (quem chama deve usar a busca simples).
+    """
+    isbn = normalize_isbn(query)
+    if isbn:
+        return queryset.filter(Q(isbn_13=isbn) | Q(isbn_10=isbn))
+
+    if not supports_full_text_search():
+        return None
+
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+    return queryset.filter(
+        Q(search_vector=search_query) | Q(title__trigram_similar=query)
+    ).annotate(
+        # double precision: o valor volta idêntico no cursor da paginação. Livro ainda sem search_vector
+        # (carga em massa antes do rebuild) achado pelo trigrama: rank 0 em vez de NULL, que quebraria o cursor
+        search_rank=Cast(
+            Coalesce(SearchRank(F('search_vector'), search_query), Value(0.0)) + TrigramSimilarity('title', query),
+            FloatField()
+        )
+    ).order_by('-search_rank', '-pk')
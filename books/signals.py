@@ -0,0 +1,91 @@
+from django.db.models.functions import Now
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import AuthorModel, BookModel, CategoryModel
+from .services.catalog_cache import bump_catalog_version, forget_stocks
+from .services.display_columns import refresh_display_columns
+from .services.name_resolver import forget_names
+from .services.search import update_search_vectors
+
+
+def _is_stock_only(update_fields) -> bool:
+    # save(update_fields=['stock']) de cancelamentos: não muda nada além do estoque
+    return update_fields is not None and set(update_fields) <= {'stock', 'updated_at'}
+
+
+def _related_books(instance):
+    # Livros de um autor/categoria, pelo related_name reverso do m2m
+    return instance.author_books if isinstance(instance, AuthorModel) else instance.category_books
+
+
+def _refresh_books(book_ids) -> None:
+    """
+    Atualiza o que os livros derivam de autores/categorias: updated_at (exportação incremental com
+    updated_since, ETag dos pedidos), search_vector e as colunas de exibição.
+    """
+    book_ids = list(book_ids)
+    if not book_ids:
+        return
+    BookModel.objects.filter(pk__in=book_ids).update(updated_at=Now())
+    update_search_vectors(book_ids)
+    refresh_display_columns(book_ids)
+
+
+@receiver(post_save, sender=BookModel)
+@receiver(post_delete, sender=BookModel)
+def refresh_catalog_on_book_change(sender, instance, signal, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    forget_stocks([instance.pk])
+    if _is_stock_only(update_fields):
+        return
+    bump_catalog_version()
+    if signal is post_save:
+        update_search_vectors([instance.pk])
+
+
+@receiver(m2m_changed, sender=BookModel.authors.through)
+@receiver(m2m_changed, sender=BookModel.categories.through)
+def refresh_books_on_relation_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # author.author_books.clear() chega ao post_clear com pk_set=None: guarda os livros antes de limpar
+        instance._cleared_book_ids = list(_related_books(instance).values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    bump_catalog_version()
+    if not reverse:
+        _refresh_books([instance.pk])
+    elif action == 'post_clear':
+        _refresh_books(instance.__dict__.pop('_cleared_book_ids', ()))
+    else:
+        _refresh_books(pk_set or ())
+
+
+@receiver(post_save, sender=AuthorModel)
+@receiver(post_save, sender=CategoryModel)
+def refresh_books_on_author_or_category_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    bump_catalog_version()
+    # Um nome novo não invalida nada; renomear deixaria um nome -> id antigo no cache e nos livros
+    if not created:
+        forget_names(sender)
+        _refresh_books(_related_books(instance).values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=AuthorModel)
+@receiver(pre_delete, sender=CategoryModel)
+def remember_books_before_delete(sender, instance, **kwargs):
+    # As relações somem em cascata sem m2m_changed: guarda os livros afetados para o post_delete
+    instance._display_book_ids = list(_related_books(instance).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=AuthorModel)
+@receiver(post_delete, sender=CategoryModel)
+def refresh_books_on_author_or_category_delete(sender, instance, **kwargs):
+    bump_catalog_version()
+    forget_names(sender)
+    _refresh_books(getattr(instance, '_display_book_ids', ()))
@@ -0,0 +1,109 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from books.models import AuthorModel, BookModel
+from books.services import autocomplete as autocomplete_service
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def catalog():
+    machado = AuthorModel.objects.create(name='Machado de Assis')
+    rosa = AuthorModel.objects.create(name='João Guimarães Rosa')
+    dom = BookModel.objects.create(title='Dom Casmurro', price=30, is_active=True)
+    dom.authors.add(machado)
+    memorias = BookModel.objects.create(title='Memórias Póstumas de Brás Cubas', price=30, is_active=True)
+    memorias.authors.add(machado)
+    sertao = BookModel.objects.create(title='Grande Sertão: Veredas', price=30, is_active=True)
+    sertao.authors.add(rosa)
+    BookModel.objects.create(title='Dom Quixote', price=30, is_active=False)
+    return {'dom': dom, 'memorias': memorias, 'sertao': sertao}
+
+
+@pytest.fixture
+def synchronous_rebuild(monkeypatch):
+    monkeypatch.setattr(autocomplete_service, '_start_background', lambda target: target())
+
+
+def _titles(api_client, query, **params):
+    response = api_client.get(reverse('book-api-autocomplete'), {'q': query, **params})
+    assert response.status_code == status.HTTP_200_OK
+    return [item['title'] for item in response.data['results']]
+
+
+def test_autocomplete_requires_query(api_client):
+    response = api_client.get(reverse('book-api-autocomplete'))
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_autocomplete_matches_title_prefix_ignoring_case_and_accents(api_client, catalog):
+    response = api_client.get(reverse('book-api-autocomplete'), {'q': 'dom'})
+
+    assert response.data['results'] == [
+        {'id': catalog['dom'].pk, 'title': 'Dom Casmurro', 'authors': ['Machado de Assis']},
+    ]
+    assert 'max-age=' in response['Cache-Control']
+    assert _titles(api_client, 'MEMORIAS po') == ['Memórias Póstumas de Brás Cubas']
+
+
+def test_autocomplete_matches_later_words_and_authors(api_client, catalog):
+    assert _titles(api_client, 'sertao') == ['Grande Sertão: Veredas']
+    assert _titles(api_client, 'assis') == ['Dom Casmurro', 'Memórias Póstumas de Brás Cubas']
+    assert _titles(api_client, 'guimar') == ['Grande Sertão: Veredas']
+
+
+def test_autocomplete_ranks_title_start_before_other_matches(api_client, catalog):
+    machado_book = BookModel.objects.create(title='Machado: uma biografia', price=30, is_active=True)
+
+    assert _titles(api_client, 'machado') == [
+        machado_book.title, 'Dom Casmurro', 'Memórias Póstumas de Brás Cubas'
+    ]
+    assert _titles(api_client, 'machado', limit=1) == [machado_book.title]
+
+
+def test_autocomplete_serves_from_memory_without_queries(api_client, catalog, django_assert_num_queries):
+    _titles(api_client, 'dom')
+
+    with django_assert_num_queries(0):
+        assert _titles(api_client, 'grande') == ['Grande Sertão: Veredas']
+
+
+def test_autocomplete_index_follows_catalog_changes(api_client, catalog, synchronous_rebuild, django_capture_on_commit_callbacks):
+    assert _titles(api_client, 'capit') == []
+
+    with django_capture_on_commit_callbacks(execute=True):
+        book = BookModel.objects.create(title='Capitães da Areia', price=30, is_active=True)
+    _titles(api_client, 'capit')  # Serve o índice antigo e dispara a reconstrução
+    assert _titles(api_client, 'capit') == ['Capitães da Areia']
+
+    with django_capture_on_commit_callbacks(execute=True):
+        book.authors.add(AuthorModel.objects.create(name='Jorge Amado'))
+    _titles(api_client, 'amado')
+    assert _titles(api_client, 'amado') == ['Capitães da Areia']
+
+    with django_capture_on_commit_callbacks(execute=True):
+        book.delete()
+    _titles(api_client, 'capit')
+    assert _titles(api_client, 'capit') == []
+
+
+def test_autocomplete_falls_back_to_database_for_large_catalogs(api_client, catalog, monkeypatch):
+    monkeypatch.setattr(autocomplete_service, 'MAX_INDEX_BOOKS', 1)
+
+    assert _titles(api_client, 'dom c') == ['Dom Casmurro']
+    assert _titles(api_client, 'machado') == ['Dom Casmurro', 'Memórias Póstumas de Brás Cubas']
+    assert autocomplete_service._index is None
+
+
+def test_background_rebuild_closes_its_database_connection(monkeypatch):
+    closed = threading.Event()
+    monkeypatch.setattr(autocomplete_service, 'connection', MagicMock(close=closed.set))
+
+    autocomplete_service._start_background(lambda: None)
+
+    assert closed.wait(timeout=5)
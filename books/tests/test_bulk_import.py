@@ -0,0 +1,150 @@
+import io
+import math
+
+import pytest
+import requests
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from books.models import AuthorModel, BookModel, CategoryModel
+from books.services import bulk_import
+from books.services.bulk_import import Checkpoint, RateLimiter, import_volumes, write_volumes
+from books.services.google_books_api import volume_fields
+
+pytestmark = pytest.mark.django_db
+
+
+def volume(google_id, title=None, authors=('Machado de Assis',), categories=('Fiction',), isbn_13=None):
+    identifiers = [{'type': 'ISBN_13', 'identifier': isbn_13}] if isbn_13 else []
+    return {
+        'id': google_id,
+        'volumeInfo': {
+            'title': title or f'Livro {google_id}',
+            'authors': list(authors),
+            'categories': list(categories),
+            'industryIdentifiers': identifiers,
+            'pageCount': 100,
+        },
+    }
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    calls = []
+    missing = set()
+    broken = set()
+
+    def fetch_volume(google_id):
+        calls.append(google_id)
+        if google_id in broken:
+            raise requests.exceptions.ConnectionError('offline')
+        if google_id in missing:
+            raise ValueError('Livro não encontrado na API do Google.')
+        return volume(google_id)
+
+    def search_google_api(query):
+        calls.append(query)
+        return {'items': [volume(f'{query}-{index}') for index in range(3)]}
+
+    monkeypatch.setattr(bulk_import, 'fetch_volume', fetch_volume)
+    monkeypatch.setattr(bulk_import, 'search_google_api', search_google_api)
+    return {'calls': calls, 'missing': missing, 'broken': broken}
+
+
+def test_rate_limiter_spaces_calls():
+    now = [0.0]
+    sleeps = []
+    limiter = RateLimiter(rate=2, burst=1, clock=lambda: now[0], sleep=sleeps.append)
+
+    for _ in range(3):
+        limiter.acquire()
+
+    assert sleeps == [0.5, 1.0]
+
+
+def test_import_creates_books_with_shared_authors_and_categories(fake_api):
+    stats = import_volumes(['a1', 'a2', 'a3'], stock=7, batch_size=2, rate=0)
+
+    assert stats.imported == 3
+    assert AuthorModel.objects.filter(name='Machado de Assis').count() == 1
+    assert CategoryModel.objects.filter(name='Fiction').count() == 1
+    book = BookModel.objects.get(google_books_id='a2')
+    assert book.slug == 'livro-a2'
+    assert book.stock == 7
+    assert [author.name for author in book.authors.all()] == ['Machado de Assis']
+    assert [category.name for category in book.categories.all()] == ['Fiction']
+
+
+def test_existing_ids_are_not_fetched(fake_api, book):
+    book.google_books_id = 'a1'
+    book.save()
+
+    stats = import_volumes(['a1', 'a2'], rate=0)
+
+    assert fake_api['calls'] == ['a2']
+    assert (stats.imported, stats.skipped) == (1, 1)
+
+
+def test_write_volumes_skips_duplicate_isbns():
+    volumes = [
+        volume_fields(volume('x1', isbn_13='9788535902771')),
+        volume_fields(volume('x2', isbn_13='9788535902771')),
+    ]
+
+    assert write_volumes(volumes) == (1, 1)
+    assert write_volumes([volume_fields(volume('x3', isbn_13='9788535902771'))]) == (0, 1)
+
+
+def test_write_volumes_query_count_does_not_grow_with_the_batch():
+    def queries_for(prefix, size):
+        volumes = [
+            volume_fields(volume(f'{prefix}{index}', authors=[f'Autor {prefix}{index}'], categories=[f'Cat {prefix}{index}']))
+            for index in range(size)
+        ]
+        with CaptureQueriesContext(connection) as context:
+            write_volumes(volumes)
+        return len(context.captured_queries)
+
+    def book_insert_batches(size):
+        # O INSERT dos livros é dividido pelo limite de parâmetros do banco (ex: 999 no SQLite)
+        fields = [field for field in BookModel._meta.concrete_fields if not field.primary_key]
+        return math.ceil(size / connection.ops.bulk_batch_size(fields, [None] * size))
+
+    extra_inserts = book_insert_batches(40) - book_insert_batches(2)
+    assert queries_for('large', 40) == queries_for('small', 2) + extra_inserts
+
+
+def test_checkpoint_resumes_and_retries_only_network_failures(fake_api, tmp_path):
+    checkpoint_path = tmp_path / 'ids.done'
+    fake_api['missing'].add('gone')
+    fake_api['broken'].add('flaky')
+    failures = []
+
+    stats = import_volumes(
+        ['a1', 'gone', 'flaky'], rate=0, checkpoint=Checkpoint(str(checkpoint_path)),
+        on_failure=lambda key, error: failures.append(key),
+    )
+
+    assert (stats.imported, stats.failed) == (1, 2)
+    assert sorted(failures) == ['flaky', 'gone']
+    assert sorted(checkpoint_path.read_text().split()) == ['a1', 'gone']
+
+    fake_api['calls'].clear()
+    fake_api['broken'].clear()
+    stats = import_volumes(['a1', 'gone', 'flaky'], rate=0, checkpoint=Checkpoint(str(checkpoint_path)))
+
+    assert fake_api['calls'] == ['flaky']
+    assert stats.imported == 1
+    assert BookModel.objects.filter(google_books_id__in=['a1', 'flaky']).count() == 2
+
+
+def test_command_imports_search_results(fake_api, tmp_path):
+    source = tmp_path / 'queries.txt'
+    source.write_text('# gêneros\nfantasy\n\nfantasy\nhistory\n')
+
+    call_command('bulk_import_books', str(source), '--queries', '--rate', '0', stdout=io.StringIO())
+
+    assert sorted(fake_api['calls']) == ['fantasy', 'history']
+    assert BookModel.objects.filter(google_books_id__startswith='fantasy-').count() == 3
+    assert (tmp_path / 'queries.txt.done').read_text().split() == ['fantasy', 'history']
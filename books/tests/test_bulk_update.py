@@ -0,0 +1,146 @@
+import io
+from decimal import Decimal
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from books.models import BookModel
+from books.services import bulk_update
+from books.services.bulk_update import bulk_update_books, read_csv_rows
+
+pytestmark = pytest.mark.django_db
+
+URL = reverse('book-api-bulk-update')
+
+
+@pytest.fixture
+def staff_client(api_client, create_staff_user):
+    api_client.force_authenticate(user=create_staff_user)
+    return api_client
+
+
+@pytest.fixture
+def shippable_books():
+    return [
+        BookModel.objects.create(
+            title=f'Livro {n}', isbn_13=f'978000000000{n}', price=10, stock=1, is_active=True,
+            weight_g=300, height_cm=20, width_cm=15, length_cm=2,
+        )
+        for n in range(3)
+    ]
+
+
+def test_bulk_update_is_staff_only(api_client, create_user):
+    assert api_client.post(URL, {'rows': []}, format='json').status_code == status.HTTP_403_FORBIDDEN
+    api_client.force_authenticate(user=create_user)
+    assert api_client.post(URL, {'rows': []}, format='json').status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_updates_stock_and_price_by_id_or_isbn(staff_client, shippable_books):
+    first, second, third = shippable_books
+    rows = [
+        {'id': first.pk, 'stock': 7, 'price': '19.90'},
+        {'isbn_13': second.isbn_13, 'stock': 0},
+        {'id': third.pk, 'price': '49.00'},
+    ]
+
+    response = staff_client.post(URL, {'rows': rows}, format='json')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == {'updated': 3, 'dry_run': False, 'errors': []}
+    first.refresh_from_db(), second.refresh_from_db(), third.refresh_from_db()
+    assert (first.stock, first.price) == (7, Decimal('19.90'))
+    assert (second.stock, second.price) == (0, Decimal('10.00'))
+    assert (third.stock, third.price) == (1, Decimal('49.00'))
+
+
+def test_reports_errors_per_row_and_applies_the_valid_ones(staff_client, shippable_books):
+    first, second, _ = shippable_books
+    incomplete = BookModel.objects.create(title='Sem dimensões', is_active=True)
+    rows = [
+        {'id': first.pk, 'stock': 5},
+        {'id': 999999, 'stock': 1},
+        {'isbn_13': second.isbn_13, 'stock': -1},
+        {'id': second.pk, 'price': 'abc'},
+        {'id': first.pk, 'stock': 6},
+        {'id': incomplete.pk, 'price': '10'},
+        {'stock': 3},
+    ]
+
+    response = staff_client.post(URL, {'rows': rows}, format='json')
+
+    assert response.data['updated'] == 1
+    assert [error['row'] for error in response.data['errors']] == [2, 3, 4, 5, 6, 7]
+    assert 'linha 1' in response.data['errors'][3]['detail']
+    first.refresh_from_db()
+    assert first.stock == 5
+
+
+def test_dry_run_writes_nothing(staff_client, shippable_books):
+    book = shippable_books[0]
+
+    response = staff_client.post(f'{URL}?dry_run=1', {'rows': [{'id': book.pk, 'stock': 99}]}, format='json')
+
+    assert response.data['updated'] == 1
+    assert response.data['dry_run'] is True
+    book.refresh_from_db()
+    assert book.stock == 1
+
+
+def test_csv_upload_with_semicolons_and_decimal_comma(staff_client, shippable_books):
+    book = shippable_books[0]
+    content = f'isbn_13;stock;price\n{book.isbn_13};12;"15,50"\n'.encode()
+
+    response = staff_client.post(URL, {'file': SimpleUploadedFile('feed.csv', content)}, format='multipart')
+
+    assert response.data['updated'] == 1
+    book.refresh_from_db()
+    assert (book.stock, book.price) == (12, Decimal('15.50'))
+
+
+def test_rejects_empty_body(staff_client):
+    response = staff_client.post(URL, {}, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_rejects_more_than_max_rows(staff_client, monkeypatch):
+    monkeypatch.setattr(bulk_update, 'MAX_ROWS', 2)
+    response = staff_client.post(URL, {'rows': [{'id': n, 'stock': 1} for n in range(3)]}, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_query_count_does_not_grow_with_rows(monkeypatch):
+    monkeypatch.setattr(bulk_update, 'CHUNK_SIZE', 1000)
+    books = BookModel.objects.bulk_create(BookModel(title=f'Livro {n}', stock=0) for n in range(200))
+
+    with CaptureQueriesContext(connection) as queries:
+        result = bulk_update_books([{'id': book.pk, 'stock': 3} for book in books])
+
+    assert result.updated == 200
+    # 1 consulta de validação + 1 UPDATE (mais SAVEPOINT/RELEASE da transação)
+    assert len(queries) <= 4
+    assert set(BookModel.objects.values_list('stock', flat=True)) == {3}
+
+
+def test_read_csv_rows_normalizes_header():
+    rows = read_csv_rows(io.BytesIO(b'\xef\xbb\xbfID, Stock ,Price\n1,2,3.00\n'))
+    assert rows == [{'id': '1', 'stock': '2', 'price': '3.00'}]
+
+
+def test_management_command(tmp_path, shippable_books):
+    book = shippable_books[0]
+    feed = tmp_path / 'feed.csv'
+    feed.write_text(f'id,stock\n{book.pk},42\n999999,1\n')
+    out, err = io.StringIO(), io.StringIO()
+
+    call_command('bulk_update_books', str(feed), stdout=out, stderr=err)
+
+    book.refresh_from_db()
+    assert book.stock == 42
+    assert '1 books updated, 1 rows with errors' in out.getvalue()
+    assert 'Row 2' in err.getvalue()
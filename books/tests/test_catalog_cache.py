@@ -0,0 +1,114 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+from rest_framework import status
+
+from books.models import BookModel, CategoryModel
+from books.services.catalog_cache import cache_response, catalog_version, get_cached_response, stock_generation
+from orders.services.stripe_service import decrement_stock
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def commit(django_capture_on_commit_callbacks):
+    """Executa os callbacks de on_commit (versão do catálogo e estoque) como se a transação confirmasse."""
+    return lambda: django_capture_on_commit_callbacks(execute=True)
+
+
+def _get(api_client, url_name='book-api-list', params=None, **kwargs):
+    response = api_client.get(reverse(url_name, kwargs=kwargs or None), params)
+    assert response.status_code == status.HTTP_200_OK
+    return response.data
+
+
+def test_anonymous_reads_are_served_from_cache(api_client, book, django_assert_num_queries):
+    first = _get(api_client)
+    _get(api_client, 'book-api-detail', pk=book.pk)
+
+    with django_assert_num_queries(0):
+        assert _get(api_client) == first
+        assert _get(api_client, 'book-api-detail', pk=book.pk)['title'] == 'Test Book'
+
+
+def test_query_params_are_normalized(api_client, book, django_assert_num_queries):
+    _get(api_client, params={'ordering': 'price', 'page_size': '2', 'search': ''})
+
+    with django_assert_num_queries(0):
+        api_client.get(reverse('book-api-list') + '?page_size=2&ordering=price')
+
+
+def test_book_changes_invalidate_cached_responses(api_client, book, commit):
+    _get(api_client, 'book-api-detail', pk=book.pk)
+
+    with commit():
+        book.title = 'Novo Título'
+        book.save()
+
+    assert _get(api_client, 'book-api-detail', pk=book.pk)['title'] == 'Novo Título'
+    assert _get(api_client)['results'][0]['title'] == 'Novo Título'
+
+
+def test_category_and_relation_changes_invalidate_cached_responses(api_client, book, commit):
+    _get(api_client, 'book-api-detail', pk=book.pk)
+
+    category = CategoryModel.objects.get()
+    with commit():
+        category.name = 'Romance'
+        category.save()
+    assert _get(api_client, 'book-api-detail', pk=book.pk)['categories'][0]['name'] == 'Romance'
+
+    with commit():
+        book.categories.add(CategoryModel.objects.create(name='Clássicos'))
+    assert len(_get(api_client, 'book-api-detail', pk=book.pk)['categories']) == 2
+
+
+def test_stock_is_overlaid_without_invalidating_the_catalog(api_client, book, commit, django_assert_num_queries):
+    _get(api_client)
+    _get(api_client, 'book-api-detail', pk=book.pk)
+    version = catalog_version()
+
+    with commit(), transaction.atomic():
+        decrement_stock({book.pk: book}, {book.pk: 3})
+    assert catalog_version() == version
+
+    # Só o estoque vem do banco (uma query por livro esquecido no cache), o resto do cache
+    with django_assert_num_queries(1):
+        assert _get(api_client)['results'][0]['stock'] == 7
+    with django_assert_num_queries(0):
+        assert _get(api_client, 'book-api-detail', pk=book.pk)['stock'] == 7
+
+
+def test_stock_read_before_a_concurrent_sale_is_not_cached(book, commit):
+    # A resposta foi montada com o estoque 10, e a baixa confirmou antes de ela ir para o cache
+    generation = stock_generation()
+    data = {'id': book.pk, 'title': book.title, 'stock': 10}
+    with commit(), transaction.atomic():
+        decrement_stock({book.pk: book}, {book.pk: 3})
+
+    cache_response('books:response:corrida', data, generation)
+
+    assert cache.get('books:response:corrida')['stock'] is None
+    assert get_cached_response('books:response:corrida')['stock'] == 7
+
+
+def test_stock_only_save_keeps_catalog_version(api_client, book, commit):
+    _get(api_client, 'book-api-detail', pk=book.pk)
+    version = catalog_version()
+
+    with commit():
+        book.stock = 2
+        book.save(update_fields=['stock'])
+
+    assert catalog_version() == version
+    assert _get(api_client, 'book-api-detail', pk=book.pk)['stock'] == 2
+
+
+def test_authenticated_reads_bypass_cache(api_client, book):
+    _get(api_client)
+    api_client.force_authenticate(user=User.objects.create_user(username='reader', password='password123'))
+
+    BookModel.objects.filter(pk=book.pk).update(title='Atualizado sem signal')
+    assert _get(api_client)['results'][0]['title'] == 'Atualizado sem signal'
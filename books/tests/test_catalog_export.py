@@ -0,0 +1,125 @@
+import csv
+import datetime
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from books.models import AuthorModel, BookModel
+from books.services.catalog_export import EXPORT_CURSOR_OVERLAP_SECONDS, export_rows
+
+pytestmark = pytest.mark.django_db
+
+URL = reverse('book-api-export')
+
+
+def read_ndjson(response):
+    return [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+
+@pytest.fixture
+def staff_client(api_client, create_staff_user):
+    api_client.force_authenticate(user=create_staff_user)
+    return api_client
+
+
+def test_export_is_staff_only(api_client, create_user):
+    assert api_client.get(URL).status_code == status.HTTP_403_FORBIDDEN
+    api_client.force_authenticate(user=create_user)
+    assert api_client.get(URL).status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_ndjson_streams_every_book_with_authors_and_categories(staff_client, book):
+    inactive = BookModel.objects.create(title='Rascunho', price=10)
+
+    response = staff_client.get(URL)
+
+    assert isinstance(response, StreamingHttpResponse)
+    assert response['Content-Type'].startswith('application/x-ndjson')
+    assert response['X-Export-Started-At']
+    rows = read_ndjson(response)
+    assert [row['id'] for row in rows] == [book.pk, inactive.pk]
+    assert rows[0]['authors'] == ['Test Author']
+    assert rows[0]['categories'] == ['Test Category']
+    assert rows[0]['price'] == '25.00'
+    assert rows[1]['is_active'] is False
+    assert 'search_vector' not in rows[0]
+
+
+def test_csv_export(staff_client, book):
+    response = staff_client.get(URL, {'output': 'csv'})
+
+    assert response['Content-Type'].startswith('text/csv')
+    reader = csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode()))
+    row = next(reader)
+    assert row['title'] == 'Test Book'
+    assert row['authors'] == 'Test Author'
+    assert row['isbn_13'] == ''
+
+
+def test_updated_since_includes_relation_changes(staff_client, book, author):
+    BookModel.objects.filter(pk=book.pk).update(updated_at=timezone.now() - datetime.timedelta(days=2))
+    since = (timezone.now() - datetime.timedelta(days=1)).isoformat()
+
+    assert read_ndjson(staff_client.get(URL, {'updated_since': since})) == []
+
+    author.name = 'Autor Renomeado'
+    author.save()
+
+    rows = read_ndjson(staff_client.get(URL, {'updated_since': since}))
+    assert [(row['id'], row['authors']) for row in rows] == [(book.pk, ['Autor Renomeado'])]
+
+
+def test_updated_since_includes_deleted_author(staff_client, book, author):
+    BookModel.objects.filter(pk=book.pk).update(updated_at=timezone.now() - datetime.timedelta(days=2))
+    since = (timezone.now() - datetime.timedelta(days=1)).isoformat()
+
+    author.delete()
+
+    rows = read_ndjson(staff_client.get(URL, {'updated_since': since}))
+    assert [(row['id'], row['authors']) for row in rows] == [(book.pk, [])]
+
+
+def test_advertised_cursor_overlaps_the_export_start(staff_client, book):
+    before = timezone.now()
+
+    response = staff_client.get(URL)
+
+    cursor = datetime.datetime.fromisoformat(response['X-Export-Started-At'])
+    assert cursor <= before - datetime.timedelta(seconds=EXPORT_CURSOR_OVERLAP_SECONDS) + datetime.timedelta(seconds=1)
+
+
+@pytest.mark.parametrize('params', [{'output': 'xml'}, {'updated_since': 'ontem'}])
+def test_invalid_params_return_400(staff_client, params):
+    assert staff_client.get(URL, params).status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_queries_are_per_chunk_not_per_book():
+    author = AuthorModel.objects.create(name='Autor')
+
+    def queries_for(count):
+        BookModel.objects.all().delete()
+        for index in range(count):
+            BookModel.objects.create(title=f'Livro {index}').authors.add(author)
+        with CaptureQueriesContext(connection) as context:
+            rows = list(export_rows(chunk_size=100))
+        assert len(rows) == count
+        return len(context.captured_queries)
+
+    assert queries_for(3) == queries_for(30)
+
+
+def test_command_writes_csv_file(book, tmp_path):
+    path = tmp_path / 'catalog.csv'
+
+    call_command('export_catalog', '--output-format', 'csv', '--output', str(path), stderr=io.StringIO())
+
+    rows = list(csv.DictReader(path.open(encoding='utf-8')))
+    assert [row['title'] for row in rows] == ['Test Book']
@@ -0,0 +1,86 @@
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def commit(django_capture_on_commit_callbacks):
+    return lambda: django_capture_on_commit_callbacks(execute=True)
+
+
+@pytest.mark.parametrize('url_name', ['book-api-list', 'book-api-detail'])
+def test_matching_etag_returns_304(api_client, book, url_name, django_assert_num_queries):
+    url = reverse(url_name, kwargs={'pk': book.pk} if url_name == 'book-api-detail' else None)
+    etag = api_client.get(url)['ETag']
+
+    with django_assert_num_queries(0):
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response['ETag'] == etag
+    assert not response.content
+
+
+def test_etag_depends_on_query_params(api_client, book):
+    url = reverse('book-api-list')
+    etag = api_client.get(url)['ETag']
+
+    response = api_client.get(url, {'fields': 'id,title'}, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response['ETag'] != etag
+
+
+def test_catalog_changes_change_the_etag(api_client, book, author, commit):
+    url = reverse('book-api-detail', kwargs={'pk': book.pk})
+    etag = api_client.get(url)['ETag']
+
+    with commit():
+        author.name = 'Outro Nome'
+        author.save()
+
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['authors'][0]['name'] == 'Outro Nome'
+
+
+def test_stock_changes_change_the_etag(api_client, book, commit):
+    url = reverse('book-api-list')
+    etag = api_client.get(url)['ETag']
+
+    with commit():
+        book.stock = 1
+        book.save(update_fields=['stock', 'updated_at'])
+
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['results'][0]['stock'] == 1
+
+
+def test_authenticated_reads_share_the_same_validators(api_client, book):
+    url = reverse('book-api-detail', kwargs={'pk': book.pk})
+    etag = api_client.get(url)['ETag']
+    api_client.force_authenticate(user=User.objects.create_user(username='reader', password='password123'))
+
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.parametrize('url_name', ['book-api-list', 'book-api-detail'])
+def test_authenticated_304_skips_the_page_query_and_serialization(api_client, book, url_name, mocker, django_assert_max_num_queries):
+    url = reverse(url_name, kwargs={'pk': book.pk} if url_name == 'book-api-detail' else None)
+    api_client.force_authenticate(user=User.objects.create_user(username='reader', password='password123'))
+    etag = api_client.get(url)['ETag']
+    to_representation = mocker.patch('rest_framework.serializers.ModelSerializer.to_representation')
+
+    # No máximo a leitura do estoque (id, stock), nunca a página de livros
+    with django_assert_max_num_queries(1):
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response['ETag'] == etag
+    to_representation.assert_not_called()
@@ -0,0 +1,115 @@
+import datetime
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from books.admin import BookAdmin
+from books.models import AuthorModel, BookModel
+from books.services.bulk_import import write_volumes
+from books.services.google_books_api import volume_fields
+
+pytestmark = pytest.mark.django_db
+
+
+def test_columns_follow_relation_changes(book, author, category):
+    second = AuthorModel.objects.create(name='Second Author')
+
+    book.authors.add(second)
+    book.refresh_from_db()
+    assert book.authors_display == ['Test Author', 'Second Author']
+    assert book.authors_display_ids == [author.pk, second.pk]
+    assert book.categories_display == ['Test Category']
+    assert book.categories_display_ids == [category.pk]
+
+    book.authors.remove(author)
+    book.categories.clear()
+    book.refresh_from_db()
+    assert book.authors_display == ['Second Author']
+    assert (book.categories_display, book.categories_display_ids) == ([], [])
+
+
+def test_reverse_relation_changes_update_every_book(book, category):
+    other = BookModel.objects.create(title='Outro')
+
+    category.category_books.add(other)
+
+    other.refresh_from_db()
+    assert other.categories_display == ['Test Category']
+
+
+def test_reverse_clear_updates_every_book(book, author):
+    other = BookModel.objects.create(title='Outro')
+    author.author_books.add(other)
+    BookModel.objects.update(updated_at=timezone.now() - datetime.timedelta(days=1))
+    since = timezone.now() - datetime.timedelta(hours=1)
+
+    author.author_books.clear()
+
+    for touched in (book, other):
+        touched.refresh_from_db()
+        assert (touched.authors_display, touched.authors_display_ids) == ([], [])
+        assert touched.updated_at >= since
+
+
+def test_rename_and_delete_update_the_books(book, author, category):
+    author.name = 'Renamed Author'
+    author.save()
+    category.delete()
+
+    book.refresh_from_db()
+    assert book.authors_display == ['Renamed Author']
+    assert (book.categories_display, book.categories_display_ids) == ([], [])
+
+
+def test_bulk_import_fills_columns():
+    volume = {
+        'id': 'abc123',
+        'volumeInfo': {'title': 'Dom Casmurro', 'authors': ['Machado de Assis'], 'categories': ['Fiction']},
+    }
+
+    write_volumes([volume_fields(volume)])
+
+    book = BookModel.objects.get(google_books_id='abc123')
+    assert book.authors_display == ['Machado de Assis']
+    assert book.categories_display == ['Fiction']
+    assert book.authors_display_ids == [AuthorModel.objects.get(name='Machado de Assis').pk]
+
+
+def test_list_reads_only_the_books_table(api_client, book):
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get(reverse('book-api-list'))
+
+    assert response.data['results'][0]['authors'] == ['Test Author']
+    assert not any('books_authormodel' in query['sql'] or 'books_bookmodel_authors' in query['sql'] for query in queries)
+
+
+def test_admin_changelist_uses_the_columns(book):
+    admin = BookAdmin(BookModel, None)
+    book.refresh_from_db()
+
+    assert admin.get_authors(book) == 'Test Author'
+    assert admin.get_categories(book) == 'Test Category'
+
+
+def test_rebuild_command_repairs_bulk_loaded_books(author, category):
+    books = BookModel.objects.bulk_create(BookModel(title=f'Livro {n}') for n in range(3))
+    BookModel.authors.through.objects.bulk_create(
+        BookModel.authors.through(bookmodel_id=book.pk, authormodel_id=author.pk) for book in books
+    )
+    BookModel.categories.through.objects.bulk_create(
+        BookModel.categories.through(bookmodel_id=book.pk, categorymodel_id=category.pk) for book in books
+    )
+    assert all(book.authors_display == [] for book in BookModel.objects.all())
+
+    out = io.StringIO()
+    call_command('rebuild_display_columns', stdout=out)
+
+    assert 'rebuilt for 3 books' in out.getvalue()
+    for book in BookModel.objects.all():
+        assert book.authors_display == ['Test Author']
+        assert book.categories_display_ids == [category.pk]
@@ -0,0 +1,99 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from books.models import AuthorModel, BookModel, CategoryModel
+
+pytestmark = pytest.mark.django_db
+
+LIST_URL = reverse('book-api-list')
+FACETS_URL = reverse('book-api-facets')
+
+
+@pytest.fixture
+def catalog():
+    machado = AuthorModel.objects.create(name='Machado de Assis')
+    clarice = AuthorModel.objects.create(name='Clarice Lispector')
+    fiction = CategoryModel.objects.create(name='Fiction')
+    poetry = CategoryModel.objects.create(name='Poetry')
+
+    def create(title, price, stock, authors, categories, publisher='Companhia'):
+        book = BookModel.objects.create(title=title, price=price, stock=stock, is_active=True, publisher=publisher)
+        book.authors.set(authors)
+        book.categories.set(categories)
+        return book
+
+    books = {
+        'dom': create('Dom Casmurro', 20, 3, [machado], [fiction]),
+        'bras': create('Memórias Póstumas', 40, 0, [machado], [fiction, poetry]),
+        'hora': create('A Hora da Estrela', 60, 5, [clarice], [fiction], publisher='Rocco'),
+        'agua': create('Água Viva', 150, 1, [clarice, machado], [poetry], publisher='Rocco'),
+    }
+    BookModel.objects.create(title='Inativo', price=10, is_active=False)
+    return {'machado': machado, 'clarice': clarice, 'fiction': fiction, 'poetry': poetry, **books}
+
+
+def _titles(api_client, params):
+    response = api_client.get(LIST_URL, params)
+    assert response.status_code == status.HTTP_200_OK
+    return {item['title'] for item in response.data['results']}
+
+
+def test_filters_by_category_author_publisher_price_and_stock(api_client, catalog):
+    assert _titles(api_client, {'category': catalog['poetry'].pk}) == {'Memórias Póstumas', 'Água Viva'}
+    assert _titles(api_client, {'author': f"{catalog['machado'].pk},{catalog['clarice'].pk}"}) == {
+        'Dom Casmurro', 'Memórias Póstumas', 'A Hora da Estrela', 'Água Viva',
+    }
+    assert _titles(api_client, {'publisher': 'rocco'}) == {'A Hora da Estrela', 'Água Viva'}
+    assert _titles(api_client, {'price_min': 40, 'price_max': 60}) == {'Memórias Póstumas', 'A Hora da Estrela'}
+    assert _titles(api_client, {'price_band': ['0-25', '100+']}) == {'Dom Casmurro', 'Água Viva'}
+    assert _titles(api_client, {'in_stock': 'false'}) == {'Memórias Póstumas'}
+    assert _titles(api_client, {'category': catalog['fiction'].pk, 'in_stock': 'true', 'author': catalog['machado'].pk}) == {
+        'Dom Casmurro',
+    }
+
+
+def test_invalid_filter_is_rejected(api_client, catalog):
+    assert api_client.get(LIST_URL, {'price_band': '1-2'}).status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_facets_count_the_current_query(api_client, catalog):
+    response = api_client.get(FACETS_URL)
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.data
+    assert data['total'] == 4
+    assert data['in_stock'] == 3
+    assert [(band['key'], band['count']) for band in data['price_bands']] == [
+        ('0-25', 1), ('25-50', 1), ('50-100', 1), ('100+', 1),
+    ]
+    assert [(row['name'], row['count']) for row in data['categories']] == [('Fiction', 3), ('Poetry', 2)]
+    assert [(row['name'], row['count']) for row in data['authors']] == [('Machado de Assis', 3), ('Clarice Lispector', 2)]
+    assert data['publishers'] == [{'name': 'Companhia', 'count': 2}, {'name': 'Rocco', 'count': 2}]
+
+    filtered = api_client.get(FACETS_URL, {'author': catalog['clarice'].pk}).data
+    assert filtered['total'] == 2
+    assert [(row['name'], row['count']) for row in filtered['categories']] == [('Fiction', 1), ('Poetry', 1)]
+
+
+def test_facets_use_a_fixed_number_of_queries(api_client, catalog, django_assert_max_num_queries):
+    for n in range(20):
+        category = CategoryModel.objects.create(name=f'Categoria {n}')
+        book = BookModel.objects.create(title=f'Livro {n}', price=n + 1, stock=1, is_active=True)
+        book.categories.add(category)
+
+    with django_assert_max_num_queries(4):
+        response = api_client.get(FACETS_URL, {'limit': 5})
+
+    assert len(response.data['categories']) == 5
+
+
+def test_stock_changes_show_up_in_facets_and_in_stock_filter(api_client, catalog):
+    assert api_client.get(FACETS_URL).data['in_stock'] == 3
+    assert _titles(api_client, {'in_stock': 'true'}) == {'Dom Casmurro', 'A Hora da Estrela', 'Água Viva'}
+
+    # Mudança só de estoque: não troca a versão do catálogo
+    BookModel.objects.filter(pk=catalog['dom'].pk).update(stock=0)
+
+    assert api_client.get(FACETS_URL).data['in_stock'] == 2
+    assert _titles(api_client, {'in_stock': 'true'}) == {'A Hora da Estrela', 'Água Viva'}
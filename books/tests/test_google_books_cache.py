@@ -0,0 +1,108 @@
+import json
+import os
+
+import pytest
+import requests
+
+from books.services import google_books_api, google_books_cache
+from books.services.google_books_api import fetch_volume, search_google_api
+from books.services.google_books_cache import CacheMissError, clear_memory_cache
+from common import http_client
+
+
+def make_response(status_code, data=None, etag=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = google_books_api.VOLUMES_URL
+    response._content = json.dumps(data).encode() if data is not None else b''
+    if etag:
+        response.headers['ETag'] = etag
+    return response
+
+
+@pytest.fixture
+def google(monkeypatch):
+    """Substitui a rede: cada chamada consome a próxima resposta (ou exceção) da fila."""
+    calls = []
+    replies = []
+
+    def fake_get(url, params=None, headers=None, **kwargs):
+        calls.append({'url': url, 'params': params, 'headers': headers or {}})
+        reply = replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    monkeypatch.setattr(http_client, 'get', fake_get)
+    return {'calls': calls, 'replies': replies}
+
+
+VOLUME = {'id': 'abc', 'volumeInfo': {'title': 'Dom Casmurro'}}
+
+
+def test_volume_is_served_from_memory_and_then_from_disk(google, settings):
+    google['replies'].append(make_response(200, VOLUME, etag='"v1"'))
+
+    assert fetch_volume('abc') == VOLUME
+    assert fetch_volume('abc') == VOLUME
+    clear_memory_cache()
+    assert fetch_volume('abc') == VOLUME
+
+    assert len(google['calls']) == 1
+    stored = [name for _, _, names in os.walk(settings.GOOGLE_BOOKS_CACHE_DIR) for name in names]
+    assert len(stored) == 1
+
+
+def test_stale_entry_is_revalidated_with_if_none_match(google, monkeypatch):
+    monkeypatch.setattr(google_books_api, 'VOLUME_CACHE_SECONDS', 0)
+    google['replies'] += [make_response(200, VOLUME, etag='"v1"'), make_response(304)]
+
+    fetch_volume('abc')
+    assert fetch_volume('abc') == VOLUME
+
+    assert google['calls'][1]['headers'] == {'If-None-Match': '"v1"'}
+
+
+@pytest.mark.parametrize('failure', [make_response(503), requests.exceptions.ConnectionError('offline')])
+def test_stale_entry_is_served_when_google_fails(google, monkeypatch, failure):
+    monkeypatch.setattr(google_books_api, 'VOLUME_CACHE_SECONDS', 0)
+    google['replies'] += [make_response(200, VOLUME), failure]
+
+    fetch_volume('abc')
+
+    assert fetch_volume('abc') == VOLUME
+
+
+def test_not_found_is_not_cached(google):
+    google['replies'] += [make_response(404), make_response(200, VOLUME)]
+
+    with pytest.raises(ValueError):
+        fetch_volume('abc')
+    assert fetch_volume('abc') == VOLUME
+
+
+def test_equivalent_searches_share_one_entry_without_the_api_key(google, settings):
+    settings.GOOGLE_BOOKS_API_KEY = 'secret-api-key'
+    google['replies'].append(make_response(200, {'items': [VOLUME]}))
+
+    search_google_api('Dom  Casmurro ')
+    assert search_google_api('dom casmurro') == {'items': [VOLUME]}
+
+    assert len(google['calls']) == 1
+    for directory, _, names in os.walk(settings.GOOGLE_BOOKS_CACHE_DIR):
+        for name in names:
+            with open(os.path.join(directory, name), encoding='utf-8') as file:
+                assert settings.GOOGLE_BOOKS_API_KEY not in file.read()
+
+
+def test_offline_mode_replays_the_cache_without_network(google, monkeypatch):
+    monkeypatch.setattr(google_books_api, 'VOLUME_CACHE_SECONDS', 0)
+    google['replies'].append(make_response(200, VOLUME))
+    fetch_volume('abc')
+
+    monkeypatch.setattr(google_books_cache, 'OFFLINE', True)
+
+    assert fetch_volume('abc') == VOLUME
+    with pytest.raises(CacheMissError):
+        fetch_volume('missing')
+    assert len(google['calls']) == 1
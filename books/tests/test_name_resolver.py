@@ -0,0 +1,63 @@
+import pytest
+from django.db import transaction
+
+from books.models import AuthorModel, CategoryModel
+from books.services.google_books_api import import_from_google_api
+from books.services.name_resolver import resolve_authors, resolve_categories
+
+pytestmark = pytest.mark.django_db
+
+
+def test_resolves_existing_and_creates_missing_in_three_queries(author, django_assert_num_queries):
+    # IN com os nomes, INSERT dos que faltam, releitura dos ids criados
+    with django_assert_num_queries(3):
+        ids = resolve_authors(['Test Author', 'Clarice Lispector', 'Clarice Lispector', 'Jorge Amado'])
+
+    assert ids['Test Author'] == author.pk
+    assert set(ids) == {'Test Author', 'Clarice Lispector', 'Jorge Amado'}
+    assert AuthorModel.objects.count() == 3
+    assert AuthorModel.objects.get(name='Jorge Amado').pk == ids['Jorge Amado']
+
+
+def test_committed_names_are_served_from_memory(django_capture_on_commit_callbacks, django_assert_num_queries):
+    with django_capture_on_commit_callbacks(execute=True):
+        ids = resolve_categories(['Romance', 'Poesia'])
+
+    with django_assert_num_queries(0):
+        assert resolve_categories(['Poesia', 'Romance']) == ids
+
+
+def test_rolled_back_names_are_not_cached(django_capture_on_commit_callbacks, django_assert_num_queries):
+    with django_capture_on_commit_callbacks(execute=True):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                resolve_authors(['Autor Fantasma'])
+                raise RuntimeError
+
+    with django_assert_num_queries(3):
+        ids = resolve_authors(['Autor Fantasma'])
+    assert AuthorModel.objects.get(name='Autor Fantasma').pk == ids['Autor Fantasma']
+
+
+def test_renaming_or_deleting_forgets_cached_names(category, django_capture_on_commit_callbacks, django_assert_num_queries):
+    with django_capture_on_commit_callbacks(execute=True):
+        resolve_categories(['Test Category'])
+
+    category.name = 'Renamed'
+    category.save()
+
+    with django_assert_num_queries(3):
+        ids = resolve_categories(['Test Category'])
+    assert ids['Test Category'] != category.pk
+    assert CategoryModel.objects.count() == 2
+
+
+def test_import_from_google_api_reuses_existing_names(author, monkeypatch):
+    volume = {'id': 'abc123', 'volumeInfo': {'title': 'Livro', 'authors': ['Test Author', 'Novo Autor'], 'categories': ['Drama']}}
+    monkeypatch.setattr('books.services.google_books_api.fetch_volume', lambda google_id: volume)
+
+    book = import_from_google_api('abc123')
+
+    assert sorted(book.authors.values_list('name', flat=True)) == ['Novo Autor', 'Test Author']
+    assert list(book.categories.values_list('name', flat=True)) == ['Drama']
+    assert AuthorModel.objects.count() == 2
@@ -0,0 +1,123 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from rest_framework import status
+
+from books.models import AuthorModel, BookModel
+from books.services.search import normalize_isbn
+
+pytestmark = pytest.mark.django_db
+
+requires_postgres = pytest.mark.skipif(connection.vendor != 'postgresql', reason='Busca full-text exige PostgreSQL')
+
+
+def _create_book(title, author_name=None, **fields):
+    fields.setdefault('price', 30)
+    book = BookModel.objects.create(title=title, stock=5, is_active=True, **fields)
+    if author_name:
+        book.authors.add(AuthorModel.objects.get_or_create(name=author_name)[0])
+    return book
+
+
+def _search(api_client, query):
+    response = api_client.get(reverse('book-api-list'), {'search': query})
+    assert response.status_code == status.HTTP_200_OK
+    return [item['title'] for item in response.data['results']]
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('9788535902771', '9788535902771'),
+    ('978-85-359-0277-1', '9788535902771'),
+    (' 85 359 0277 x ', '853590277X'),
+    ('dom casmurro', None),
+    ('978853590277', None),
+])
+def test_normalize_isbn(query, expected):
+    assert normalize_isbn(query) == expected
+
+
+def test_search_by_isbn_with_hyphens(api_client):
+    """Busca que parece ISBN é resolvida por igualdade, em qualquer banco."""
+    _create_book('Dom Casmurro', isbn_13='9788535902771', isbn_10='8535902775')
+    _create_book('Memórias Póstumas de Brás Cubas', isbn_13='9788535910667')
+
+    assert _search(api_client, '978-85-359-0277-1') == ['Dom Casmurro']
+    assert _search(api_client, '85-359-0277-5') == ['Dom Casmurro']
+
+
+def test_search_by_title_and_author(api_client):
+    _create_book('Dom Casmurro', 'Machado de Assis')
+    _create_book('Capitães da Areia', 'Jorge Amado')
+
+    assert _search(api_client, 'Casmurro') == ['Dom Casmurro']
+    assert _search(api_client, 'Amado') == ['Capitães da Areia']
+
+
+def test_rebuild_search_vectors_outside_postgres():
+    if connection.vendor == 'postgresql':
+        pytest.skip('Comportamento sem PostgreSQL')
+    out = StringIO()
+    call_command('rebuild_search_vectors', stdout=out)
+    assert 'PostgreSQL' in out.getvalue()
+
+
+@requires_postgres
+def test_search_ranks_title_matches_first(api_client):
+    _create_book('Um livro qualquer', description='Fala de um romance antigo entre vizinhos.')
+    _create_book('Romance de verão')
+
+    assert _search(api_client, 'romance') == ['Romance de verão', 'Um livro qualquer']
+
+
+@requires_postgres
+def test_search_uses_portuguese_stemming(api_client):
+    _create_book('Romances brasileiros')
+
+    assert _search(api_client, 'romance') == ['Romances brasileiros']
+
+
+@requires_postgres
+def test_search_tolerates_typos_in_title(api_client):
+    _create_book('Grande Sertão: Veredas')
+
+    assert _search(api_client, 'Grande Sertao Vereda') == ['Grande Sertão: Veredas']
+
+
+@requires_postgres
+def test_search_vector_follows_author_changes(api_client):
+    book = _create_book('Capitães da Areia')
+    assert _search(api_client, 'Amado') == []
+
+    author = AuthorModel.objects.create(name='Jorge Amado')
+    book.authors.add(author)
+    assert _search(api_client, 'Amado') == ['Capitães da Areia']
+
+    author.name = 'Graciliano Ramos'
+    author.save()
+    assert _search(api_client, 'Graciliano') == ['Capitães da Areia']
+
+
+@requires_postgres
+def test_explicit_ordering_overrides_rank(api_client):
+    _create_book('Romance caro', price=80)
+    _create_book('Romance barato', price=10)
+
+    response = api_client.get(reverse('book-api-list'), {'search': 'romance', 'ordering': 'price'})
+    assert [item['title'] for item in response.data['results']] == ['Romance barato', 'Romance caro']
+
+
+@requires_postgres
+def test_books_without_search_vector_are_ranked_and_paginated(api_client):
+    for index in range(3):
+        _create_book(f'Romance {index}')
+    BookModel.objects.update(search_vector=None)
+
+    response = api_client.get(reverse('book-api-list'), {'search': 'Romance', 'page_size': 2})
+    assert response.status_code == status.HTTP_200_OK
+    next_page = api_client.get(response.data['next'])
+
+    titles = [item['title'] for item in response.data['results'] + next_page.data['results']]
+    assert sorted(titles) == ['Romance 0', 'Romance 1', 'Romance 2']
@@ -0,0 +1,93 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from books.models import BookModel
+
+pytestmark = pytest.mark.django_db
+
+
+def test_list_uses_compact_representation(api_client, book):
+    response = api_client.get(reverse('book-api-list'))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['results'][0] == {
+        'id': book.pk,
+        'title': 'Test Book',
+        'slug': 'test-book',
+        'authors': ['Test Author'],
+        'price': '25.00',
+        'thumbnail_url': None,
+        'stock': 10,
+    }
+
+
+def test_list_never_loads_description(api_client, book):
+    with CaptureQueriesContext(connection) as queries:
+        api_client.get(reverse('book-api-list'))
+
+    book_queries = [query['sql'] for query in queries if 'FROM "books_bookmodel"' in query['sql']]
+    assert book_queries and not any('description' in sql for sql in book_queries)
+    assert not any('books_categorymodel' in query['sql'] for query in queries)
+
+
+def test_detail_keeps_full_representation(api_client, book):
+    response = api_client.get(reverse('book-api-detail', kwargs={'pk': book.pk}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['categories'] == [{'id': book.categories.get().pk, 'name': 'Test Category'}]
+    assert response.data['is_ready_for_shipping'] is True
+    assert 'description' in response.data
+
+
+@pytest.mark.parametrize('url_name', ['book-api-list', 'book-api-detail'])
+def test_fields_param_selects_fields(api_client, book, url_name):
+    kwargs = {'pk': book.pk} if url_name == 'book-api-detail' else {}
+    response = api_client.get(reverse(url_name, kwargs=kwargs), {'fields': 'id,formatted_price,categories'})
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.data['results'][0] if url_name == 'book-api-list' else response.data
+    assert data == {
+        'id': book.pk,
+        'formatted_price': 'R$ 25.00',
+        'categories': [{'id': book.categories.get().pk, 'name': 'Test Category'}],
+    }
+
+
+def test_fields_param_loads_only_requested_columns(api_client, book):
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get(reverse('book-api-list'), {'fields': 'title,is_ready_for_shipping'})
+
+    assert response.data['results'][0] == {'title': 'Test Book', 'is_ready_for_shipping': True}
+    book_query = next(query['sql'] for query in queries if 'FROM "books_bookmodel"' in query['sql'] and 'COUNT' not in query['sql'])
+    assert '"weight_g"' in book_query and '"description"' not in book_query and '"publisher"' not in book_query
+    assert not any('books_authormodel' in query['sql'] for query in queries)
+
+
+@pytest.mark.parametrize('ordering', [None, 'price', '-page_count'])
+def test_fields_param_loads_the_ordering_columns(api_client, book, ordering):
+    for index in range(3):
+        BookModel.objects.create(title=f'Livro {index}', price=index + 1, page_count=index, is_active=True)
+    params = {'fields': 'id,title', 'page_size': 2}
+    if ordering:
+        params['ordering'] = ordering
+
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get(reverse('book-api-list'), params)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['next']
+    # Sem as colunas da ordenação, o cursor da próxima página faria uma consulta por livro
+    book_queries = [query['sql'] for query in queries if 'FROM "books_bookmodel"' in query['sql'] and 'COUNT' not in query['sql']]
+    assert len(book_queries) == 1
+    assert '"created_at"' in book_queries[0]
+
+
+@pytest.mark.parametrize('fields', ['', 'id,author_ids', 'id,nope'])
+def test_fields_param_rejects_unknown_fields(api_client, book, fields):
+    response = api_client.get(reverse('book-api-list'), {'fields': fields})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'fields' in response.data
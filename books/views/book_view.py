@@ -1,13 +1,33 @@
 import requests
-from rest_framework import viewsets, filters, status
+from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
 from common.permissions import IsStaffAuthOrReadOnly
+from common.conditional import conditional_response, make_etag
+from common.pagination import KeysetPagination
+from common.serializers import parse_fields_param
 
+from books.filters import BookFilterSet, CatalogOrderingFilter, CatalogSearchFilter
 from books.models import BookModel
-from books.serializers import BookSerializer
+from books.serializers import BookListSerializer, BookSerializer
+from books.serializers.book_serializer import LIST_MODEL_COLUMNS_BY_FIELD, MODEL_COLUMNS_BY_FIELD
 
+from books.services.autocomplete import CACHE_SECONDS, DEFAULT_LIMIT, MAX_LIMIT, autocomplete
+from books.services.bulk_update import bulk_update_books, read_csv_rows
+from books.services.catalog_export import (
+    CONTENT_TYPES, EXPORT_FORMATS, export_rows, next_updated_since, parse_updated_since, render_export,
+)
+from books.services.catalog_cache import (
+    cache_response, get_cached_response, get_response_book_ids, remember_response_book_ids, response_cache_key,
+    stock_generation, stock_signature, stock_signature_for,
+)
+from books.services.facets import FACET_LIMIT, facet_counts
 from books.services.google_books_api import search_google_api, import_from_google_api
 
 
@@ -16,7 +36,18 @@ class BookViewSetAPI(viewsets.ModelViewSet):
     BookViewSetAPI é uma ViewSet baseada em ModelViewSet para gerenciar operações relacionadas ao modelo BookModel.
     Funcionalidades principais:
     - Permite operações CRUD para livros, com permissões restritas a usuários staff para escrita e leitura aberta para outros.
-    - Suporta filtros, busca e ordenação por campos como título, ISBN, autor, categoria, preço, data de criação e número de páginas.
+    - A listagem usa a representação compacta (BookListSerializer); o detalhe usa o BookSerializer completo.
+    - ?fields=id,title,description escolhe os campos da resposta (listagem ou detalhe) entre os do BookSerializer.
+      A consulta carrega só as colunas e relações que esses campos usam (a descrição nunca é lida na listagem padrão).
+    - Listagem e detalhe para usuários anônimos são servidos do cache (chave: versão do catálogo + query params),
+      com o estoque sempre atualizado a partir do cache de estoque.
+    - Listagem e detalhe enviam ETag e respondem 304 a If-None-Match que confere.
+    - Suporta filtros (BookFilterSet: categoria, autor, editora, faixa de preço e em estoque), busca e ordenação por preço, data de criação e número de páginas.
+    - A busca (?search=) usa full-text + trigramas no PostgreSQL, ordenada por relevância, e igualdade exata para ISBNs.
+    - Endpoint customizado GET /facets: Contagens por categoria, autor, editora, faixa de preço e estoque para os mesmos filtros/busca da listagem.
+    - Endpoint customizado GET /autocomplete: Sugestões leves (id, título, autores) pelo prefixo em 'q', para caixas de busca.
+    - Endpoint customizado GET /export (staff): Catálogo inteiro em streaming, como NDJSON ou CSV (?output=), com ?updated_since=.
+    - Endpoint customizado POST /bulk-update (staff): Estoque e/ou preço de muitos livros (JSON 'rows' ou CSV em 'file'), com erros por linha.
     - Endpoint customizado GET /search-google: Busca livros na API do Google Books a partir do parâmetro de consulta 'q'.
     - Endpoint customizado POST /import-google: Importa um livro da Google Books API usando o 'google_books_id' informado no corpo da requisição.
     Atributos:
@@ -24,10 +55,20 @@ class BookViewSetAPI(viewsets.ModelViewSet):
         serializer_class: Serializador utilizado para o modelo de livro.
         permission_classes: Permissões aplicadas à viewset.
         filter_backends: Backends de filtro, busca e ordenação.
-        search_fields: Campos disponíveis para busca textual.
+        filterset_class: Filtros do catálogo (BookFilterSet).
+        search_fields: Campos da busca simples, usada quando o banco não suporta full-text.
         ordering_fields: Campos disponíveis para ordenação.
         ordering: Ordenação padrão dos resultados.
+        pagination_class: Paginação por cursor (?cursor=, ?page_size=, ?count=true).
     Métodos:
+        requested_fields: Campos pedidos em ?fields= (listagem e detalhe), ou None.
+        get_queryset(): Aplica only()/prefetch conforme os campos que serão serializados (a listagem padrão lê só a tabela de livros).
+        list()/retrieve(): Respostas anônimas passam pelo cache de respostas do catálogo; todas levam ETag (GET condicional).
+        facets(request): Contagens das facetas do catálogo para a consulta atual, calculadas a cada requisição (sem cache nem ETag).
+        get_serializer_class(): BookListSerializer na listagem sem ?fields=, BookSerializer nos demais casos.
+        autocomplete_books(request): Sugestões de livros pelo prefixo do título ou do autor.
+        export_catalog(request): Exporta os livros com autores e categorias, em streaming.
+        bulk_update_stock_and_price(request): Atualiza estoque/preço em lote.
         search_google_books(request): Busca livros na Google Books API.
         import_from_google_books(request): Importa um livro da Google Books API para o banco local.
     """
@@ -37,14 +78,180 @@ class BookViewSetAPI(viewsets.ModelViewSet):
     permission_classes  = [IsStaffAuthOrReadOnly]
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
-        filters.OrderingFilter
+        CatalogSearchFilter,
+        CatalogOrderingFilter
     ]
+    filterset_class = BookFilterSet
 
 
     search_fields = ['title', 'isbn_13', 'isbn_10', 'authors__name', 'categories__name', 'source']
     ordering_fields = ['price', 'created_at', 'page_count']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
+    pagination_class = KeysetPagination
+
+    def _response_book_ids(self, key, kwargs):
+        # Ids dos livros da resposta sem montá-la: o do detalhe vem da URL; os da página, de uma resposta anterior com a mesma chave
+        if self.action == 'retrieve':
+            try:
+                return [int(kwargs[self.lookup_field])]
+            except (TypeError, ValueError):
+                return None
+        return get_response_book_ids(key)
+
+    def _cached(self, request, handler, *args, **kwargs):
+        # O conteúdo é determinado pela chave (versão do catálogo + params) e pelo estoque dos livros exibidos,
+        # então o ETag sai daí sem consultar o banco (um COUNT/MAX do catálogo inteiro a cada polling custaria caro)
+        # ?in_stock= depende do estoque de livros fora da página, e mudanças só de estoque
+        # não trocam a versão do catálogo: essas respostas não passam pelo cache nem pelo ETag
+        if 'in_stock' in request.query_params:
+            return handler(request, *args, **kwargs)
+
+        key = response_cache_key(request, self.action, kwargs.get(self.lookup_field))
+        anonymous = not (request.user and request.user.is_authenticated)
+
+        book_ids = self._response_book_ids(key, kwargs)
+        data = get_cached_response(key) if anonymous else None
+        if data is not None:
+            signature = stock_signature_for(book_ids) if book_ids is not None else stock_signature(data)
+            return conditional_response(request, make_etag(key, signature), lambda: Response(data))
+
+        def build():
+            generation = stock_generation()
+            response = handler(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                remember_response_book_ids(key, response.data)
+                if anonymous:
+                    cache_response(key, response.data, generation)
+            return response
+
+        # Com os ids conhecidos, um If-None-Match que confere responde 304 antes de consultar e serializar a página
+        if book_ids is not None:
+            return conditional_response(request, make_etag(key, stock_signature_for(book_ids)), build)
+
+        response = build()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        etag = make_etag(key, stock_signature(response.data))
+        return conditional_response(request, etag, lambda: response)
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(request, super().retrieve, *args, **kwargs)
+
+    @action(detail=False, methods=['get'], url_path='facets', url_name='facets')
+    def facets(self, request):
+        # Calculadas a cada requisição: as contagens de estoque mudam sem trocar a versão do catálogo
+        try:
+            limit = min(max(int(request.query_params.get('limit', FACET_LIMIT)), 1), FACET_LIMIT)
+        except ValueError:
+            return Response({"detail": "Parâmetro 'limit' deve ser um número inteiro."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(facet_counts(self.filter_queryset(self.get_queryset()), limit))
+
+    @cached_property
+    def requested_fields(self):
+        if self.action not in ('list', 'retrieve'):
+            return None
+        return parse_fields_param(self.request, BookSerializer.readable_fields())
+
+    def get_queryset(self):
+        fields = self.requested_fields
+        columns_by_field = MODEL_COLUMNS_BY_FIELD
+        if fields is None and self.action == 'list':
+            fields = BookListSerializer.Meta.fields
+            columns_by_field = LIST_MODEL_COLUMNS_BY_FIELD
+        if fields is None:
+            # Escrita, ações customizadas e detalhe completo
+            if self.action == 'facets':
+                return BookModel.objects.filter(is_active=True)
+            return super().get_queryset()
+
+        # As colunas da ordenação (padrão ou ?ordering=) também: a paginação lê delas o cursor da próxima página
+        columns = {'id', *self._ordering_columns()}
+        prefetches = []
+        for name in fields:
+            for column in columns_by_field.get(name, (name,)):
+                model_field = BookModel._meta.get_field(column)
+                if model_field.many_to_many:
+                    prefetches.append(Prefetch(column, queryset=model_field.related_model.objects.only('id', 'name')))
+                else:
+                    columns.add(column)
+        return BookModel.objects.filter(is_active=True).only(*columns).prefetch_related(*prefetches)
+
+    def _ordering_columns(self) -> set:
+        requested = (term.strip().lstrip('-') for term in self.request.query_params.get('ordering', '').split(','))
+        return {term for term in requested if term in self.ordering_fields} | {term.lstrip('-') for term in self.ordering}
+
+    def get_serializer_class(self):
+        if self.action == 'list' and self.requested_fields is None:
+            return BookListSerializer
+        return BookSerializer
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.requested_fields
+        return context
+
+    @action(detail=False, methods=['get'], url_path='autocomplete', url_name='autocomplete')
+    def autocomplete_books(self, request):
+        query = request.query_params.get('q', '')
+        if not query.strip():
+            return Response({"detail": "Parâmetro 'q' é obrigatório."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = min(max(int(request.query_params.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        except ValueError:
+            return Response({"detail": "Parâmetro 'limit' deve ser um número inteiro."}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = Response({"results": autocomplete(query, limit)})
+        patch_cache_control(response, public=True, max_age=CACHE_SECONDS)
+        return response
+
+    @action(detail=False, methods=['get'], url_path='export', url_name='export', permission_classes=[permissions.IsAdminUser])
+    def export_catalog(self, request):
+        # ?output= porque ?format= é o parâmetro de renderer do DRF
+        export_format = request.query_params.get('output', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"detail": f"Parâmetro 'output' deve ser um de: {', '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        updated_since = request.query_params.get('updated_since')
+        try:
+            updated_since = parse_updated_since(updated_since) if updated_since else None
+        except ValueError as e:
+            return Response({"detail": f"Parâmetro 'updated_since' inválido. {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Próximo ?updated_since= da sincronização incremental: o instante antes de ler, para não perder alterações
+        started_at = timezone.now()
+        response = StreamingHttpResponse(
+            render_export(export_format, export_rows(updated_since)), content_type=CONTENT_TYPES[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="catalog.{export_format}"'
+        response['X-Export-Started-At'] = next_updated_since(started_at).isoformat()
+        return response
+
+    @action(detail=False, methods=['post'], url_path='bulk-update', url_name='bulk-update', permission_classes=[permissions.IsAdminUser])
+    def bulk_update_stock_and_price(self, request):
+        upload = request.FILES.get('file')
+        try:
+            rows = read_csv_rows(upload) if upload else request.data.get('rows')
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(rows, list) or not rows:
+            return Response(
+                {"detail": "Envie 'rows' (lista de {id ou isbn_13, stock, price}) ou um CSV em 'file'."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        dry_run = str(request.query_params.get('dry_run', request.data.get('dry_run', ''))).lower() in ('1', 'true')
+        try:
+            result = bulk_update_books(rows, dry_run=dry_run)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"updated": result.updated, "dry_run": dry_run, "errors": result.errors})
 
     @action(detail=False, methods=['get'], url_path='search-google')
     def search_google_books(self, request):
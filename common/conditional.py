@@ -0,0 +1,32 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts) -> str:
+    """ETag (entre aspas) a partir das partes que determinam o conteúdo da resposta."""
+    digest = hashlib.sha256('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return quote_etag(digest[:32])
+
+
+def conditional_response(request, etag: str, build, last_modified=None):
+    """
+    GET condicional: responde 304 sem chamar build() quando o If-None-Match (ou, sem ele,
+    o If-Modified-Since) do cliente confere; senão chama build() e inclui ETag/Last-Modified na resposta.
+    Args:
+        etag (str): Validador da resposta (make_etag).
+        build (callable): Função sem argumentos que monta a resposta completa.
+        last_modified (datetime): Última alteração do conteúdo, quando ela é conhecida.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = build()
+        if response.status_code != 200:
+            return response
+
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    return response
@@ -0,0 +1,174 @@
+import bisect
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from decouple import config
+from requests.adapters import HTTPAdapter
+
+# Timeouts padrão (conexão, leitura) de toda chamada externa; nenhuma chamada fica sem timeout
+CONNECT_TIMEOUT_SECONDS = config('HTTP_CONNECT_TIMEOUT_SECONDS', default=3.05, cast=float)
+READ_TIMEOUT_SECONDS = config('HTTP_READ_TIMEOUT_SECONDS', default=10, cast=float)
+# Conexões mantidas abertas (keep-alive) por host
+POOL_MAXSIZE = config('HTTP_POOL_MAXSIZE', default=10, cast=int)
+# Novas tentativas (só em chamadas idempotentes), com backoff exponencial e jitter
+MAX_RETRIES = config('HTTP_MAX_RETRIES', default=2, cast=int)
+RETRY_BACKOFF_BASE_SECONDS = config('HTTP_RETRY_BACKOFF_BASE_SECONDS', default=0.2, cast=float)
+RETRY_BACKOFF_CAP_SECONDS = config('HTTP_RETRY_BACKOFF_CAP_SECONDS', default=2, cast=float)
+RETRY_STATUS_CODES = frozenset({429, 502, 503, 504})
+# Circuit breaker: falhas seguidas para abrir e tempo aberto antes de testar o host de novo
+CIRCUIT_FAILURE_THRESHOLD = config('HTTP_CIRCUIT_FAILURE_THRESHOLD', default=5, cast=int)
+CIRCUIT_RESET_SECONDS = config('HTTP_CIRCUIT_RESET_SECONDS', default=30, cast=float)
+
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+# Limites (ms) dos baldes do histograma de latência
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """O host falhou repetidamente; a chamada é recusada sem tocar a rede."""
+
+
+class _Upstream:
+    """Sessão (pool de conexões), circuit breaker e histograma de latência de um host."""
+
+    def __init__(self, host: str):
+        self.host = host
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.errors = 0
+
+    def before_call(self) -> None:
+        with self.lock:
+            if self.opened_at is None:
+                return
+            # Depois do tempo de reset, deixa passar uma única chamada de teste (half-open)
+            if time.monotonic() - self.opened_at < CIRCUIT_RESET_SECONDS or self.trial_in_flight:
+                raise CircuitOpenError(f'Circuito aberto para {self.host}: chamadas suspensas temporariamente.')
+            self.trial_in_flight = True
+
+    def after_call(self, elapsed_ms: float, failed: bool) -> None:
+        with self.lock:
+            self.count += 1
+            self.total_ms += elapsed_ms
+            self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+            self.trial_in_flight = False
+            if failed:
+                self.errors += 1
+                self.failures += 1
+                if self.opened_at is not None or self.failures >= CIRCUIT_FAILURE_THRESHOLD:
+                    self.opened_at = time.monotonic()
+            else:
+                self.failures = 0
+                self.opened_at = None
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            labels = [f'le_{limit}ms' for limit in LATENCY_BUCKETS_MS] + ['le_inf']
+            return {
+                'count': self.count,
+                'errors': self.errors,
+                'mean_ms': round(self.total_ms / self.count, 2) if self.count else None,
+                'circuit_open': self.opened_at is not None,
+                'histogram': dict(zip(labels, self.buckets)),
+            }
+
+
+_upstreams = {}
+_upstreams_lock = threading.Lock()
+
+
+def _upstream_for(url: str) -> _Upstream:
+    parts = urlsplit(url)
+    host = f'{parts.scheme}://{parts.netloc}'
+    upstream = _upstreams.get(host)
+    if upstream is None:
+        with _upstreams_lock:
+            upstream = _upstreams.setdefault(host, _Upstream(host))
+    return upstream
+
+
+def _retry_delay(attempt: int) -> float:
+    # "Full jitter": espera aleatória entre 0 e o backoff exponencial, para os clientes não tentarem juntos
+    return random.uniform(0, min(RETRY_BACKOFF_CAP_SECONDS, RETRY_BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+
+def request(method: str, url: str, *, idempotent: bool = None, retries: int = None, **kwargs) -> requests.Response:
+    """
+    Faz uma requisição HTTP pelo cliente compartilhado (mesma assinatura de requests.request).
+    - Reaproveita conexões (keep-alive) em um pool por host.
+    - Aplica os timeouts padrão quando a chamada não informa um.
+    - Repete chamadas idempotentes em erros de conexão, timeout ou 429/502/503/504.
+    - Recusa chamadas a hosts com o circuito aberto.
+    Args:
+        idempotent (bool): Força (ou impede) novas tentativas. Por padrão, só métodos idempotentes (ex: GET) são repetidos.
+        retries (int): Quantidade máxima de novas tentativas (padrão HTTP_MAX_RETRIES).
+    Lança:
+        CircuitOpenError: Se o host estiver com o circuito aberto.
+        requests.exceptions.RequestException: Se a chamada falhar depois das tentativas.
+    """
+    method = method.upper()
+    if idempotent is None:
+        idempotent = method in IDEMPOTENT_METHODS
+    max_retries = (MAX_RETRIES if retries is None else retries) if idempotent else 0
+    kwargs.setdefault('timeout', (CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS))
+
+    upstream = _upstream_for(url)
+    attempt = 0
+    while True:
+        upstream.before_call()
+        started = time.perf_counter()
+        try:
+            response = upstream.session.request(method, url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            upstream.after_call((time.perf_counter() - started) * 1000, failed=True)
+            if attempt >= max_retries:
+                raise
+        except BaseException:
+            # Qualquer outra exceção também encerra a chamada (inclusive a de teste do half-open), sem nova tentativa
+            upstream.after_call((time.perf_counter() - started) * 1000, failed=True)
+            raise
+        else:
+            upstream.after_call((time.perf_counter() - started) * 1000, failed=response.status_code >= 500)
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= max_retries:
+                return response
+            response.close()
+
+        time.sleep(_retry_delay(attempt))
+        attempt += 1
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request('POST', url, **kwargs)
+
+
+def latency_histograms() -> dict:
+    """Retorna {host: {count, errors, mean_ms, circuit_open, histogram}} das chamadas feitas por este processo."""
+    with _upstreams_lock:
+        upstreams = list(_upstreams.values())
+    return {upstream.host: upstream.snapshot() for upstream in upstreams}
+
+
+def reset() -> None:
+    """Fecha as sessões e zera circuitos e métricas (usado nos testes)."""
+    with _upstreams_lock:
+        for upstream in _upstreams.values():
+            upstream.session.close()
+        _upstreams.clear()
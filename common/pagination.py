@@ -0,0 +1,217 @@
+import base64
+import binascii
+import datetime
+import json
+from collections import OrderedDict
+
+from decouple import config
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# Tamanho padrão da página e maior valor aceito em ?page_size=
+PAGE_SIZE = config('PAGINATION_PAGE_SIZE', default=20, cast=int)
+MAX_PAGE_SIZE = config('PAGINATION_MAX_PAGE_SIZE', default=100, cast=int)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginação por cursor (keyset) sobre a ordenação completa, desempatada pelo id.
+    Cada página é um "WHERE (created_at, id) < (último da página anterior) LIMIT n", então
+    páginas profundas custam o mesmo que a primeira e nenhum COUNT(*) é feito.
+    - ?cursor=: cursor opaco devolvido em next/previous.
+    - ?page_size=: tamanho da página (até MAX_PAGE_SIZE).
+    - ?count=true: inclui o total de resultados (estimado pelo planner no PostgreSQL).
+    Respeita a ordenação do OrderingFilter da view (ex: ?ordering=price); valores nulos ficam no fim.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = PAGE_SIZE
+    max_page_size = MAX_PAGE_SIZE
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Cursor inválido.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.count = self.get_count(queryset) if self._wants_count(request) else None
+
+        self.nullable = {
+            field.lstrip('-'): self._field_for(queryset, field.lstrip('-')).null for field in self.ordering
+        }
+
+        position, reverse = self.decode_cursor(request, queryset)
+        queryset = queryset.order_by(*self._order_by(reverse))
+        if position is not None:
+            queryset = queryset.filter(self._after(position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        # Andando para frente, existe página anterior se viemos de um cursor (e vice-versa)
+        self.has_next = has_more if not reverse else True
+        self.has_previous = (position is not None) if not reverse else has_more
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        payload = OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+        ])
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_ordering(self, request, queryset, view) -> tuple:
+        ordering = self.ordering
+        for backend in getattr(view, 'filter_backends', []):
+            if hasattr(backend, 'get_ordering'):
+                ordering = backend().get_ordering(request, queryset, view) or ordering
+                break
+        ordering = tuple(ordering)
+        if not {'id', '-id', 'pk', '-pk'} & set(ordering):
+            ordering += ('-id' if ordering[0].startswith('-') else 'id',)
+        return ordering
+
+    def _wants_count(self, request) -> bool:
+        return request.query_params.get(self.count_query_param, '').lower() in ('1', 'true')
+
+    def get_count(self, queryset) -> int:
+        """Total de resultados: estimativa do planner no PostgreSQL (sem varrer a tabela), COUNT nos demais bancos."""
+        queryset = queryset.order_by()
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return queryset.count()
+
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def _directions(self, reverse: bool) -> list:
+        # (campo, decrescente?) já considerando a navegação para trás
+        directions = []
+        for field in self.ordering:
+            descending = field.startswith('-')
+            directions.append((field.lstrip('-'), descending != reverse))
+        return directions
+
+    def _order_by(self, reverse: bool) -> list:
+        # Nulos no fim na ordem normal (e, portanto, no começo ao andar para trás). Colunas NOT NULL ficam
+        # sem NULLS FIRST/LAST, senão o PostgreSQL não usa o índice (created_at DESC, id DESC)
+        order_by = []
+        for field, descending in self._directions(reverse):
+            nulls = {}
+            if self.nullable[field]:
+                nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+            order_by.append(F(field).desc(**nulls) if descending else F(field).asc(**nulls))
+        return order_by
+
+    def _after(self, position: list, reverse: bool) -> Q:
+        """
+        Linhas que vêm depois de position na ordenação: (a > x) OU (a = x E b > y) OU ...
+        Se a primeira coluna é NOT NULL, "a >= x" também é aplicado, dando ao banco uma faixa do índice.
+        """
+        nulls_last = not reverse
+        condition = Q(pk__in=[])
+        equal_so_far = Q()
+        for (field, descending), value in zip(self._directions(reverse), position):
+            lookup = 'lt' if descending else 'gt'
+            if value is None:
+                after = Q(**{f'{field}__isnull': False}) if not nulls_last else Q(pk__in=[])
+                equal = Q(**{f'{field}__isnull': True})
+            else:
+                after = Q(**{f'{field}__{lookup}': value})
+                if nulls_last and self.nullable[field]:
+                    after |= Q(**{f'{field}__isnull': True})
+                equal = Q(**{field: value})
+            condition |= equal_so_far & after
+            equal_so_far &= equal
+
+        (first_field, descending), first_value = self._directions(reverse)[0], position[0]
+        if first_value is not None and not self.nullable[first_field]:
+            condition &= Q(**{f"{first_field}__{'lte' if descending else 'gte'}": first_value})
+        return condition
+
+    def _field_for(self, queryset, name):
+        # Campo do modelo ou anotação (ex: search_rank), para converter o valor vindo do cursor
+        try:
+            return queryset.model._meta.get_field('id' if name == 'pk' else name)
+        except FieldDoesNotExist:
+            return queryset.query.annotations[name].output_field
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            values = data['p']
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            position = [
+                None if value is None else self._field_for(queryset, field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+            return position, bool(data.get('r'))
+        except (TypeError, ValueError, KeyError, binascii.Error, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse: bool) -> str:
+        values = []
+        for field in self.ordering:
+            value = getattr(instance, field.lstrip('-'))
+            if isinstance(value, (datetime.date, datetime.time)):
+                value = value.isoformat()
+            elif value is not None and not isinstance(value, (int, float, str)):
+                value = str(value)
+            values.append(value)
+        data = json.dumps({'p': values, 'r': int(reverse)}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(data.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
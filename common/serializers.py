@@ -0,0 +1,45 @@
+from functools import cache
+
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = 'fields'
+
+
+def parse_fields_param(request, allowed) -> tuple:
+    """
+    Lê o parâmetro ?fields=id,title (sparse fieldset).
+    Retorna:
+        tuple | None: Os campos pedidos, na ordem informada, ou None se o parâmetro não foi enviado.
+    Lança:
+        ValidationError: Se o parâmetro vier vazio ou com campos que não existem.
+    """
+    raw = request.query_params.get(FIELDS_PARAM)
+    if raw is None:
+        return None
+
+    fields = tuple(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in allowed]
+    if not fields or unknown:
+        raise ValidationError({
+            FIELDS_PARAM: f"Campos inválidos: {', '.join(unknown) or '(vazio)'}. Disponíveis: {', '.join(allowed)}."
+        })
+    return fields
+
+
+class SparseFieldsetMixin:
+    """
+    Mantém só os campos passados em context['fields'] (ver parse_fields_param).
+    Vale para o serializer raiz da resposta; serializers aninhados mantêm todos os campos.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    @cache
+    def readable_fields(cls) -> tuple:
+        return tuple(name for name, field in cls().fields.items() if not field.write_only)
@@ -0,0 +1,188 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+import requests
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from common import http_client
+
+
+class FlakyServer:
+    """Servidor local que responde com a sequência de status configurada (depois, sempre 200)."""
+
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.requests = []
+        self.connections = set()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _respond(self):
+                server.requests.append(self.command)
+                server.connections.add(self.client_address)
+                status_code = server.statuses.pop(0) if server.statuses else 200
+                body = b'{"ok": true}'
+                self.send_response(status_code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self._respond()
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                self._respond()
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}/'
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def no_retry_sleep():
+    with patch.object(http_client.time, 'sleep'):
+        yield
+
+
+def host_stats(server):
+    return http_client.latency_histograms()[server.url.rstrip('/')]
+
+
+def test_connections_are_reused():
+    with FlakyServer() as server:
+        for _ in range(5):
+            assert http_client.get(server.url).status_code == 200
+
+    assert len(server.connections) == 1
+
+
+def test_default_timeout_is_applied():
+    with patch.object(requests.Session, 'request') as mock_request:
+        mock_request.return_value.status_code = 200
+        http_client.get('http://example.invalid/')
+
+    assert mock_request.call_args.kwargs['timeout'] == (http_client.CONNECT_TIMEOUT_SECONDS, http_client.READ_TIMEOUT_SECONDS)
+
+
+def test_idempotent_call_is_retried_on_5xx():
+    with FlakyServer(statuses=[503, 502]) as server:
+        response = http_client.get(server.url)
+
+    assert response.status_code == 200
+    assert len(server.requests) == 3
+
+
+def test_post_is_not_retried_by_default():
+    with FlakyServer(statuses=[503]) as server:
+        response = http_client.post(server.url, json={})
+
+    assert response.status_code == 503
+    assert len(server.requests) == 1
+
+
+def test_post_marked_idempotent_is_retried():
+    with FlakyServer(statuses=[503]) as server:
+        response = http_client.post(server.url, json={}, idempotent=True)
+
+    assert response.status_code == 200
+    assert len(server.requests) == 2
+
+
+def test_retries_are_limited():
+    with FlakyServer(statuses=[503] * 10) as server:
+        response = http_client.get(server.url, retries=1)
+
+    assert response.status_code == 503
+    assert len(server.requests) == 2
+
+
+def test_retry_delay_is_jittered_and_capped():
+    delays = [http_client._retry_delay(attempt) for attempt in range(20) for _ in range(20)]
+    assert all(0 <= delay <= http_client.RETRY_BACKOFF_CAP_SECONDS for delay in delays)
+    assert len(set(delays)) > 1
+
+
+def test_circuit_opens_after_consecutive_failures_and_recovers():
+    statuses = [500] * http_client.CIRCUIT_FAILURE_THRESHOLD
+    with FlakyServer(statuses=statuses) as server:
+        for _ in statuses:
+            http_client.post(server.url)
+
+        with pytest.raises(http_client.CircuitOpenError):
+            http_client.get(server.url)
+        assert len(server.requests) == http_client.CIRCUIT_FAILURE_THRESHOLD
+        assert host_stats(server)['circuit_open'] is True
+
+        # Depois do tempo de reset, uma chamada de teste fecha o circuito
+        with patch.object(http_client.time, 'monotonic', return_value=http_client.time.monotonic() + http_client.CIRCUIT_RESET_SECONDS + 1):
+            assert http_client.get(server.url).status_code == 200
+
+        assert host_stats(server)['circuit_open'] is False
+
+
+def test_unexpected_error_during_half_open_trial_releases_the_trial():
+    statuses = [500] * http_client.CIRCUIT_FAILURE_THRESHOLD
+    with FlakyServer(statuses=statuses) as server:
+        for _ in statuses:
+            http_client.post(server.url)
+
+        after_reset = http_client.time.monotonic() + http_client.CIRCUIT_RESET_SECONDS + 1
+        with patch.object(http_client.time, 'monotonic', return_value=after_reset):
+            with patch.object(requests.Session, 'request', side_effect=requests.exceptions.InvalidHeader('cabeçalho inválido')):
+                with pytest.raises(requests.exceptions.InvalidHeader):
+                    http_client.get(server.url)
+
+        # A tentativa de teste falhou: o circuito reabre e, vencido o reset de novo, outra chamada de teste é liberada
+        assert host_stats(server)['circuit_open'] is True
+        with patch.object(http_client.time, 'monotonic', return_value=after_reset + http_client.CIRCUIT_RESET_SECONDS + 1):
+            assert http_client.get(server.url).status_code == 200
+
+
+def test_circuit_open_error_is_a_request_exception():
+    assert issubclass(http_client.CircuitOpenError, requests.exceptions.RequestException)
+
+
+def test_latency_histogram_per_host():
+    with FlakyServer(statuses=[500]) as server:
+        http_client.post(server.url)
+        http_client.get(server.url)
+
+    stats = host_stats(server)
+    assert stats['count'] == 2
+    assert stats['errors'] == 1
+    assert sum(stats['histogram'].values()) == 2
+    assert stats['mean_ms'] is not None
+
+
+@pytest.mark.django_db
+def test_stats_endpoint_is_admin_only():
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username='cliente'))
+    assert client.get(reverse('http-client-stats')).status_code == 403
+
+    with FlakyServer() as server:
+        http_client.get(server.url)
+    client.force_authenticate(User.objects.create_user(username='admin', is_staff=True))
+    response = client.get(reverse('http-client-stats'))
+
+    assert response.status_code == 200
+    assert response.json()[server.url.rstrip('/')]['count'] == 1
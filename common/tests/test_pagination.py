@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from books.models import BookModel
+from common.pagination import KeysetPagination
+from orders.models import OrderModel
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def books():
+    """7 livros ativos; os 3 primeiros com o mesmo created_at (o id desempata)."""
+    now = timezone.now()
+    created = []
+    for number in range(7):
+        book = BookModel.objects.create(title=f'Livro {number}', price=10 + number, is_active=True)
+        moment = now if number < 3 else now + timedelta(minutes=number)
+        BookModel.objects.filter(pk=book.pk).update(created_at=moment)
+        created.append(book)
+    return created
+
+
+def _walk(api_client, url, params=None, link='next'):
+    titles = []
+    response = api_client.get(url, params)
+    while True:
+        assert response.status_code == status.HTTP_200_OK
+        titles.append([item['title'] for item in response.data['results']])
+        if not response.data[link]:
+            return titles, response
+        response = api_client.get(response.data[link])
+
+
+def test_cursor_walks_catalog_in_created_at_id_order(api_client, books):
+    pages, last = _walk(api_client, reverse('book-api-list'), {'page_size': 2})
+
+    assert pages == [
+        ['Livro 6', 'Livro 5'], ['Livro 4', 'Livro 3'], ['Livro 2', 'Livro 1'], ['Livro 0'],
+    ]
+    assert last.data['previous']
+
+    back, _ = _walk(api_client, last.data['previous'], link='previous')
+    assert back == [['Livro 2', 'Livro 1'], ['Livro 4', 'Livro 3'], ['Livro 6', 'Livro 5']]
+
+
+def test_cursor_follows_requested_ordering_with_nulls_last(api_client, books):
+    BookModel.objects.filter(title__in=['Livro 2', 'Livro 5']).update(price=None)
+
+    pages, _ = _walk(api_client, reverse('book-api-list'), {'page_size': 2, 'ordering': '-price'})
+
+    assert sum(pages, []) == ['Livro 6', 'Livro 4', 'Livro 3', 'Livro 1', 'Livro 0', 'Livro 5', 'Livro 2']
+
+
+def test_pages_do_not_count_by_default(api_client, books):
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get(reverse('book-api-list'), {'page_size': 2})
+
+    assert 'count' not in response.data
+    assert not any('COUNT(' in query['sql'].upper() for query in queries)
+
+
+def test_count_is_optional(api_client, books):
+    response = api_client.get(reverse('book-api-list'), {'page_size': 2, 'count': 'true'})
+
+    assert response.data['count'] == 7
+    assert len(response.data['results']) == 2
+
+
+def test_page_size_is_capped(api_client, books, monkeypatch):
+    monkeypatch.setattr(KeysetPagination, 'max_page_size', 3)
+
+    response = api_client.get(reverse('book-api-list'), {'page_size': 1000})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data['results']) == 3
+
+
+def test_invalid_cursor_returns_404(api_client, books):
+    response = api_client.get(reverse('book-api-list'), {'cursor': 'nao-e-um-cursor'})
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_orders_are_paginated_by_cursor(api_client):
+    user = User.objects.create_user(username='buyer', password='password123')
+    orders = [OrderModel.objects.create(user=user, total_items_price=10, shipping_cost=5) for _ in range(3)]
+    api_client.force_authenticate(user=user)
+
+    response = api_client.get(reverse('order-api-list'), {'page_size': 2})
+
+    assert [item['id'] for item in response.data['results']] == [orders[2].pk, orders[1].pk]
+    response = api_client.get(response.data['next'])
+    assert [item['id'] for item in response.data['results']] == [orders[0].pk]
+    assert response.data['next'] is None
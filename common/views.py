@@ -0,0 +1,13 @@
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from common import http_client
+
+
+class HttpClientStatsView(APIView):
+    """Latência (histograma), erros e estado do circuito de cada API externa chamada por este processo."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(http_client.latency_histograms(), status=status.HTTP_200_OK)
@@ -0,0 +1,48 @@
+import pytest
+from django.core.cache import cache
+
+from addresses.services.cep_lookup import clear_cep_cache
+from books.services.autocomplete import clear_autocomplete_index
+from books.services.google_books_cache import clear_memory_cache
+from books.services.name_resolver import clear_name_cache
+from common import http_client
+from users.services.token_cache import clear_token_cache
+from users.services.user_resolution import clear_user_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Limpa o cache (e os caches em memória de CEPs, tokens, usuários, nomes de autores/categorias e o índice do autocomplete) antes de cada teste,
+    para que dados cacheados por um teste não vazem para o próximo.
+    """
+    cache.clear()
+    clear_cep_cache()
+    clear_token_cache()
+    clear_user_cache()
+    clear_autocomplete_index()
+    clear_name_cache()
+    yield
+    cache.clear()
+    clear_cep_cache()
+    clear_token_cache()
+    clear_user_cache()
+    clear_autocomplete_index()
+    clear_name_cache()
+
+
+@pytest.fixture(autouse=True)
+def reset_http_client():
+    """Cada teste começa com pools, circuitos e métricas do cliente HTTP zerados."""
+    http_client.reset()
+    yield
+    http_client.reset()
+
+
+@pytest.fixture(autouse=True)
+def google_books_cache(settings, tmp_path):
+    """As respostas do Google Books são cacheadas em um diretório temporário de cada teste, nunca no do projeto."""
+    settings.GOOGLE_BOOKS_CACHE_DIR = str(tmp_path / 'google_books_cache')
+    clear_memory_cache()
+    yield
+    clear_memory_cache()
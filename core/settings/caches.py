@@ -0,0 +1,13 @@
+from decouple import config
+from .environment import BASE_DIR
+
+# Em produção aponte para um cache compartilhado entre os workers (ex: Redis/Memcached)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='bookstore-default'),
+    }
+}
+
+# Respostas da API do Google Books guardadas em disco (JSON por volume/busca); vazio desliga o cache em disco
+GOOGLE_BOOKS_CACHE_DIR = config('GOOGLE_BOOKS_CACHE_DIR', default=str(BASE_DIR / 'var' / 'google_books_cache'))
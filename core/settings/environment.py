@@ -18,6 +18,11 @@ STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY')
 stripe.api_key = STRIPE_SECRET_KEY
 STRIPE_PUBLISHABLE_KEY = config('STRIPE_PUBLISHABLE_KEY')
 
+# Idempotency-Key do checkout (horas até a chave expirar e poder ser removida)
+IDEMPOTENCY_KEY_TTL_HOURS = config('IDEMPOTENCY_KEY_TTL_HOURS', default=24, cast=int)
+# Segundos que uma requisição em andamento segura a chave; depois disso outra tentativa pode reassumi-la
+IDEMPOTENCY_LOCK_SECONDS = config('IDEMPOTENCY_LOCK_SECONDS', default=120, cast=int)
+
 
 
 # SECURITY WARNING: don't run with debug turned on in production!
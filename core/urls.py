@@ -8,6 +8,7 @@ from users.views import UserViewSet
 from addresses.views import AddressViewset
 from books.views import BookViewSetAPI
 from orders.views import OrderViewSet
+from common.views import HttpClientStatsView
 
 router = SimpleRouter()
 router.register('users', UserViewSet, basename='user-api')
@@ -20,6 +21,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/v1/', include(router.urls)),
     path('api/v1/', include('orders.urls')),
+    path('api/v1/http-client/stats/', HttpClientStatsView.as_view(), name='http-client-stats'),
 ]
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
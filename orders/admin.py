@@ -1,5 +1,6 @@
-from django.contrib import admin
-from .models import OrderItemModel, OrderModel
+from django.contrib import admin, messages
+from .models import OrderItemModel, OrderModel, ShippingLabelJobModel
+from .services.shipping_label_queue import enqueue_shipping_labels
 # Register your models here.
 
 
@@ -30,6 +31,7 @@ class OrderAdmin(admin.ModelAdmin):
     ]
     list_per_page = 10
     ordering = ['-created_at']
+    actions = ['generate_shipping_labels']
     
 
 
@@ -51,6 +53,13 @@ class OrderAdmin(admin.ModelAdmin):
         return obj.address.zip_code
     address_zip_code.short_description = 'CEP'
 
+    @admin.action(description='Gerar etiquetas de envio (em lote)')
+    def generate_shipping_labels(self, request, queryset):
+        jobs, rejected = enqueue_shipping_labels(queryset)
+        self.message_user(request, f'{len(jobs)} etiquetas agendadas para geração em lote.', messages.SUCCESS)
+        if rejected:
+            self.message_user(request, f'{len(rejected)} pedidos ignorados (não estão PROCESSING ou sem serviço de frete).', messages.WARNING)
+
 
 
 @admin.register(OrderItemModel)
@@ -82,4 +91,26 @@ class OrderItemAdmin(admin.ModelAdmin):
 
     def order_id(self, obj):
         return obj.order.id
-    order_id.short_description = 'Id-Order'
\ No newline at end of file
+    order_id.short_description = 'Id-Order'
+
+
+@admin.register(ShippingLabelJobModel)
+class ShippingLabelJobAdmin(admin.ModelAdmin):
+    list_display = [
+        'id',
+        'order',
+        'status',
+        'attempts',
+        'next_run_at',
+        'last_error',
+        'updated_at'
+    ]
+    search_fields = [
+        'order__id', 'order__melhor_envio_order_id'
+    ]
+    list_filter = [
+        'status',
+    ]
+    list_per_page = 20
+    ordering = ['-created_at']
+    list_select_related = ['order']
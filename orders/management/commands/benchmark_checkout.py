@@ -0,0 +1,105 @@
+import threading
+import time
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+
+import stripe
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from addresses.models import AddressModel
+from books.models import BookModel
+from orders.models import OrderModel
+from orders.services.stripe_service import create_order_from_cart
+
+User = get_user_model()
+
+
+class FakeStripe:
+    """
+    Substitui stripe.PaymentIntent.create durante o benchmark, simulando
+    apenas a latencia de rede do Stripe (sempre aprova o pagamento).
+    """
+
+    def __init__(self, latency_ms: int):
+        self.latency = latency_ms / 1000
+
+    def create(self, **kwargs):
+        time.sleep(self.latency)
+        return SimpleNamespace(id=f'pi_bench_{uuid.uuid4().hex}', status='succeeded')
+
+    def __enter__(self):
+        self._original = stripe.PaymentIntent.create
+        stripe.PaymentIntent.create = self.create
+        return self
+
+    def __exit__(self, *exc):
+        stripe.PaymentIntent.create = self._original
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks checkout throughput on a single hot book as (fake) Stripe latency goes up. Writes temporary rows to the database and removes them at the end.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--latencies', type=int, nargs='+', default=[0, 50, 200, 500], help='Fake Stripe latencies to test, in milliseconds.')
+        parser.add_argument('--workers', type=int, default=16, help='Number of concurrent checkout threads.')
+        parser.add_argument('--checkouts', type=int, default=200, help='Number of checkouts per latency.')
+
+    def handle(self, *args, **options):
+        latencies = options['latencies']
+        workers = options['workers']
+        checkouts = options['checkouts']
+
+        user = User.objects.create_user(username=f'benchmark-checkout-{uuid.uuid4().hex[:8]}')
+        address = AddressModel.objects.create(user=user, zip_code='01001000', street='Praça da Sé', number='1', neighborhood='Sé', city='São Paulo', state='SP')
+        book = BookModel.objects.create(title='Benchmark Hot Book', price=Decimal('10.00'), stock=checkouts * len(latencies))
+
+        try:
+            self.stdout.write(f'{"stripe latency":>15} | {"orders/s":>9} | {"p50 ms":>8} | {"p95 ms":>8}')
+            for latency_ms in latencies:
+                with FakeStripe(latency_ms):
+                    throughput, p50, p95 = self._run(user, address, book, workers, checkouts)
+                self.stdout.write(f'{latency_ms:>12} ms | {throughput:>9.1f} | {p50:>8.1f} | {p95:>8.1f}')
+        finally:
+            OrderModel.objects.filter(user=user).delete()
+            book.delete()
+            user.delete()
+
+    def _run(self, user, address, book, workers, checkouts):
+        cart = {
+            'items': {str(book.pk): {'quantity': 1, 'price': str(book.price), 'title': book.title}},
+            'shipping_option': {'name': 'PAC', 'price': '10.00'},
+        }
+        validated_data = {'address_id': address, 'payment_method_id': 'pm_card_visa'}
+        remaining = iter(range(checkouts))
+        lock = threading.Lock()
+        timings = []
+
+        def worker():
+            try:
+                while True:
+                    with lock:
+                        if next(remaining, None) is None:
+                            return
+                    started = time.perf_counter()
+                    create_order_from_cart(user=user, cart=cart, validated_data=validated_data)
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        timings.append(elapsed * 1000)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        total = time.perf_counter() - started
+
+        timings.sort()
+        p50 = timings[len(timings) // 2] if timings else 0
+        p95 = timings[int(len(timings) * 0.95) - 1] if timings else 0
+        return len(timings) / total, p50, p95
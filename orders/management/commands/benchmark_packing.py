@@ -0,0 +1,65 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from orders.services.packing import _book_composition, _pack_composition, pack_shipping_items
+from orders.services.shipping_items import ShippingItem
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the parcel packing engine on random carts (no database access).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=50, help='Number of books (units) in each cart.')
+        parser.add_argument('--runs', type=int, default=2000, help='Number of carts packed in each mode.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        carts = [self._random_cart(rng, options['books']) for _ in range(options['runs'])]
+
+        # Sem cache: empacota a composição diretamente
+        compositions = [tuple(sorted(_book_composition(book, quantity) for book, quantity in cart)) for cart in carts]
+        uncached = self._measure(lambda i: _pack_composition.__wrapped__(compositions[i]), len(carts))
+
+        # Caminho real (monta a composição e consulta o cache), com o cache já aquecido
+        for cart in carts:
+            pack_shipping_items(cart)
+        cached = self._measure(lambda i: pack_shipping_items(carts[i]), len(carts))
+
+        volumes = [len(_pack_composition.__wrapped__(composition)) for composition in compositions]
+        self.stdout.write(f"{options['books']} books per cart, {len(carts)} carts, {statistics.mean(volumes):.2f} volumes on average")
+        for mode, timings in (('uncached', uncached), ('cached', cached)):
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            self.stdout.write(
+                f'{mode:>9}: mean {statistics.mean(timings) * 1000:.3f}ms, '
+                f'p50 {statistics.median(timings) * 1000:.3f}ms, p95 {p95 * 1000:.3f}ms'
+            )
+
+    def _random_cart(self, rng, books):
+        cart = []
+        remaining = books
+        while remaining:
+            quantity = min(remaining, rng.randint(1, 3))
+            remaining -= quantity
+            book = SimpleNamespace(
+                height_cm=Decimal(rng.choice(['18', '21', '23', '28'])),
+                width_cm=Decimal(rng.choice(['12', '14', '16', '21'])),
+                length_cm=Decimal(rng.randint(5, 60)) / 10,
+                weight_g=Decimal(rng.randint(150, 1200)),
+            )
+            cart.append(ShippingItem(book, quantity))
+        return cart
+
+    def _measure(self, pack, count):
+        timings = []
+        for i in range(count):
+            started = time.perf_counter()
+            pack(i)
+            timings.append(time.perf_counter() - started)
+        return timings
@@ -0,0 +1,87 @@
+import os
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from addresses.models import AddressModel
+from books.models import BookModel
+from orders.models import OrderModel, OrderItemModel, ShippingLabelJobModel
+from orders.services.melhor_envio_stub import MelhorEnvioStubServer
+from orders.services.shipping_label_queue import enqueue_shipping_labels, run_pending_jobs
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks shipping label generation one order at a time vs. in batches, against a local Melhor Envio stub. Writes temporary rows to the database and removes them at the end.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=100, help='Number of orders to ship in each mode.')
+        parser.add_argument('--latency-ms', type=int, default=100, help='Artificial latency of every Melhor Envio call.')
+
+    def handle(self, *args, **options):
+        if ShippingLabelJobModel.objects.filter(status__in=ShippingLabelJobModel.ACTIVE_STATUSES).exists():
+            raise CommandError('There are active shipping label jobs in this database; refusing to run the benchmark.')
+
+        count = options['orders']
+        original_url = os.environ.get('ME_SANDBOX_URL')
+
+        user = User.objects.create_user(username=f'benchmark-labels-{uuid.uuid4().hex[:8]}', first_name='Benchmark')
+        user.profile.cpf = '529.982.247-25'
+        user.profile.phone_number = '+5548999998888'
+        user.profile.save()
+        address = AddressModel.objects.create(user=user, zip_code='01001000', street='Praça da Sé', number='1', neighborhood='Sé', city='São Paulo', state='SP')
+        book = BookModel.objects.create(title='Benchmark Label Book', price=Decimal('10.00'), weight_g=Decimal('300'))
+
+        try:
+            with MelhorEnvioStubServer(latency=options['latency_ms'] / 1000) as stub:
+                os.environ['ME_SANDBOX_URL'] = stub.url
+
+                for mode, batch_size in (('one by one', 1), ('batch', count)):
+                    orders = self._create_orders(user, address, book, count)
+                    enqueue_shipping_labels(orders)
+                    calls_before = len(stub.requests)
+
+                    elapsed = self._drain(batch_size)
+
+                    shipped = OrderModel.objects.filter(pk__in=[o.pk for o in orders], status=OrderModel.OrderStatus.SHIPPED).count()
+                    self.stdout.write(
+                        f'{mode:>10}: {shipped}/{count} shipped in {elapsed:.2f}s '
+                        f'({len(stub.requests) - calls_before} Melhor Envio calls)'
+                    )
+        finally:
+            if original_url is None:
+                os.environ.pop('ME_SANDBOX_URL', None)
+            else:
+                os.environ['ME_SANDBOX_URL'] = original_url
+            OrderModel.objects.filter(user=user).delete()
+            book.delete()
+            user.delete()
+
+    def _create_orders(self, user, address, book, count):
+        orders = OrderModel.objects.bulk_create([
+            OrderModel(
+                user=user, address=address, status=OrderModel.OrderStatus.PROCESSING,
+                total_items_price=book.price, shipping_cost=Decimal('10.00'), shipping_service_id=1
+            ) for _ in range(count)
+        ])
+        OrderItemModel.objects.bulk_create([
+            OrderItemModel(order=order, book=book, book_title_snapshot=book.title, quantity=1, price_at_purchase=book.price)
+            for order in orders
+        ])
+        return orders
+
+    def _drain(self, batch_size):
+        active = ShippingLabelJobModel.objects.filter(status__in=ShippingLabelJobModel.ACTIVE_STATUSES)
+        started = time.perf_counter()
+        while active.exists():
+            # Ignora o backoff entre consultas: o benchmark mede só o custo das chamadas
+            active.update(next_run_at=timezone.now() - timedelta(seconds=1))
+            while run_pending_jobs(limit=batch_size):
+                pass
+        return time.perf_counter() - started
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from orders.services.stripe_service import PENDING_PAYMENT_TIMEOUT_MINUTES, expire_pending_orders
+
+
+class Command(BaseCommand):
+    help = 'Releases the stock of orders stuck in PENDING_PAYMENT and confirms the ones already charged'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--timeout-minutes', type=int, default=PENDING_PAYMENT_TIMEOUT_MINUTES,
+            help='Minutes an order may stay in PENDING_PAYMENT before it is resolved.'
+        )
+
+    def handle(self, *args, **options):
+        expired, reconciled = expire_pending_orders(timeout_minutes=options['timeout_minutes'])
+        self.stdout.write(self.style.SUCCESS(f'Expired {expired} pending orders, confirmed {reconciled} already charged.'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from orders.services.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired checkout Idempotency-Keys in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Number of keys deleted per DELETE statement.')
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_keys(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired idempotency keys.'))
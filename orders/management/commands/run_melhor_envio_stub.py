@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand
+from orders.services.melhor_envio_stub import MelhorEnvioStubServer
+
+
+class Command(BaseCommand):
+    help = 'Runs a local stand-in for the Melhor Envio API (point ME_SANDBOX_URL at it) for offline tests and benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', type=str, default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8025)
+        parser.add_argument('--latency-ms', type=int, default=0, help='Artificial latency added to every request.')
+        parser.add_argument('--tracking-after-polls', type=int, default=0, help='Tracking polls answered without a code before it appears.')
+
+    def handle(self, *args, **options):
+        stub = MelhorEnvioStubServer(
+            host=options['host'],
+            port=options['port'],
+            latency=options['latency_ms'] / 1000,
+            tracking_after_polls=options['tracking_after_polls'],
+        )
+        with stub:
+            self.stdout.write(self.style.SUCCESS(f'Melhor Envio stub listening on {stub.url}'))
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                self.stdout.write(self.style.WARNING('Melhor Envio stub stopped.'))
@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand
+from orders.services.shipping_label_queue import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = 'Processes queued shipping label jobs (Melhor Envio) in the background'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process the currently due jobs and exit.')
+        parser.add_argument('--batch-size', type=int, default=10, help='Maximum number of jobs claimed per iteration.')
+        parser.add_argument('--idle-sleep', type=float, default=1.0, help='Seconds to wait when there are no due jobs.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        if options['once']:
+            processed = run_pending_jobs(limit=batch_size)
+            self.stdout.write(self.style.SUCCESS(f'Processed {processed} shipping label jobs.'))
+            return
+
+        self.stdout.write(self.style.SUCCESS('Shipping label worker started.'))
+        try:
+            while True:
+                if not run_pending_jobs(limit=batch_size):
+                    time.sleep(options['idle_sleep'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Shipping label worker stopped.'))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:09
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_idempotencykeymodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShippingLabelJobModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Na Fila'), ('WAITING_TRACKING', 'Aguardando Rastreio'), ('DONE', 'Concluido'), ('FAILED', 'Falhou')], default='PENDING', max_length=20, verbose_name='Status do Job')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Tentativas')),
+                ('next_run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Proxima Execução')),
+                ('locked_until', models.DateTimeField(blank=True, null=True, verbose_name='Reservado pelo worker até')),
+                ('last_error', models.TextField(blank=True, verbose_name='Ultimo Erro')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shipping_label_jobs', to='orders.ordermodel', verbose_name='Pedido')),
+            ],
+            options={
+                'verbose_name': 'Job de Etiqueta',
+                'verbose_name_plural': 'Jobs de Etiquetas',
+                'ordering': ['next_run_at'],
+                'indexes': [models.Index(fields=['status', 'next_run_at'], name='orders_ship_status_4bdd08_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['PENDING', 'WAITING_TRACKING'])), fields=('order',), name='unique_active_shipping_label_job')],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('addresses', '0002_cepmodel'),
+        ('orders', '0010_shippinglabeljobmodel'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ordermodel',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='orders_user_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0011_user_created_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shippinglabeljobmodel',
+            name='generated_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Etiqueta Solicitada em'),
+        ),
+        migrations.AddField(
+            model_name='shippinglabeljobmodel',
+            name='purchased_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Frete Pago em'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0012_shippinglabeljobmodel_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencykeymodel',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Reservada até'),
+        ),
+    ]
@@ -1,2 +1,4 @@
 from .order_model import OrderModel
-from .order_item_model import OrderItemModel
\ No newline at end of file
+from .order_item_model import OrderItemModel
+from .idempotency_key_model import IdempotencyKeyModel
+from .shipping_label_job_model import ShippingLabelJobModel
\ No newline at end of file
@@ -0,0 +1,68 @@
+from django.db import models
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from .order_model import Base, OrderModel
+
+
+class IdempotencyKeyModel(Base):
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='idempotency_keys',
+        verbose_name='Usuario'
+    )
+    key = models.CharField(
+        max_length=255,
+        verbose_name='Idempotency-Key'
+    )
+    request_hash = models.CharField(
+        max_length=64,
+        verbose_name='Hash da Requisição'
+    )
+    order = models.ForeignKey(
+        OrderModel,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='idempotency_keys',
+        verbose_name='Pedido'
+    )
+
+    # Resposta armazenada (vazia enquanto a requisição original ainda está em andamento)
+    response_status = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Status HTTP da Resposta'
+    )
+    response_body = models.JSONField(
+        null=True,
+        blank=True,
+        encoder=DjangoJSONEncoder,
+        verbose_name='Corpo da Resposta'
+    )
+    expires_at = models.DateTimeField(
+        verbose_name='Expira em'
+    )
+    # Lease da requisição em andamento: vencido, a chave pode ser reassumida por uma nova tentativa
+    locked_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Reservada até'
+    )
+
+    class Meta:
+        verbose_name = 'Chave de Idempotência'
+        verbose_name_plural = 'Chaves de Idempotência'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key_per_user'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.key} - {self.user_id}'
+
+    @property
+    def is_completed(self):
+        return self.response_status is not None
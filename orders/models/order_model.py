@@ -87,6 +87,10 @@ class OrderModel(Base):
         ordering = ['-created_at']
         verbose_name = 'Pedido'
         verbose_name_plural = 'Pedidos'
+        indexes = [
+            # Paginação por cursor dos pedidos do usuário
+            models.Index(fields=['user', '-created_at', '-id'], name='orders_user_created_id_idx'),
+        ]
 
     def __str__(self):
         return f"Pedido {self.id} - {self.user.username if self.user else 'Usuário Removido'}"
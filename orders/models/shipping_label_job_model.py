@@ -0,0 +1,72 @@
+from django.db import models
+from django.utils import timezone
+from .order_model import Base, OrderModel
+
+
+class ShippingLabelJobModel(Base):
+    class JobStatus(models.TextChoices):
+        PENDING = 'PENDING', 'Na Fila'
+        WAITING_TRACKING = 'WAITING_TRACKING', 'Aguardando Rastreio'
+        DONE = 'DONE', 'Concluido'
+        FAILED = 'FAILED', 'Falhou'
+
+    ACTIVE_STATUSES = [JobStatus.PENDING, JobStatus.WAITING_TRACKING]
+
+    order = models.ForeignKey(
+        OrderModel,
+        on_delete=models.CASCADE,
+        related_name='shipping_label_jobs',
+        verbose_name='Pedido'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=JobStatus.choices,
+        default=JobStatus.PENDING,
+        verbose_name='Status do Job'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Tentativas'
+    )
+    next_run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Proxima Execução'
+    )
+    locked_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Reservado pelo worker até'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Ultimo Erro'
+    )
+    # Etapas já concluídas no Melhor Envio: uma nova tentativa refaz só a que falhou (o checkout cobra o frete)
+    purchased_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Frete Pago em'
+    )
+    generated_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Etiqueta Solicitada em'
+    )
+
+    class Meta:
+        ordering = ['next_run_at']
+        verbose_name = 'Job de Etiqueta'
+        verbose_name_plural = 'Jobs de Etiquetas'
+        indexes = [
+            models.Index(fields=['status', 'next_run_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['order'],
+                condition=models.Q(status__in=['PENDING', 'WAITING_TRACKING']),
+                name='unique_active_shipping_label_job'
+            ),
+        ]
+
+    def __str__(self):
+        return f'Etiqueta do Pedido #{self.order_id} - {self.get_status_display()}'
@@ -0,0 +1,139 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from orders.models import IdempotencyKeyModel
+
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+
+class IdempotencyConflict(Exception):
+    """A chave já foi usada com um corpo de requisição diferente."""
+
+
+class IdempotencyInProgress(Exception):
+    """A requisição original com esta chave ainda não terminou."""
+
+
+def hash_request(data) -> str:
+    payload = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _lock_expiry():
+    return timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+
+
+def get_stored_response(user, key: str, request_hash: str):
+    """
+    Busca (pelo indice unico user+key) uma resposta já armazenada para esta chave.
+    Retorna:
+        IdempotencyKeyModel | None: O registro concluído, ou None se a chave ainda não foi usada,
+        expirou ou ficou presa em uma requisição abandonada (lease vencido).
+    Lança:
+        IdempotencyConflict: Se a chave foi usada com outro corpo de requisição.
+        IdempotencyInProgress: Se a requisição original ainda está em andamento.
+    """
+    record = IdempotencyKeyModel.objects.filter(user=user, key=key).first()
+    if record is None:
+        return None
+
+    now = timezone.now()
+    if record.expires_at <= now:
+        record.delete()
+        return None
+
+    if record.request_hash != request_hash:
+        raise IdempotencyConflict('Esta Idempotency-Key já foi usada com outra requisição.')
+    if not record.is_completed:
+        if record.locked_until is not None and record.locked_until <= now:
+            return None
+        raise IdempotencyInProgress('Uma requisição com esta Idempotency-Key ainda está em processamento.')
+    return record
+
+
+def stripe_idempotency_key(record: IdempotencyKeyModel) -> str:
+    """Chave repassada ao Stripe, isolada por usuário (as chaves do Stripe valem para a conta inteira)."""
+    digest = hashlib.sha256(f'{record.user_id}:{record.key}'.encode()).hexdigest()
+    return f'checkout-{digest}'
+
+
+def claim_key(user, key: str, request_hash: str):
+    """
+    Reserva a chave antes de executar o checkout. O indice unico garante que,
+    entre requisições concorrentes com a mesma chave, apenas uma siga adiante.
+    Uma chave em andamento cujo lease (locked_until) venceu é reassumida por esta requisição.
+    Retorna:
+        tuple[IdempotencyKeyModel, bool]: O registro e se ele foi reservado agora.
+    Lança:
+        IdempotencyConflict: Se a chave foi usada com outro corpo de requisição.
+        IdempotencyInProgress: Se outra requisição segura a chave.
+    """
+    # Duas tentativas: o registro que barrou o INSERT pode sumir (expirou, foi liberado) antes da leitura
+    for _ in range(2):
+        expires_at = timezone.now() + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+        try:
+            with transaction.atomic():
+                record = IdempotencyKeyModel.objects.create(
+                    user=user,
+                    key=key,
+                    request_hash=request_hash,
+                    expires_at=expires_at,
+                    locked_until=_lock_expiry()
+                )
+            return record, True
+        except IntegrityError:
+            pass
+
+        # UPDATE condicional: entre tentativas concorrentes, só uma reassume a chave abandonada
+        reclaimed = IdempotencyKeyModel.objects.filter(
+            user=user,
+            key=key,
+            request_hash=request_hash,
+            response_status__isnull=True,
+            locked_until__lte=timezone.now()
+        ).update(locked_until=_lock_expiry(), expires_at=expires_at)
+        if reclaimed:
+            return IdempotencyKeyModel.objects.get(user=user, key=key), True
+
+        record = get_stored_response(user, key, request_hash)
+        if record is not None:
+            return record, False
+
+    raise IdempotencyInProgress('Uma requisição com esta Idempotency-Key ainda está em processamento.')
+
+
+def store_response(record: IdempotencyKeyModel, response_status: int, response_body, order=None) -> None:
+    record.response_status = response_status
+    record.response_body = response_body
+    record.order = order
+    record.locked_until = None
+    record.save(update_fields=['response_status', 'response_body', 'order', 'locked_until', 'updated_at'])
+
+
+def release_key(record: IdempotencyKeyModel) -> None:
+    """Libera a chave após uma falha transitória, para que o cliente possa repetir a requisição com ela."""
+    IdempotencyKeyModel.objects.filter(pk=record.pk, response_status__isnull=True).delete()
+
+
+def purge_expired_keys(batch_size: int = 5000) -> int:
+    """
+    Remove as chaves expiradas em lotes (um DELETE por lote, usando o indice de expires_at).
+    Retorna:
+        int: Quantidade de chaves removidas.
+    """
+    now = timezone.now()
+    total = 0
+    while True:
+        batch = list(
+            IdempotencyKeyModel.objects.filter(expires_at__lte=now).values_list('pk', flat=True)[:batch_size]
+        )
+        if not batch:
+            return total
+        deleted, _ = IdempotencyKeyModel.objects.filter(pk__in=batch).delete()
+        total += deleted
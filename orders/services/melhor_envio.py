@@ -1,50 +1,71 @@
-import time
+import logging
 import requests
-import json
 from decouple import config
 from decimal import Decimal
+
+from common import http_client
 from orders.models import OrderModel
+from orders.services.packing import pack_shipping_items
+from orders.services.shipping_items import load_shipping_items, total_weight_kg
+from orders.services.shipping_quote_cache import bucket_weight_kg, get_or_fetch_quote
 
-DEFAULT_PACKAGE_DIMENSIONS = {
-    "width": 16,
-    "height": 23,
-    "length": 5,
-}
+logger = logging.getLogger(__name__)
 
+# Timeout (conexão, leitura) da cotação de frete, chamada de forma síncrona na requisição do usuário
+QUOTE_TIMEOUT_SECONDS = (3, 10)
 
-from books.models.book_model import BookModel
 
 def calculate_total_weight(cart_items: list) -> Decimal:
-    total_weight_grams = Decimal('0')
-    for item in cart_items:
-        if isinstance(item, dict):
-            # Chamada a partir de calculate_shipping_with_melhor_envio
-            book = BookModel.objects.get(pk=item['book_id'])
-            quantity = item['quantity']
-        else:
-            # Chamada a partir de generate_shipping_label_service (objetos OrderItemModel)
-            book = item.book
-            quantity = item.quantity
-
-        if book and book.weight_g:
-            total_weight_grams += book.weight_g * quantity
-    return total_weight_grams / 1000 
+    """Peso total (kg) de itens do carrinho ou do pedido, com uma única query de livros."""
+    return total_weight_kg(load_shipping_items(cart_items))
+
+
+def _request_shipping_quote(payload: dict, zip_code: str) -> list:
+    api_url = f"{config('ME_SANDBOX_URL')}/api/v2/me/shipment/calculate"
+
+    response = http_client.post(
+        api_url, json=payload, headers=_melhor_envio_headers(), timeout=QUOTE_TIMEOUT_SECONDS, idempotent=True
+    )
+    response.raise_for_status()
+    data = response.json()
+
+    shipping_options = [opt for opt in data if 'error' not in opt]
+    if not shipping_options:
+        raise ValueError(f"Nenhuma opção de frete encontrada para este CEP - {zip_code}")
+    return shipping_options
+
+
+def _pack_for_shipping(cart_items) -> tuple:
+    volumes = pack_shipping_items(load_shipping_items(cart_items))
+    if not volumes:
+        raise ValueError('O carrinho esta vazio')
+    return volumes
+
+
+def build_quote_package(volumes: tuple) -> dict:
+    """
+    Monta a parte do payload de cotação que descreve a encomenda. O peso de cada volume
+    é arredondado para a faixa do cache de cotações.
+    Um volume vai como "package"; vários vão como "products" (um por volume já empacotado).
+    """
+    packages = [{**volume.as_payload(), "weight": bucket_weight_kg(volume.weight_kg)} for volume in volumes]
+    if len(packages) == 1:
+        return {"package": packages[0]}
+    return {
+        "products": [
+            {"id": str(index), **package, "insurance_value": 0, "quantity": 1}
+            for index, package in enumerate(packages, start=1)
+        ]
+    }
 
 
 def calculate_shipping_with_melhor_envio(cart: dict, zip_code: str) -> list:
-    base_url = config('ME_SANDBOX_URL')
-    api_url = f'{base_url}/api/v2/me/shipment/calculate'
-    token = config('ME_ACCESS_TOKEN')
-
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {token}",
-        "User-Agent": "Bookstore API - Projeto Pessoal (rafaelmuniz200@gmail.com)"
-        }
-
     items_to_calculate = [{**item_data, 'book_id': key} for key, item_data in cart.items() if key != 'shipping_option']
-    total_weigth_kg = float(calculate_total_weight(items_to_calculate))
+
+    try:
+        volumes = _pack_for_shipping(items_to_calculate)
+    except Exception as e:
+        raise Exception(f'Erro ao calcular Frete: {e}')
 
     payload = {
         "from": {
@@ -53,21 +74,11 @@ def calculate_shipping_with_melhor_envio(cart: dict, zip_code: str) -> list:
         "to": {
             "postal_code": str(zip_code)
         },
-        "package": {
-            "weight": float(total_weigth_kg),
-            **DEFAULT_PACKAGE_DIMENSIONS,
-        }
+        **build_quote_package(volumes),
     }
 
     try:
-        response = requests.post(api_url, json=payload, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-
-        shipping_options = [opt for opt in data if 'error' not in opt]
-        if not shipping_options:
-            raise ValueError(f"Nenhuma opção de frete encontrada para este CEP - {zip_code}")
-        return shipping_options
+        return get_or_fetch_quote(payload, lambda: _request_shipping_quote(payload, zip_code))
 
     except requests.RequestException as e:
         raise Exception(f'Falha na requisição da API Melhor Envio: {e}')
@@ -75,25 +86,58 @@ def calculate_shipping_with_melhor_envio(cart: dict, zip_code: str) -> list:
         raise Exception(f'Erro ao calcular Frete: {e}')
     
 
-def generate_shipping_label_service(order: OrderModel):
-    if not order.shipping_service_id:
-        raise ValueError(
-            'O pedido deve conter um servico de frete selecionado'
-        )
-    
-    base_url = config('ME_SANDBOX_URL')
-    cart_url = f'{base_url}/api/v2/me/cart'
-    generate_url = f'{base_url}/api/v2/me/shipment/generate'
+def _melhor_envio_headers() -> dict:
     token = config('ME_ACCESS_TOKEN')
-
-    headers = {
+    return {
         "Accept": "application/json",
         "Content-Type": "application/json",
         "Authorization": f"Bearer {token}",
         "User-Agent": "Bookstore API - Projeto Pessoal (rafaelmuniz200@gmail.com)"
         }
-    
-    cart_payload = {
+
+
+class MelhorEnvioError(Exception):
+    """Erro retornado pela API do Melhor Envio; status_code é o status HTTP da resposta."""
+
+    def __init__(self, message: str, status_code: int = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+    @property
+    def is_rejection(self) -> bool:
+        # 4xx (ex: 422): a API recusou os dados enviados; repetir a mesma chamada não adianta
+        return self.status_code is not None and 400 <= self.status_code < 500 and self.status_code != 429
+
+
+def _raise_melhor_envio_error(e: requests.exceptions.HTTPError):
+    response = e.response
+    try:
+        body = response.json()
+    except ValueError:
+        # Proxy/gateway na frente da API (ex: 502 em HTML): o corpo não é JSON
+        body = None
+    logger.warning(
+        'Erro do Melhor Envio (status %s): %s', response.status_code, body if body is not None else response.text
+    )
+
+    if isinstance(body, dict):
+        error_details = body.get('errors', str(e))
+    else:
+        error_details = response.text or str(e)
+    raise MelhorEnvioError(f"Erro de validação do Melhor Envio: {error_details}", response.status_code)
+
+
+def build_label_cart_payload(order: OrderModel) -> dict:
+    if not order.shipping_service_id:
+        raise ValueError(
+            'O pedido deve conter um servico de frete selecionado'
+        )
+
+    order_items = list(order.items.all())
+    shipping_items = load_shipping_items(order_items)
+    volumes = pack_shipping_items(shipping_items)
+
+    return {
         "service": order.shipping_service_id,
         "from": { 
             "name": "Book Store",
@@ -121,63 +165,85 @@ def generate_shipping_label_service(order: OrderModel):
         },
         "products": [ 
             {
-                "name": item.book.title,
+                "name": item.book_title_snapshot or (shipping_item.book.title if shipping_item.book else ''),
                 "quantity": item.quantity,
                 "unitary_value": float(item.price_at_purchase)
-            } for item in order.items.all()
+            } for item, shipping_item in zip(order_items, shipping_items)
         ],
-        "volumes": [
-            {
-                "weight": float(calculate_total_weight(order.items.all())),
-                **DEFAULT_PACKAGE_DIMENSIONS
-            }
-        ]
+        "volumes": [volume.as_payload() for volume in volumes]
     }
-    print("="*50)
-    print("PAYLOAD ENVIADO PARA O MELHOR ENVIO:")
-    print(json.dumps(cart_payload, indent=2))
-    print("="*50)
+
+
+def post_label_cart(cart_payload: dict) -> str:
+    """
+    Envia um payload (montado por build_label_cart_payload) ao carrinho do Melhor Envio.
+    Não acessa o banco, então pode ser chamada em paralelo por várias threads.
+    Retorna:
+        str: O ID do pedido no Melhor Envio.
+    """
+    cart_url = f"{config('ME_SANDBOX_URL')}/api/v2/me/cart"
 
     try:
-        cart_response = requests.post(cart_url, json=cart_payload, headers=headers)
+        cart_response = http_client.post(cart_url, json=cart_payload, headers=_melhor_envio_headers())
         cart_response.raise_for_status()
-        order_id_me = cart_response.json()['id']
+        return cart_response.json()['id']
+    except requests.exceptions.HTTPError as e:
+        _raise_melhor_envio_error(e)
 
-        checkout_payload = {"orders": [order_id_me]}
-        checkout_url = f'{base_url}/api/v2/me/shipment/checkout'
-        requests.post(checkout_url, json=checkout_payload, headers=headers).raise_for_status()
 
-        # Gera a etiqueta e aguarda o processamento
-        generate_payload = {"orders": [order_id_me]}
-        requests.post(generate_url, json=generate_payload, headers=headers).raise_for_status()
+def add_order_to_melhor_envio_cart(order: OrderModel) -> str:
+    return post_label_cart(build_label_cart_payload(order))
 
-        # Aguarda 5 segundos para o Melhor Envio processar a etiqueta
-        time.sleep(5)
 
-        # Busca os detalhes do pedido para obter o código de rastreamento
-        order_details_url = f'{base_url}/api/v2/me/orders/{order_id_me}'
-        order_details_response = requests.get(order_details_url, headers=headers)
-        order_details_response.raise_for_status()
-        
-        order_data = order_details_response.json()
-        tracking_code = order_data.get('tracking')
+def _post_shipment_step(step: str, melhor_envio_order_ids: list) -> None:
+    url = f"{config('ME_SANDBOX_URL')}/api/v2/me/shipment/{step}"
+    try:
+        http_client.post(url, json={"orders": list(melhor_envio_order_ids)}, headers=_melhor_envio_headers()).raise_for_status()
+    except requests.exceptions.HTTPError as e:
+        _raise_melhor_envio_error(e)
 
-        if not tracking_code:
-            raise Exception("Código de rastreamento não encontrado na resposta da API após aguardar.")
 
-        order.melhor_envio_order_id = order_id_me
-        order.tracking_code = tracking_code
-        order.status = OrderModel.OrderStatus.SHIPPED
-        order.save(update_fields=['melhor_envio_order_id', 'tracking_code', 'status', 'updated_at'])
+def purchase_labels(melhor_envio_order_ids: list) -> None:
+    """
+    "Paga" o frete (checkout) de todos os pedidos informados, com uma única chamada.
+    Não é idempotente: um pedido já pago não deve ser enviado de novo.
+    """
+    _post_shipment_step('checkout', melhor_envio_order_ids)
 
-        return order
-    
+
+def generate_labels(melhor_envio_order_ids: list) -> None:
+    """
+    Solicita a geração das etiquetas de pedidos já pagos, com uma única chamada.
+    A etiqueta é processada de forma assíncrona pelo Melhor Envio; o rastreio é buscado depois.
+    """
+    _post_shipment_step('generate', melhor_envio_order_ids)
+
+
+def fetch_tracking_codes(melhor_envio_order_ids: list) -> dict:
+    """
+    Consulta o rastreio de vários pedidos do Melhor Envio em uma única chamada.
+    Retorna:
+        dict: {id_melhor_envio: codigo_de_rastreio ou None se a etiqueta ainda não foi processada}
+    """
+    tracking_url = f"{config('ME_SANDBOX_URL')}/api/v2/me/shipment/tracking"
+    payload = {"orders": list(melhor_envio_order_ids)}
+
+    try:
+        # Consulta sem efeito colateral: pode ser repetida com segurança
+        tracking_response = http_client.post(tracking_url, json=payload, headers=_melhor_envio_headers(), idempotent=True)
+        tracking_response.raise_for_status()
     except requests.exceptions.HTTPError as e:
-        print("="*50)
-        print("!!! ERRO DE VALIDAÇÃO DO MELHOR ENVIO !!!")
-        print(f"STATUS CODE: {e.response.status_code}")
-        print("RESPOSTA DA API:", e.response.json())
-        print("="*50)
-        
-        error_details = e.response.json().get('errors', str(e))
-        raise Exception(f"Erro de validação do Melhor Envio: {error_details}")
\ No newline at end of file
+        _raise_melhor_envio_error(e)
+
+    data = tracking_response.json()
+    return {
+        order_id: (data.get(order_id) or {}).get('tracking')
+        for order_id in melhor_envio_order_ids
+    }
+
+
+def mark_order_as_shipped(order: OrderModel, tracking_code: str) -> OrderModel:
+    order.tracking_code = tracking_code
+    order.status = OrderModel.OrderStatus.SHIPPED
+    order.save(update_fields=['tracking_code', 'status', 'updated_at'])
+    return order
@@ -0,0 +1,180 @@
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MelhorEnvioStubServer:
+    """
+    Servidor HTTP local que imita os endpoints do Melhor Envio usados pela loja
+    (cotação, carrinho, checkout, geração, rastreio e consulta de pedido).
+    Serve para testar e medir o fluxo de etiquetas sem acesso à rede:
+
+        with MelhorEnvioStubServer(latency=0.05) as stub:
+            os.environ['ME_SANDBOX_URL'] = stub.url
+            ...
+
+    Atributos:
+        latency: Atraso artificial (em segundos) aplicado a cada requisição.
+        tracking_after_polls: Quantas consultas de rastreio retornam vazio antes do código aparecer.
+        requests: Lista de (metodo, caminho) de cada requisição recebida.
+    Métodos:
+        fail_next(path, times, status_code): As próximas `times` requisições ao caminho respondem com erro.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0, tracking_after_polls: int = 0):
+        self.latency = latency
+        self.tracking_after_polls = tracking_after_polls
+        self.orders = {}
+        self.requests = []
+        self._failures = {}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def fail_next(self, path: str, times: int = 1, status_code: int = 500):
+        with self._lock:
+            self._failures[path] = (times, status_code)
+
+    def _injected_failure(self, path: str):
+        with self._lock:
+            times, status_code = self._failures.get(path, (0, None))
+            if not times:
+                return None
+            self._failures[path] = (times - 1, status_code)
+        return status_code, {'message': 'Falha simulada.'}
+
+    def count(self, path: str) -> int:
+        return sum(1 for _, requested_path in self.requests if requested_path == path)
+
+    # --- Endpoints ---
+
+    def calculate(self, body):
+        return 200, [
+            {'id': 1, 'name': 'PAC', 'price': '20.00', 'delivery_time': 8},
+            {'id': 2, 'name': 'SEDEX', 'price': '35.00', 'delivery_time': 3},
+        ]
+
+    def cart(self, body):
+        missing = [field for field in ('service', 'from', 'to', 'products', 'volumes') if not body.get(field)]
+        if missing:
+            return 422, {'message': 'The given data was invalid.', 'errors': {field: ['required'] for field in missing}}
+
+        order_id = str(uuid.uuid4())
+        with self._lock:
+            self.orders[order_id] = {'id': order_id, 'status': 'pending', 'tracking': None, 'polls': 0}
+        return 201, {'id': order_id, 'status': 'pending'}
+
+    def _change_status(self, body, expected: str, new_status: str):
+        order_ids = body.get('orders') or []
+        with self._lock:
+            invalid = [order_id for order_id in order_ids if self.orders.get(order_id, {}).get('status') != expected]
+            if not order_ids or invalid:
+                return 422, {'errors': {'orders': [f'Pedidos inválidos: {invalid}']}}
+            for order_id in order_ids:
+                self.orders[order_id]['status'] = new_status
+        return 200, {order_id: {'status': True} for order_id in order_ids}
+
+    def checkout(self, body):
+        return self._change_status(body, expected='pending', new_status='released')
+
+    def generate(self, body):
+        return self._change_status(body, expected='released', new_status='generated')
+
+    def _tracking_for(self, order_id):
+        order = self.orders.get(order_id)
+        if order is None:
+            return None
+        if order['status'] == 'generated':
+            order['polls'] += 1
+            if order['polls'] > self.tracking_after_polls and not order['tracking']:
+                order['tracking'] = f'ME{uuid.uuid4().hex[:11].upper()}BR'
+        return {'id': order_id, 'status': order['status'], 'tracking': order['tracking']}
+
+    def tracking(self, body):
+        with self._lock:
+            return 200, {
+                order_id: self._tracking_for(order_id)
+                for order_id in body.get('orders') or []
+                if order_id in self.orders
+            }
+
+    def order_detail(self, order_id):
+        with self._lock:
+            data = self._tracking_for(order_id)
+        if data is None:
+            return 404, {'message': 'Not found.'}
+        return 200, data
+
+    def _make_handler(self):
+        stub = self
+        post_routes = {
+            '/api/v2/me/shipment/calculate': stub.calculate,
+            '/api/v2/me/cart': stub.cart,
+            '/api/v2/me/shipment/checkout': stub.checkout,
+            '/api/v2/me/shipment/generate': stub.generate,
+            '/api/v2/me/shipment/tracking': stub.tracking,
+        }
+        order_detail_path = re.compile(r'^/api/v2/me/orders/(?P<order_id>[^/]+)$')
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _respond(self, status_code, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status_code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _start(self):
+                with stub._lock:
+                    stub.requests.append((self.command, self.path))
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+            def do_POST(self):
+                self._start()
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length) or b'{}')
+                route = post_routes.get(self.path)
+                if route is None:
+                    return self._respond(404, {'message': 'Not found.'})
+                failure = stub._injected_failure(self.path)
+                self._respond(*(failure or route(body)))
+
+            def do_GET(self):
+                self._start()
+                match = order_detail_path.match(self.path)
+                if match is None:
+                    return self._respond(404, {'message': 'Not found.'})
+                self._respond(*stub.order_detail(match.group('order_id')))
+
+        return Handler
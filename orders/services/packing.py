@@ -0,0 +1,114 @@
+import math
+from dataclasses import dataclass
+from decimal import Decimal
+from functools import lru_cache
+
+from decouple import config
+
+# Dimensões (cm) assumidas para um livro sem altura/largura/comprimento cadastrados
+DEFAULT_BOOK_DIMENSIONS = {
+    "width": 16,
+    "height": 23,
+    "length": 5,
+}
+
+# Limites por volume das transportadoras do Melhor Envio (padrão: Correios)
+MAX_VOLUME_WEIGHT_KG = config('SHIPPING_MAX_VOLUME_WEIGHT_KG', default=30, cast=int)
+MAX_VOLUME_SIDE_CM = config('SHIPPING_MAX_VOLUME_SIDE_CM', default=100, cast=int)
+MAX_VOLUME_SUM_CM = config('SHIPPING_MAX_VOLUME_SUM_CM', default=200, cast=int)
+# Menor caixa aceita (comprimento x largura x altura)
+MIN_VOLUME_DIMENSIONS_CM = (16, 11, 2)
+# Divisor do peso cubado (cm³ / 6000 = kg)
+CUBIC_WEIGHT_DIVISOR = 6000
+
+
+@dataclass(frozen=True)
+class Volume:
+    length: int
+    width: int
+    height: int
+    weight_kg: float
+    cubic_weight_kg: float
+    books: int
+
+    def as_payload(self) -> dict:
+        return {
+            "width": self.width,
+            "height": self.height,
+            "length": self.length,
+            "weight": self.weight_kg,
+        }
+
+
+def _book_composition(book, quantity: int) -> tuple:
+    """(comprimento, largura, espessura, peso_g, quantidade), com o livro deitado sobre a maior face."""
+    dimensions = [book.height_cm, book.width_cm, book.length_cm] if book else [None]
+    if not all(dimensions):
+        dimensions = list(DEFAULT_BOOK_DIMENSIONS.values())
+    length, width, thickness = sorted((Decimal(d) for d in dimensions), reverse=True)
+    weight_g = (book.weight_g if book else None) or Decimal('0')
+    return (length, width, thickness, weight_g, quantity)
+
+
+def _fits(length, width, height, weight_g) -> bool:
+    return (
+        max(length, width, height) <= MAX_VOLUME_SIDE_CM
+        and length + width + height <= MAX_VOLUME_SUM_CM
+        and weight_g <= MAX_VOLUME_WEIGHT_KG * 1000
+    )
+
+
+@lru_cache(maxsize=2048)
+def _pack_composition(composition: tuple) -> tuple:
+    # Livros maiores primeiro: cada um vai para a primeira pilha em que cabe (first-fit decreasing)
+    units = sorted(
+        ((length, width, thickness, weight_g) for length, width, thickness, weight_g, quantity in composition for _ in range(quantity)),
+        key=lambda unit: (unit[0] * unit[1], unit[2]),
+        reverse=True
+    )
+
+    stacks = []  # [comprimento, largura, altura, peso_g, livros]
+    for length, width, thickness, weight_g in units:
+        for stack in stacks:
+            new_length, new_width = max(stack[0], length), max(stack[1], width)
+            new_height, new_weight = stack[2] + thickness, stack[3] + weight_g
+            if _fits(new_length, new_width, new_height, new_weight):
+                stack[:] = [new_length, new_width, new_height, new_weight, stack[4] + 1]
+                break
+        else:
+            # Um livro sozinho acima dos limites ainda vira um volume; a transportadora decide se aceita
+            stacks.append([length, width, thickness, weight_g, 1])
+
+    volumes = []
+    for length, width, height, weight_g, books in stacks:
+        length, width, height = (
+            max(math.ceil(side), minimum)
+            for side, minimum in zip((length, width, height), MIN_VOLUME_DIMENSIONS_CM)
+        )
+        volumes.append(Volume(
+            length=length,
+            width=width,
+            height=height,
+            weight_kg=float(weight_g / 1000),
+            cubic_weight_kg=round(length * width * height / CUBIC_WEIGHT_DIVISOR, 3),
+            books=books,
+        ))
+    return tuple(volumes)
+
+
+def pack_shipping_items(shipping_items: list) -> tuple:
+    """
+    Empilha os livros do carrinho em um ou mais volumes respeitando os limites da
+    transportadora (peso, maior lado e soma das dimensões). O resultado é memorizado
+    pela composição do carrinho (dimensões, peso e quantidade de cada livro).
+    Args:
+        shipping_items (list[ShippingItem]): Itens resolvidos por load_shipping_items.
+    Retorna:
+        tuple[Volume]: Os volumes com dimensões arredondadas para cima (cm), peso real e peso cubado (kg).
+    """
+    composition = tuple(sorted(
+        _book_composition(book, quantity) for book, quantity in shipping_items if quantity > 0
+    ))
+    if not composition:
+        return ()
+    return _pack_composition(composition)
@@ -0,0 +1,60 @@
+from decimal import Decimal
+from typing import NamedTuple, Optional
+
+from books.models import BookModel
+
+# Únicas colunas do livro usadas para cotar e despachar o frete
+SHIPPING_FIELDS = ('id', 'title', 'weight_g', 'height_cm', 'width_cm', 'length_cm')
+
+
+class ShippingItem(NamedTuple):
+    book: Optional[BookModel]
+    quantity: int
+
+
+def shipping_books_queryset():
+    return BookModel.objects.only(*SHIPPING_FIELDS)
+
+
+def load_shipping_items(cart_items) -> list:
+    """
+    Resolve os livros de um carrinho (dicts com book_id/quantity) ou de um pedido
+    (OrderItemModel) com no maximo uma query, trazendo só os campos de frete.
+    Livros já carregados nos itens (ex: via prefetch) são reaproveitados.
+    Retorna:
+        list[ShippingItem]: Um item por entrada, na mesma ordem. book é None se o livro foi removido do pedido.
+    Lança:
+        ValueError: Se algum livro do carrinho não existir mais.
+    """
+    entries = []
+    missing_ids = set()
+    for item in cart_items:
+        if isinstance(item, dict):
+            # Carrinho da sessão (calculate_shipping_with_melhor_envio)
+            book_id = int(item['book_id'])
+            entries.append((book_id, None, item['quantity'], True))
+            missing_ids.add(book_id)
+        else:
+            # Itens do pedido (build_label_cart_payload)
+            book = item.book if item.book_id and item._meta.get_field('book').is_cached(item) else None
+            entries.append((item.book_id, book, item.quantity, False))
+            if item.book_id and book is None:
+                missing_ids.add(item.book_id)
+
+    books = shipping_books_queryset().in_bulk(missing_ids) if missing_ids else {}
+
+    shipping_items = []
+    for book_id, book, quantity, from_cart in entries:
+        book = book or books.get(book_id)
+        if book is None and from_cart:
+            raise ValueError(f'Livro não encontrado - ID {book_id}')
+        shipping_items.append(ShippingItem(book, quantity))
+    return shipping_items
+
+
+def total_weight_kg(shipping_items: list) -> Decimal:
+    total_weight_grams = Decimal('0')
+    for book, quantity in shipping_items:
+        if book and book.weight_g:
+            total_weight_grams += book.weight_g * quantity
+    return total_weight_grams / 1000
@@ -0,0 +1,271 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from decouple import config
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+
+from orders.models import OrderModel, ShippingLabelJobModel
+from orders.services.melhor_envio import (
+    MelhorEnvioError,
+    build_label_cart_payload,
+    post_label_cart,
+    purchase_labels,
+    generate_labels,
+    fetch_tracking_codes,
+    mark_order_as_shipped,
+)
+from orders.services.shipping_items import shipping_books_queryset
+
+# Backoff exponencial entre consultas ao Melhor Envio: BASE, 2*BASE, 4*BASE ... até CAP
+BACKOFF_BASE_SECONDS = config('SHIPPING_LABEL_BACKOFF_BASE_SECONDS', default=2, cast=int)
+BACKOFF_CAP_SECONDS = config('SHIPPING_LABEL_BACKOFF_CAP_SECONDS', default=300, cast=int)
+MAX_ATTEMPTS = config('SHIPPING_LABEL_MAX_ATTEMPTS', default=10, cast=int)
+# Tempo que um job fica reservado para um worker antes de poder ser pego por outro
+LEASE_SECONDS = config('SHIPPING_LABEL_LEASE_SECONDS', default=120, cast=int)
+# Quantos pedidos são adicionados ao carrinho do Melhor Envio em paralelo
+CART_CONCURRENCY = config('SHIPPING_LABEL_CART_CONCURRENCY', default=8, cast=int)
+
+JobStatus = ShippingLabelJobModel.JobStatus
+
+
+def backoff_delay(attempt: int) -> timedelta:
+    return timedelta(seconds=min(BACKOFF_BASE_SECONDS * (2 ** attempt), BACKOFF_CAP_SECONDS))
+
+
+def enqueue_shipping_label(order: OrderModel) -> ShippingLabelJobModel:
+    """
+    Coloca a geração de etiqueta do pedido na fila. Se já existir um job ativo
+    para o pedido, ele é reaproveitado em vez de criar outro.
+    Lança:
+        ValueError: Se o pedido não tiver um serviço de frete selecionado.
+    """
+    if not order.shipping_service_id:
+        raise ValueError(
+            'O pedido deve conter um servico de frete selecionado'
+        )
+
+    active_job = order.shipping_label_jobs.filter(status__in=ShippingLabelJobModel.ACTIVE_STATUSES).first()
+    if active_job:
+        return active_job
+
+    try:
+        with transaction.atomic():
+            return ShippingLabelJobModel.objects.create(order=order)
+    except IntegrityError:
+        return order.shipping_label_jobs.get(status__in=ShippingLabelJobModel.ACTIVE_STATUSES)
+
+
+def enqueue_shipping_labels(orders) -> tuple:
+    """
+    Versão em lote de enqueue_shipping_label, para o envio de muitos pedidos de uma vez.
+    Apenas pedidos PROCESSING com serviço de frete selecionado entram na fila.
+    Retorna:
+        tuple[list, dict]: Os jobs ativos dos pedidos aceitos e {order_id: motivo} dos recusados.
+    """
+    accepted_ids = []
+    rejected = {}
+    for order in orders:
+        if order.status != OrderModel.OrderStatus.PROCESSING:
+            rejected[order.pk] = 'Apenas pedidos processados podem ser enviados.'
+        elif not order.shipping_service_id:
+            rejected[order.pk] = 'O pedido deve conter um servico de frete selecionado'
+        else:
+            accepted_ids.append(order.pk)
+
+    already_queued = set(
+        ShippingLabelJobModel.objects.filter(
+            order_id__in=accepted_ids, status__in=ShippingLabelJobModel.ACTIVE_STATUSES
+        ).values_list('order_id', flat=True)
+    )
+    ShippingLabelJobModel.objects.bulk_create(
+        [ShippingLabelJobModel(order_id=order_id) for order_id in accepted_ids if order_id not in already_queued],
+        ignore_conflicts=True
+    )
+
+    jobs = list(
+        ShippingLabelJobModel.objects.filter(
+            order_id__in=accepted_ids, status__in=ShippingLabelJobModel.ACTIVE_STATUSES
+        )
+    )
+    return jobs, rejected
+
+
+def claim_due_jobs(limit: int = 10) -> list:
+    """
+    Reserva (lease) os jobs vencidos para este worker. O lock da linha só dura
+    o tempo do UPDATE; as chamadas HTTP acontecem depois, fora da transação.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            ShippingLabelJobModel.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(status__in=ShippingLabelJobModel.ACTIVE_STATUSES, next_run_at__lte=now)
+            .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+            .order_by('next_run_at')[:limit]
+        )
+        ShippingLabelJobModel.objects.filter(
+            pk__in=[job.pk for job in jobs]
+        ).update(locked_until=now + timedelta(seconds=LEASE_SECONDS))
+    return jobs
+
+
+def _schedule_retry(job: ShippingLabelJobModel, error: str) -> None:
+    job.attempts += 1
+    job.last_error = error
+    if job.attempts >= MAX_ATTEMPTS:
+        job.status = JobStatus.FAILED
+    else:
+        job.next_run_at = timezone.now() + backoff_delay(job.attempts)
+
+
+def _load_orders_for_labels(jobs: list) -> None:
+    """Carrega de uma vez os pedidos (com destinatario e itens) de todos os jobs do lote."""
+    orders = OrderModel.objects.filter(
+        pk__in=[job.order_id for job in jobs]
+    ).select_related(
+        'user', 'address__user__profile'
+    ).prefetch_related(
+        'items', Prefetch('items__book', queryset=shipping_books_queryset())
+    ).in_bulk()
+    for job in jobs:
+        job.order = orders[job.order_id]
+
+
+def _run_label_step(jobs: list, call) -> list:
+    """
+    Chama call(ids do Melhor Envio) para o lote. Se a API recusar o lote (4xx), ele é dividido ao meio
+    até isolar os pedidos recusados, para que um pedido inválido não derrube os demais.
+    Erros de rede/5xx reagendam o lote inteiro sem dividir.
+    Retorna:
+        list: Os jobs para os quais a chamada deu certo.
+    """
+    if not jobs:
+        return []
+    try:
+        call([job.order.melhor_envio_order_id for job in jobs])
+        return jobs
+    except MelhorEnvioError as e:
+        if e.is_rejection and len(jobs) > 1:
+            middle = len(jobs) // 2
+            return _run_label_step(jobs[:middle], call) + _run_label_step(jobs[middle:], call)
+        error = e
+    except Exception as e:
+        error = e
+
+    for job in jobs:
+        _schedule_retry(job, str(error))
+    return []
+
+
+def _submit_jobs(jobs: list) -> None:
+    """
+    PENDING: adiciona os pedidos ao carrinho do Melhor Envio em paralelo e então
+    faz um único checkout e uma única geração de etiquetas para o lote inteiro.
+    Cada etapa concluída fica registrada no job (purchased_at/generated_at), então uma nova
+    tentativa refaz só a etapa que falhou e nunca paga o frete duas vezes.
+    """
+    _load_orders_for_labels(jobs)
+
+    # Os payloads são montados aqui (acesso ao banco); as threads só fazem HTTP
+    to_add = []
+    for job in jobs:
+        if job.order.melhor_envio_order_id:
+            continue
+        try:
+            to_add.append((job, build_label_cart_payload(job.order)))
+        except Exception as e:
+            _schedule_retry(job, str(e))
+
+    if to_add:
+        with ThreadPoolExecutor(max_workers=CART_CONCURRENCY) as executor:
+            futures = [(job, executor.submit(post_label_cart, payload)) for job, payload in to_add]
+
+        added = []
+        for job, future in futures:
+            try:
+                job.order.melhor_envio_order_id = future.result()
+                job.order.updated_at = timezone.now()
+                added.append(job.order)
+            except Exception as e:
+                _schedule_retry(job, str(e))
+        OrderModel.objects.bulk_update(added, ['melhor_envio_order_id', 'updated_at'])
+
+    ready = [job for job in jobs if job.order.melhor_envio_order_id and job.status == JobStatus.PENDING]
+
+    purchased = _run_label_step([job for job in ready if job.purchased_at is None], purchase_labels)
+    if purchased:
+        now = timezone.now()
+        for job in purchased:
+            job.purchased_at = now
+        # Gravado na hora: se o worker cair antes do fim do lote, o checkout não é repetido
+        ShippingLabelJobModel.objects.filter(pk__in=[job.pk for job in purchased]).update(purchased_at=now)
+
+    to_generate = [
+        job for job in ready
+        if job.purchased_at is not None and job.generated_at is None and job.status == JobStatus.PENDING
+    ]
+    for job in _run_label_step(to_generate, generate_labels):
+        job.generated_at = timezone.now()
+
+    for job in ready:
+        if job.generated_at is None:
+            continue
+        job.status = JobStatus.WAITING_TRACKING
+        job.attempts = 0
+        job.last_error = ''
+        job.next_run_at = timezone.now() + backoff_delay(0)
+
+
+def _poll_jobs(jobs: list) -> None:
+    """WAITING_TRACKING: consulta o rastreio do lote inteiro em uma única chamada."""
+    _load_orders_for_labels(jobs)
+
+    try:
+        tracking_codes = fetch_tracking_codes([job.order.melhor_envio_order_id for job in jobs])
+    except Exception as e:
+        for job in jobs:
+            _schedule_retry(job, str(e))
+        return
+
+    for job in jobs:
+        tracking_code = tracking_codes.get(job.order.melhor_envio_order_id)
+        if tracking_code:
+            mark_order_as_shipped(job.order, tracking_code)
+            job.status = JobStatus.DONE
+            job.last_error = ''
+        else:
+            _schedule_retry(job, 'Código de rastreamento não encontrado na resposta da API após aguardar.')
+
+
+def process_shipping_label_jobs(jobs: list) -> list:
+    """
+    Executa um passo de cada job do lote:
+        - PENDING: carrinho (em paralelo) + checkout e geração únicos para o lote.
+        - WAITING_TRACKING: uma consulta de rastreio para o lote; sem rastreio ainda, reagenda com backoff.
+    Nenhum passo bloqueia o worker esperando o Melhor Envio.
+    """
+    pending = [job for job in jobs if job.status == JobStatus.PENDING]
+    waiting = [job for job in jobs if job.status == JobStatus.WAITING_TRACKING]
+
+    if pending:
+        _submit_jobs(pending)
+    if waiting:
+        _poll_jobs(waiting)
+
+    now = timezone.now()
+    for job in jobs:
+        job.locked_until = None
+        job.updated_at = now
+    ShippingLabelJobModel.objects.bulk_update(
+        jobs, ['status', 'attempts', 'next_run_at', 'locked_until', 'last_error', 'purchased_at', 'generated_at', 'updated_at']
+    )
+    return jobs
+
+
+def run_pending_jobs(limit: int = 10) -> int:
+    jobs = claim_due_jobs(limit=limit)
+    if jobs:
+        process_shipping_label_jobs(jobs)
+    return len(jobs)
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import math
+import threading
+import time
+from decimal import Decimal
+
+from decouple import config
+from django.core.cache import cache
+
+# Por quanto tempo uma cotação é servida sem consultar o Melhor Envio
+QUOTE_TTL_SECONDS = config('SHIPPING_QUOTE_TTL_SECONDS', default=600, cast=int)
+# Depois do TTL, por quanto tempo a cotação antiga ainda é servida enquanto uma nova é buscada em segundo plano
+QUOTE_STALE_SECONDS = config('SHIPPING_QUOTE_STALE_SECONDS', default=3600, cast=int)
+# O peso é arredondado para cima até o multiplo deste valor, para carrinhos parecidos compartilharem a cotação
+WEIGHT_BUCKET_GRAMS = config('SHIPPING_QUOTE_WEIGHT_BUCKET_GRAMS', default=100, cast=int)
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+class _InflightCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def bucket_weight_kg(weight_kg: Decimal) -> float:
+    """Arredonda o peso para cima até o próximo balde de WEIGHT_BUCKET_GRAMS (ex: 0.42kg -> 0.5kg)."""
+    grams = Decimal(weight_kg) * 1000
+    bucketed = math.ceil(grams / WEIGHT_BUCKET_GRAMS) * WEIGHT_BUCKET_GRAMS
+    return bucketed / 1000
+
+
+def _only_digits(value) -> str:
+    return ''.join(filter(str.isdigit, str(value)))
+
+
+def quote_cache_key(payload: dict) -> str:
+    """A cotação só depende do payload (CEP de origem, CEP de destino, peso e dimensões)."""
+    normalized = {
+        **payload,
+        'from': {'postal_code': _only_digits(payload['from']['postal_code'])},
+        'to': {'postal_code': _only_digits(payload['to']['postal_code'])},
+    }
+    digest = hashlib.sha256(json.dumps(normalized, sort_keys=True, default=str).encode()).hexdigest()
+    return f'shipping-quote:{digest}'
+
+
+def _store(key: str, options: list) -> None:
+    entry = {'options': options, 'fresh_until': time.time() + QUOTE_TTL_SECONDS}
+    cache.set(key, entry, timeout=QUOTE_TTL_SECONDS + QUOTE_STALE_SECONDS)
+
+
+def _fetch_coalesced(key: str, fetch) -> list:
+    """
+    Garante uma única chamada externa por chave: requisições idênticas que chegam
+    enquanto a primeira ainda está em andamento esperam e reaproveitam o resultado dela.
+    """
+    with _inflight_lock:
+        call = _inflight.get(key)
+        is_leader = call is None
+        if is_leader:
+            call = _inflight[key] = _InflightCall()
+
+    if not is_leader:
+        call.done.wait()
+        if call.error:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = fetch()
+        _store(key, call.result)
+        return call.result
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        call.done.set()
+
+
+def _start_background(target) -> None:
+    threading.Thread(target=target, daemon=True).start()
+
+
+def _refresh_in_background(key: str, fetch) -> None:
+    # O lock no cache evita que vários workers revalidem a mesma cotação ao mesmo tempo
+    if not cache.add(f'{key}:refreshing', True, timeout=30):
+        return
+
+    def refresh():
+        try:
+            _fetch_coalesced(key, fetch)
+        except Exception:
+            pass  # Mantém a cotação antiga; a próxima requisição tenta de novo
+        finally:
+            cache.delete(f'{key}:refreshing')
+
+    _start_background(refresh)
+
+
+def get_or_fetch_quote(payload: dict, fetch) -> list:
+    """
+    Retorna as opções de frete para o payload, usando o cache:
+        - Cotação fresca: retorna direto do cache.
+        - Cotação vencida (dentro da janela stale): retorna a antiga e revalida em segundo plano.
+        - Sem cotação: chama fetch() (uma única vez para requisições concorrentes idênticas).
+    Args:
+        payload (dict): O payload enviado ao /shipment/calculate, já com o peso arredondado.
+        fetch (callable): Função sem argumentos que consulta o Melhor Envio.
+    """
+    key = quote_cache_key(payload)
+    entry = cache.get(key)
+
+    if entry is not None:
+        if entry['fresh_until'] <= time.time():
+            _refresh_in_background(key, fetch)
+        return entry['options']
+
+    return _fetch_coalesced(key, fetch)
@@ -1,17 +1,44 @@
+import logging
 import stripe
+from datetime import timedelta
 from decimal import Decimal
+from decouple import config
 from django.db import transaction
-from django.shortcuts import get_object_or_404
+from django.db.models import F
+from django.db.models.functions import Now
+from django.utils import timezone
 from orders.models import *
 import stripe.error
 
 from orders.models import OrderItemModel, OrderModel
 from books.models import BookModel
+from books.services.catalog_cache import forget_stocks
 
+logger = logging.getLogger(__name__)
 
-def process_payment_with_stripe(amount: Decimal, payment_method_id: str) -> stripe.PaymentIntent:
+# Minutos que um pedido pode ficar PENDING_PAYMENT (checkout interrompido) antes de ter a reserva desfeita
+PENDING_PAYMENT_TIMEOUT_MINUTES = config('PENDING_PAYMENT_TIMEOUT_MINUTES', default=30, cast=int)
+# Tentativas de confirmar o pedido depois que o Stripe já cobrou
+CONFIRM_ATTEMPTS = 2
+
+
+class PaymentReconciliationRequired(Exception):
+    """
+    O Stripe cobrou, mas o pedido não pôde ser confirmado. Ele fica PENDING_PAYMENT com o
+    payment intent gravado, e expire_pending_orders o confirma depois (o estoque continua reservado).
+    """
+
+    def __init__(self, order: OrderModel, message: str):
+        super().__init__(message)
+        self.order = order
+
+
+def process_payment_with_stripe(amount: Decimal, payment_method_id: str, idempotency_key: str = None) -> stripe.PaymentIntent:
     amount_in_cents = int(amount * 100)
 
+    # Repassa a Idempotency-Key do cliente para o Stripe nunca cobrar duas vezes a mesma tentativa
+    extra_params = {'idempotency_key': idempotency_key} if idempotency_key else {}
+
     try:
         intent = stripe.PaymentIntent.create(
             amount=amount_in_cents,
@@ -19,6 +46,7 @@ def process_payment_with_stripe(amount: Decimal, payment_method_id: str) -> stri
             payment_method=payment_method_id,
             confirm=True,
             automatic_payment_methods={"enabled": True, "allow_redirects": "never"},
+            **extra_params,
         )
 
         if intent.status != 'succeeded':
@@ -31,7 +59,56 @@ def process_payment_with_stripe(amount: Decimal, payment_method_id: str) -> stri
         raise Exception(f"Erro ao processar o pagamento: {str(e)}")
     
 
-def create_order_from_cart(user, cart: dict, validated_data: dict) -> OrderModel:
+def lock_cart_books(book_ids) -> dict:
+    """
+    Carrega e bloqueia (SELECT ... FOR UPDATE) todos os livros do carrinho em uma unica query.
+    As linhas sao bloqueadas em ordem de pk para que checkouts concorrentes nao entrem em deadlock.
+    Deve ser chamada dentro de um transaction.atomic().
+    Retorna:
+        dict: {book_id: BookModel}
+    Lança:
+        ValueError: Se algum livro do carrinho nao existir mais.
+    """
+    book_ids = sorted(set(book_ids))
+    books = {
+        book.pk: book
+        for book in BookModel.objects.select_for_update().filter(pk__in=book_ids).order_by('pk')
+    }
+
+    missing = [book_id for book_id in book_ids if book_id not in books]
+    if missing:
+        raise ValueError(f'Livro não encontrado - ID {missing[0]}')
+    return books
+
+
+def decrement_stock(books: dict, quantities: dict) -> None:
+    """
+    Baixa o estoque com UPDATEs condicionais (stock >= quantidade) feitos pelo proprio banco,
+    em vez de ler, subtrair em Python e gravar de volta.
+    Lança:
+        ValueError: Se o estoque de algum livro nao for suficiente no momento do UPDATE.
+    """
+    for book_id in sorted(quantities):
+        quantity = quantities[book_id]
+        updated = BookModel.objects.filter(
+            pk=book_id, stock__gte=quantity
+        ).update(stock=F('stock') - quantity, updated_at=Now())
+
+        if not updated:
+            raise ValueError(
+                f'Estoque insuficiente para o livro - {books[book_id].title}'
+            )
+        books[book_id].stock -= quantity
+    forget_stocks(quantities)
+
+
+def restore_stock(quantities: dict) -> None:
+    for book_id in sorted(quantities):
+        BookModel.objects.filter(pk=book_id).update(stock=F('stock') + quantities[book_id], updated_at=Now())
+    forget_stocks(quantities)
+
+
+def create_order_from_cart(user, cart: dict, validated_data: dict, idempotency_key: str = None) -> OrderModel:
     address = validated_data.get('address_id')
     payment_method_id = validated_data.get('payment_method_id')
 
@@ -48,11 +125,15 @@ def create_order_from_cart(user, cart: dict, validated_data: dict) -> OrderModel
 
     cart_items = cart.get('items', {})
 
+    quantities = {int(book_id): item['quantity'] for book_id, item in cart_items.items()}
     total_items_price = sum(Decimal(item['price']) * item['quantity'] for item in cart_items.values())
     final_total = total_items_price + shipping_cost
    
 
+    # Fase 1: reserva o estoque e cria o pedido PENDING_PAYMENT em uma transação curta
     with transaction.atomic():
+        books = lock_cart_books(quantities)
+
         order = OrderModel.objects.create(
             user=user,
             address=address,
@@ -65,17 +146,15 @@ def create_order_from_cart(user, cart: dict, validated_data: dict) -> OrderModel
 
 
         order_items_to_create = []
-        books_to_update = []
+        max_len = OrderItemModel._meta.get_field('book_title_snapshot').max_length
 
         for book_id_str, item_data in cart_items.items():
-            book = get_object_or_404(BookModel, pk=int(book_id_str))
+            book = books[int(book_id_str)]
             if book.stock < item_data['quantity']:
                 raise ValueError(
                     f'Estoque insuficiente para o livro - {book.title}'
                 )
             original_title = item_data.get('title', '')
-                
-            max_len = OrderItemModel._meta.get_field('book_title_snapshot').max_length
             truncated_title = (original_title[:max_len - 3] + '...') if len(original_title) > max_len else original_title
             
             order_items_to_create.append(
@@ -87,37 +166,109 @@ def create_order_from_cart(user, cart: dict, validated_data: dict) -> OrderModel
                     price_at_purchase=Decimal(item_data['price'])
                 )
             )
-            book.stock -= item_data['quantity']
-            books_to_update.append(book)
 
 
         OrderItemModel.objects.bulk_create(
             order_items_to_create
         )
-        BookModel.objects.bulk_update(
-            books_to_update, ['stock']
+        decrement_stock(books, quantities)
+
+    # Fase 2: chamada ao Stripe sem nenhuma transação aberta (nenhum lock fica preso durante a rede)
+    try:
+        payment_intent = process_payment_with_stripe(
+            amount=final_total,
+            payment_method_id=payment_method_id,
+            idempotency_key=idempotency_key
         )
+    except Exception as e:
+        # Fase 3 (compensação): devolve o estoque reservado e marca o pedido como FAILED
+        release_order_reservation(order, quantities)
+
+        # -> sendgrid pra falha
+        raise e
 
+    # Fase 3: confirma o pedido. O cartão já foi cobrado, então uma falha aqui nunca devolve o estoque
+    for attempt in range(1, CONFIRM_ATTEMPTS + 1):
         try:
-            payment_intent = process_payment_with_stripe(
-                amount=final_total,
-                payment_method_id=payment_method_id
-            )
-            order.status = OrderModel.OrderStatus.PROCESSING
-            order.stripe_payment_intent_id = payment_intent.id
-            order.save(update_fields=['status', 'stripe_payment_intent_id', 'updated_at'])
+            confirm_order_payment(order, payment_intent)
+            break
+        except Exception as e:
+            if attempt == CONFIRM_ATTEMPTS:
+                mark_for_reconciliation(order, payment_intent)
+                raise PaymentReconciliationRequired(
+                    order, 'Pagamento recebido; a confirmação do pedido está pendente.'
+                ) from e
 
-            # SENDGRID pra sucesso
+    # SENDGRID pra sucesso
 
-        except (ValueError, Exception) as e:
-            order.status = OrderModel.OrderStatus.FAILED
-            order.save(update_fields=['status', 'updated_at'])                
+    return order
 
-            # -> sendgrid pra falha
-            raise e
 
+def confirm_order_payment(order: OrderModel, payment_intent: stripe.PaymentIntent) -> OrderModel:
+    with transaction.atomic():
+        order.status = OrderModel.OrderStatus.PROCESSING
+        order.stripe_payment_intent_id = payment_intent.id
+        order.save(update_fields=['status', 'stripe_payment_intent_id', 'updated_at'])
     return order
 
+
+def mark_for_reconciliation(order: OrderModel, payment_intent: stripe.PaymentIntent) -> OrderModel:
+    """Grava o payment intent no pedido ainda PENDING_PAYMENT, para que expire_pending_orders o confirme em vez de liberar a reserva."""
+    order.status = OrderModel.OrderStatus.PENDING_PAYMENT
+    order.stripe_payment_intent_id = payment_intent.id
+    try:
+        OrderModel.objects.filter(pk=order.pk).update(stripe_payment_intent_id=payment_intent.id, updated_at=Now())
+    except Exception:
+        # Último registro da cobrança quando nem o banco responde
+        logger.exception('Pedido %s cobrado (payment intent %s) sem confirmação.', order.pk, payment_intent.id)
+    return order
+
+
+def release_order_reservation(order: OrderModel, quantities: dict) -> OrderModel:
+    """
+    Desfaz a reserva da fase 1 quando o pagamento falha: devolve o estoque
+    com UPDATEs atomicos e marca o pedido como FAILED.
+    """
+    with transaction.atomic():
+        restore_stock(quantities)
+        order.status = OrderModel.OrderStatus.FAILED
+        order.save(update_fields=['status', 'updated_at'])
+    return order
+
+def expire_pending_orders(timeout_minutes: int = PENDING_PAYMENT_TIMEOUT_MINUTES) -> tuple:
+    """
+    Resolve os pedidos presos em PENDING_PAYMENT há mais de timeout_minutes (o processo caiu
+    entre a reserva e a confirmação):
+        - Com payment intent gravado (cobrado, ver mark_for_reconciliation): confirma o pedido.
+        - Sem payment intent: devolve o estoque e marca como FAILED via release_order_reservation.
+    Retorna:
+        tuple[int, int]: Quantidade de pedidos liberados e de pedidos confirmados.
+    """
+    cutoff = timezone.now() - timedelta(minutes=timeout_minutes)
+    expired = reconciled = 0
+    stale_ids = OrderModel.objects.filter(
+        status=OrderModel.OrderStatus.PENDING_PAYMENT, updated_at__lt=cutoff
+    ).values_list('pk', flat=True)
+
+    for order_id in stale_ids:
+        with transaction.atomic():
+            # Relê com lock: o pedido pode ter sido confirmado depois da listagem
+            order = OrderModel.objects.select_for_update().filter(
+                pk=order_id, status=OrderModel.OrderStatus.PENDING_PAYMENT
+            ).first()
+            if order is None:
+                continue
+            if order.stripe_payment_intent_id:
+                order.status = OrderModel.OrderStatus.PROCESSING
+                order.save(update_fields=['status', 'updated_at'])
+                reconciled += 1
+            else:
+                quantities = {item.book_id: item.quantity for item in order.items.all()}
+                release_order_reservation(order, quantities)
+                expired += 1
+    return expired, reconciled
+
+
 def refound_stripe_payment(payment_intent_id: str):
     try:
         stripe.Refund.create(payment_intent=payment_intent_id)
@@ -130,15 +281,42 @@ def cancel_order_service(order: OrderModel):
     if not order.stripe_payment_intent_id:
         raise ValueError('Este pedido não possui um ID de pagamento para estornar.')
 
-    with transaction.atomic():
-        for item in order.items.all():
-            item.book.stock += item.quantity
-            item.book.save(update_fields=['stock'])
-        
-        refound_stripe_payment(order.stripe_payment_intent_id)
+    previous_status = order.status
+    quantities = {item.book_id: item.quantity for item in order.items.all()}
 
+    # Fase 1: cancela e devolve o estoque em uma transação curta; o lock do pedido impede dois cancelamentos ao mesmo tempo
+    with transaction.atomic():
+        current_status = OrderModel.objects.select_for_update().values_list('status', flat=True).get(pk=order.pk)
+        if current_status == OrderModel.OrderStatus.CANCELED:
+            raise ValueError('Este pedido já foi cancelado.')
+        # UPDATE condicional (stock + quantidade) no banco, como no checkout, e invalida o estoque cacheado
+        restore_stock(quantities)
         order.status = OrderModel.OrderStatus.CANCELED
         order.save(update_fields=['status', 'updated_at'])
 
-        # sendgrid pra cancelar
+    # Fase 2: estorno no Stripe sem nenhuma transação aberta
+    try:
+        refound_stripe_payment(order.stripe_payment_intent_id)
+    except Exception:
+        # Fase 3 (compensação): o estorno não aconteceu, então o pedido volta ao status anterior e retoma o estoque
+        reinstate_cancelled_order(order, previous_status, quantities)
+        raise
 
+    # sendgrid pra cancelar
+
+
+def reinstate_cancelled_order(order: OrderModel, status: str, quantities: dict) -> OrderModel:
+    """
+    Desfaz a fase 1 do cancelamento quando o estorno falha: baixa de novo o estoque devolvido
+    e volta o pedido ao status anterior. Se o estoque já tiver sido vendido nesse meio tempo,
+    o pedido volta mesmo assim e o caso fica registrado no log para conciliação.
+    """
+    order.status = status
+    try:
+        with transaction.atomic():
+            decrement_stock(lock_cart_books(quantities), quantities)
+            order.save(update_fields=['status', 'updated_at'])
+    except ValueError:
+        logger.error('Pedido %s voltou a %s sem retomar o estoque devolvido no cancelamento.', order.pk, status)
+        order.save(update_fields=['status', 'updated_at'])
+    return order
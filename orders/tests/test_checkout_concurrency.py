@@ -0,0 +1,78 @@
+import threading
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection, connections
+
+from books.models import BookModel
+from addresses.models import AddressModel
+from orders.models import OrderModel, OrderItemModel
+from orders.services.stripe_service import create_order_from_cart
+
+
+pytestmark = [
+    pytest.mark.slow,
+    pytest.mark.django_db(transaction=True),
+]
+
+CHECKOUTS = 20
+INITIAL_STOCK = 5
+
+
+@pytest.fixture
+def hot_book():
+    return BookModel.objects.create(title='Livro Disputado', price='30.00', stock=INITIAL_STOCK)
+
+
+@pytest.fixture
+def buyers():
+    users = []
+    for i in range(CHECKOUTS):
+        user = User.objects.create_user(username=f'buyer{i}', email=f'buyer{i}@example.com')
+        address = AddressModel.objects.create(user=user, zip_code='88000000', street='Rua', number='1', city='Cidade', state='SC')
+        users.append((user, address))
+    return users
+
+
+@pytest.mark.skipif(connection.vendor == 'sqlite', reason='SQLite serializa escritas e não suporta SELECT ... FOR UPDATE.')
+@patch('orders.services.stripe_service.process_payment_with_stripe')
+def test_parallel_checkouts_never_oversell(mock_process_payment, hot_book, buyers):
+    """
+    Dispara varios checkouts simultaneos para um mesmo livro com pouco estoque
+    e garante que o numero de unidades vendidas nunca passa do estoque inicial.
+    """
+    mock_process_payment.side_effect = lambda **kwargs: MagicMock(id=f'pi_{threading.get_ident()}_{id(kwargs)}', status='succeeded')
+    barrier = threading.Barrier(CHECKOUTS)
+    results = []
+
+    def checkout(user, address):
+        cart = {
+            'items': {str(hot_book.id): {'quantity': 1, 'price': '30.00', 'title': hot_book.title}},
+            'shipping_option': {'name': 'PAC', 'price': Decimal('10.00')},
+        }
+        try:
+            barrier.wait()
+            create_order_from_cart(user=user, cart=cart, validated_data={'address_id': address, 'payment_method_id': 'pm_card_visa'})
+            results.append('ok')
+        except ValueError:
+            results.append('sem_estoque')
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=checkout, args=buyer) for buyer in buyers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    hot_book.refresh_from_db()
+    sold = OrderItemModel.objects.filter(
+        book=hot_book, order__status=OrderModel.OrderStatus.PROCESSING
+    ).count()
+
+    assert len(results) == CHECKOUTS
+    assert results.count('ok') == INITIAL_STOCK
+    assert sold == INITIAL_STOCK
+    assert hot_book.stock == 0
@@ -0,0 +1,178 @@
+import pytest
+from datetime import timedelta
+from unittest.mock import patch, MagicMock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from addresses.models import AddressModel
+from books.models import BookModel
+from orders.models import OrderModel, IdempotencyKeyModel
+from orders.services.idempotency import IdempotencyInProgress, claim_key, purge_expired_keys, hash_request
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(username='testuser', password='password123')
+
+
+@pytest.fixture
+def address(user):
+    return AddressModel.objects.create(user=user, street='Rua Teste', number='1', city='Cidade', state='SC', zip_code='88000000')
+
+
+@pytest.fixture
+def book():
+    return BookModel.objects.create(title='Livro Idempotente', price='50.00', stock=10)
+
+
+@pytest.fixture
+def client_with_cart(api_client, user, book):
+    api_client.force_authenticate(user=user)
+    session = api_client.session
+    session['cart'] = {
+        'items': {str(book.id): {'quantity': 1, 'price': '50.00', 'title': book.title}},
+        'shipping_option': {'name': 'SEDEX', 'price': '15.00'}
+    }
+    session.save()
+    return api_client
+
+
+@patch('stripe.PaymentIntent.create')
+def test_replay_returns_stored_response_without_charging_again(mock_stripe, client_with_cart, address, book):
+    mock_stripe.return_value = MagicMock(id='pi_idem', status='succeeded')
+    url = reverse('order-api-list')
+    payload = {'address_id': address.id, 'payment_method_id': 'pm_card_visa'}
+
+    first = client_with_cart.post(url, data=payload, format='json', HTTP_IDEMPOTENCY_KEY='chave-1')
+    replay = client_with_cart.post(url, data=payload, format='json', HTTP_IDEMPOTENCY_KEY='chave-1')
+
+    assert first.status_code == status.HTTP_201_CREATED
+    assert replay.status_code == status.HTTP_201_CREATED
+    assert replay.data['id'] == first.data['id']
+    assert OrderModel.objects.count() == 1
+    mock_stripe.assert_called_once()
+
+    book.refresh_from_db()
+    assert book.stock == 9
+
+
+@patch('stripe.PaymentIntent.create')
+def test_idempotency_key_is_passed_to_stripe(mock_stripe, client_with_cart, address):
+    mock_stripe.return_value = MagicMock(id='pi_idem', status='succeeded')
+    url = reverse('order-api-list')
+    payload = {'address_id': address.id, 'payment_method_id': 'pm_card_visa'}
+
+    client_with_cart.post(url, data=payload, format='json', HTTP_IDEMPOTENCY_KEY='chave-stripe')
+
+    stripe_key = mock_stripe.call_args.kwargs['idempotency_key']
+    assert stripe_key.startswith('checkout-')
+
+
+@patch('orders.views.order_viewset.create_order_from_cart')
+def test_same_key_with_different_body_is_rejected(mock_create_order, client_with_cart, address, user):
+    IdempotencyKeyModel.objects.create(
+        user=user, key='chave-2', request_hash='outro-hash',
+        response_status=201, response_body={'id': 1},
+        expires_at=timezone.now() + timedelta(hours=1)
+    )
+    url = reverse('order-api-list')
+    payload = {'address_id': address.id, 'payment_method_id': 'pm_card_visa'}
+
+    response = client_with_cart.post(url, data=payload, format='json', HTTP_IDEMPOTENCY_KEY='chave-2')
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    mock_create_order.assert_not_called()
+
+
+@patch('orders.views.order_viewset.create_order_from_cart')
+def test_key_still_in_progress_returns_conflict(mock_create_order, client_with_cart, address, user):
+    payload = {'address_id': address.id, 'payment_method_id': 'pm_card_visa'}
+    IdempotencyKeyModel.objects.create(
+        user=user, key='chave-3', request_hash=hash_request(payload),
+        expires_at=timezone.now() + timedelta(hours=1)
+    )
+
+    response = client_with_cart.post(reverse('order-api-list'), data=payload, format='json', HTTP_IDEMPOTENCY_KEY='chave-3')
+
+    assert response.status_code == status.HTTP_409_CONFLICT
+    mock_create_order.assert_not_called()
+
+
+@patch('stripe.PaymentIntent.create')
+def test_key_with_expired_lease_is_reclaimed(mock_stripe, client_with_cart, address, user):
+    mock_stripe.return_value = MagicMock(id='pi_reclaim', status='succeeded')
+    payload = {'address_id': address.id, 'payment_method_id': 'pm_card_visa'}
+    IdempotencyKeyModel.objects.create(
+        user=user, key='chave-abandonada', request_hash=hash_request(payload),
+        expires_at=timezone.now() + timedelta(hours=1),
+        locked_until=timezone.now() - timedelta(seconds=1)
+    )
+
+    response = client_with_cart.post(reverse('order-api-list'), data=payload, format='json', HTTP_IDEMPOTENCY_KEY='chave-abandonada')
+
+    assert response.status_code == status.HTTP_201_CREATED
+    record = IdempotencyKeyModel.objects.get(user=user, key='chave-abandonada')
+    assert record.response_status == status.HTTP_201_CREATED
+    assert record.locked_until is None
+
+
+@patch('orders.views.order_viewset.create_order_from_cart')
+def test_transient_failure_releases_the_key(mock_create_order, client_with_cart, address, user):
+    mock_create_order.side_effect = Exception('Stripe indisponível')
+    url = reverse('order-api-list')
+    payload = {'address_id': address.id, 'payment_method_id': 'pm_card_visa'}
+
+    response = client_with_cart.post(url, data=payload, format='json', HTTP_IDEMPOTENCY_KEY='chave-4')
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert not IdempotencyKeyModel.objects.filter(key='chave-4').exists()
+
+    mock_create_order.side_effect = ValueError('Pagamento Recusado: cartão sem limite')
+    retry = client_with_cart.post(url, data=payload, format='json', HTTP_IDEMPOTENCY_KEY='chave-4')
+
+    assert retry.status_code == status.HTTP_400_BAD_REQUEST
+    assert mock_create_order.call_count == 2
+    assert IdempotencyKeyModel.objects.get(key='chave-4').response_status == status.HTTP_400_BAD_REQUEST
+
+
+def test_claim_key_retries_once_when_the_existing_key_vanishes(user):
+    IdempotencyKeyModel.objects.create(
+        user=user, key='chave-5', request_hash='h', response_status=201, response_body={},
+        expires_at=timezone.now() + timedelta(hours=1)
+    )
+
+    with patch('orders.services.idempotency.get_stored_response', return_value=None) as mock_get_stored:
+        with pytest.raises(IdempotencyInProgress):
+            claim_key(user, 'chave-5', 'h')
+
+    assert mock_get_stored.call_count == 2
+
+
+def test_purge_expired_keys_in_bulk(user):
+    now = timezone.now()
+    for i in range(5):
+        IdempotencyKeyModel.objects.create(user=user, key=f'old-{i}', request_hash='h', expires_at=now - timedelta(minutes=1))
+    IdempotencyKeyModel.objects.create(user=user, key='fresh', request_hash='h', expires_at=now + timedelta(hours=1))
+
+    assert purge_expired_keys(batch_size=2) == 5
+    assert list(IdempotencyKeyModel.objects.values_list('key', flat=True)) == ['fresh']
+
+
+def test_purge_idempotency_keys_command(user):
+    IdempotencyKeyModel.objects.create(user=user, key='old', request_hash='h', expires_at=timezone.now() - timedelta(minutes=1))
+
+    call_command('purge_idempotency_keys')
+
+    assert not IdempotencyKeyModel.objects.exists()
@@ -4,17 +4,27 @@ import requests
 from unittest.mock import MagicMock, patch
 
 from orders.services.melhor_envio import (
+    build_label_cart_payload,
     calculate_total_weight,
     calculate_shipping_with_melhor_envio,
-    DEFAULT_PACKAGE_DIMENSIONS,
 )
+from orders.services.packing import DEFAULT_BOOK_DIMENSIONS
+from orders.services.shipping_label_queue import _load_orders_for_labels
+from orders.models import OrderModel, OrderItemModel, ShippingLabelJobModel
+from addresses.models import AddressModel
+from django.contrib.auth.models import User
 from books.models.book_model import BookModel
 
+pytestmark = pytest.mark.django_db
+
+
+def make_book(weight_g, title='Livro', **dimensions):
+    return BookModel.objects.create(title=title, price=Decimal('10.00'), weight_g=weight_g, **dimensions)
+
 
 @pytest.fixture
-def mock_book_model():
-    with patch('books.models.book_model.BookModel.objects.get') as mock_get:
-        yield mock_get
+def book_500g():
+    return make_book(Decimal('500'))
 
 
 @pytest.fixture
@@ -31,63 +41,138 @@ def mock_config():
 
 @pytest.fixture
 def mock_requests_post():
-    with patch('requests.post') as mock_post:
+    with patch('common.http_client.post') as mock_post:
         yield mock_post
 
 
+@pytest.fixture
+def user():
+    user = User.objects.create_user(username='shipper', email='shipper@example.com')
+    user.profile.cpf = '123.456.789-00'
+    user.profile.phone_number = '+5511999999999'
+    user.profile.save()
+    return user
+
+
+def make_order(user, books):
+    address = AddressModel.objects.create(user=user, zip_code='12345-678', street='Rua', number='1', city='Cidade', state='SC')
+    order = OrderModel.objects.create(
+        user=user, address=address, status=OrderModel.OrderStatus.PROCESSING,
+        total_items_price=Decimal('10.00'), shipping_cost=Decimal('5.00'), shipping_service_id=1
+    )
+    OrderItemModel.objects.bulk_create([
+        OrderItemModel(order=order, book=book, book_title_snapshot=book.title, quantity=2, price_at_purchase=book.price)
+        for book in books
+    ])
+    return order
+
+
 # Tests for calculate_total_weight
-def test_calculate_total_weight_empty_cart():
+def test_calculate_total_weight_empty_cart(django_assert_num_queries):
     cart_items = []
-    assert calculate_total_weight(cart_items) == Decimal('0')
+    with django_assert_num_queries(0):
+        assert calculate_total_weight(cart_items) == Decimal('0')
 
 
-def test_calculate_total_weight_single_item_with_weight(mock_book_model):
-    mock_book_model.return_value = MagicMock(weight_g=Decimal('500'))
-    cart_items = [{'book_id': 1, 'quantity': 2}]
+def test_calculate_total_weight_single_item_with_weight(book_500g):
+    cart_items = [{'book_id': book_500g.pk, 'quantity': 2}]
     assert calculate_total_weight(cart_items) == Decimal('1.0')
 
 
-def test_calculate_total_weight_multiple_items_with_weight(mock_book_model):
-    mock_book_model.side_effect = [
-        MagicMock(weight_g=Decimal('250')),
-        MagicMock(weight_g=Decimal('750')),
-    ]
-    cart_items = [{'book_id': 1, 'quantity': 2}, {'book_id': 2, 'quantity': 1}]
+def test_calculate_total_weight_multiple_items_with_weight():
+    book_a, book_b = make_book(Decimal('250')), make_book(Decimal('750'))
+    cart_items = [{'book_id': book_a.pk, 'quantity': 2}, {'book_id': book_b.pk, 'quantity': 1}]
     # (250 * 2) + (750 * 1) = 500 + 750 = 1250g = 1.25kg
     assert calculate_total_weight(cart_items) == Decimal('1.25')
 
 
-def test_calculate_total_weight_item_without_weight(mock_book_model):
-    mock_book_model.return_value = MagicMock(weight_g=None)
-    cart_items = [{'book_id': 1, 'quantity': 1}]
+def test_calculate_total_weight_item_without_weight():
+    book = make_book(None)
+    cart_items = [{'book_id': book.pk, 'quantity': 1}]
     assert calculate_total_weight(cart_items) == Decimal('0')
 
 
-def test_calculate_total_weight_mixed_items(mock_book_model):
-    mock_book_model.side_effect = [
-        MagicMock(weight_g=Decimal('300')),
-        MagicMock(weight_g=None),
-        MagicMock(weight_g=Decimal('100')),
-    ]
+def test_calculate_total_weight_mixed_items():
+    book_a, book_b, book_c = make_book(Decimal('300')), make_book(None), make_book(Decimal('100'))
     cart_items = [
-        {'book_id': 1, 'quantity': 2},  # 300g * 2 = 600g
-        {'book_id': 2, 'quantity': 1},  # No weight
-        {'book_id': 3, 'quantity': 5},  # 100g * 5 = 500g
+        {'book_id': str(book_a.pk), 'quantity': 2},  # 300g * 2 = 600g
+        {'book_id': str(book_b.pk), 'quantity': 1},  # No weight
+        {'book_id': str(book_c.pk), 'quantity': 5},  # 100g * 5 = 500g
     ]
     # 600 + 0 + 500 = 1100g = 1.1kg
     assert calculate_total_weight(cart_items) == Decimal('1.1')
 
 
+def test_calculate_total_weight_missing_book():
+    with pytest.raises(ValueError, match='Livro não encontrado - ID 999'):
+        calculate_total_weight([{'book_id': 999, 'quantity': 1}])
+
+
+def test_calculate_total_weight_order_item_without_book(user):
+    order = make_order(user, [make_book(Decimal('200'))])
+    OrderItemModel.objects.create(order=order, book=None, book_title_snapshot='Removido', quantity=1, price_at_purchase=Decimal('1'))
+    assert calculate_total_weight(order.items.all()) == Decimal('0.4')
+
+
+# Query-count regressions: o número de queries não depende do tamanho do carrinho
+@pytest.mark.parametrize('cart_size', [1, 40])
+def test_calculate_total_weight_uses_one_query(django_assert_num_queries, cart_size):
+    books = [make_book(Decimal('100')) for _ in range(cart_size)]
+    cart_items = [{'book_id': book.pk, 'quantity': 1} for book in books]
+
+    with django_assert_num_queries(1) as captured:
+        calculate_total_weight(cart_items)
+
+    sql = captured.captured_queries[0]['sql']
+    assert 'weight_g' in sql
+    assert 'description' not in sql
+
+
+@pytest.mark.parametrize('cart_size', [1, 40])
+def test_calculate_shipping_queries_do_not_grow_with_cart(django_assert_num_queries, mock_config, mock_requests_post, cart_size):
+    mock_requests_post.return_value.json.return_value = [{'id': '1', 'name': 'Option A'}]
+    books = [make_book(Decimal('100')) for _ in range(cart_size)]
+    cart = {str(book.pk): {'quantity': 1} for book in books}
+
+    with django_assert_num_queries(1):
+        calculate_shipping_with_melhor_envio(cart, '98765-432')
+
+
+@pytest.mark.parametrize('cart_size', [1, 40])
+def test_build_label_payload_queries_do_not_grow_with_items(django_assert_num_queries, user, cart_size):
+    order = make_order(user, [make_book(Decimal('100'), title=f'Livro {i}') for i in range(cart_size)])
+    order = OrderModel.objects.select_related('user', 'address__user__profile').get(pk=order.pk)
+
+    # Uma query para os itens e uma para os livros
+    with django_assert_num_queries(2):
+        payload = build_label_cart_payload(order)
+
+    assert len(payload['products']) == cart_size
+    assert payload['products'][0]['name'] == 'Livro 0'
+    assert sum(volume['weight'] for volume in payload['volumes']) == pytest.approx(0.2 * cart_size)
+
+
+def test_label_batch_payloads_use_constant_queries(django_assert_num_queries, user):
+    orders = [make_order(user, [make_book(Decimal('100')) for _ in range(3)]) for _ in range(5)]
+    jobs = [ShippingLabelJobModel.objects.create(order=order) for order in orders]
+
+    # Pedidos (com destinatario), itens e livros: três queries para o lote inteiro
+    with django_assert_num_queries(3):
+        _load_orders_for_labels(jobs)
+        payloads = [build_label_cart_payload(job.order) for job in jobs]
+
+    assert all(len(payload['products']) == 3 for payload in payloads)
+
+
 # Tests for calculate_shipping_with_melhor_envio
-def test_calculate_shipping_success(mock_config, mock_requests_post, mock_book_model):
-    mock_book_model.return_value = MagicMock(weight_g=Decimal('500'))
+def test_calculate_shipping_success(mock_config, mock_requests_post, book_500g):
     mock_requests_post.return_value.json.return_value = [
         {'id': '1', 'name': 'Option A', 'price': 10.0},
         {'id': '2', 'name': 'Option B', 'price': 15.0},
     ]
     mock_requests_post.return_value.raise_for_status.return_value = None
 
-    cart = {'book_id_1': {'quantity': 1}}
+    cart = {str(book_500g.pk): {'quantity': 1}}
     zip_code = '98765-432'
     shipping_options = calculate_shipping_with_melhor_envio(cart, zip_code)
 
@@ -97,53 +182,49 @@ def test_calculate_shipping_success(mock_config, mock_requests_post, mock_book_m
     args, kwargs = mock_requests_post.call_args
     assert kwargs['json']['to']['postal_code'] == zip_code
     assert kwargs['json']['package']['weight'] == 0.5  # 500g / 1000 = 0.5kg
-    assert kwargs['json']['package']['width'] == DEFAULT_PACKAGE_DIMENSIONS['width']
+    assert kwargs['json']['package']['width'] == DEFAULT_BOOK_DIMENSIONS['width']
 
 
-def test_calculate_shipping_no_options_found(mock_config, mock_requests_post, mock_book_model):
-    mock_book_model.return_value = MagicMock(weight_g=Decimal('500'))
+def test_calculate_shipping_no_options_found(mock_config, mock_requests_post, book_500g):
     mock_requests_post.return_value.json.return_value = [
         {'error': 'Some error', 'id': 'error_id'}
     ]  # Simulate only error options
     mock_requests_post.return_value.raise_for_status.return_value = None
 
-    cart = {'book_id_1': {'quantity': 1}}
+    cart = {str(book_500g.pk): {'quantity': 1}}
     zip_code = '98765-432'
 
     with pytest.raises(Exception, match=f"Erro ao calcular Frete: Nenhuma op\u00e7\u00e3o de frete encontrada para este CEP - {zip_code}"):
         calculate_shipping_with_melhor_envio(cart, zip_code)
 
 
-def test_calculate_shipping_request_exception(mock_config, mock_requests_post, mock_book_model):
-    mock_book_model.return_value = MagicMock(weight_g=Decimal('500'))
+def test_calculate_shipping_request_exception(mock_config, mock_requests_post, book_500g):
     mock_requests_post.side_effect = requests.RequestException("Network error")
 
-    cart = {'book_id_1': {'quantity': 1}}
+    cart = {str(book_500g.pk): {'quantity': 1}}
     zip_code = '98765-432'
 
     with pytest.raises(Exception, match='Falha na requisição da API Melhor Envio: Network error'):
         calculate_shipping_with_melhor_envio(cart, zip_code)
 
 
-def test_calculate_shipping_general_exception(mock_config, mock_requests_post, mock_book_model):
-    mock_book_model.return_value = MagicMock(weight_g=Decimal('500'))
+def test_calculate_shipping_general_exception(mock_config, mock_requests_post, book_500g):
     mock_requests_post.return_value.json.side_effect = Exception("Invalid JSON")
 
-    cart = {'book_id_1': {'quantity': 1}}
+    cart = {str(book_500g.pk): {'quantity': 1}}
     zip_code = '98765-432'
 
     with pytest.raises(Exception, match='Erro ao calcular Frete: Invalid JSON'):
         calculate_shipping_with_melhor_envio(cart, zip_code)
 
 
-def test_calculate_shipping_with_shipping_option_in_cart(mock_config, mock_requests_post, mock_book_model):
-    mock_book_model.return_value = MagicMock(weight_g=Decimal('500'))
+def test_calculate_shipping_with_shipping_option_in_cart(mock_config, mock_requests_post, book_500g):
     mock_requests_post.return_value.json.return_value = [
         {'id': '1', 'name': 'Option A', 'price': 10.0},
     ]
     mock_requests_post.return_value.raise_for_status.return_value = None
 
-    cart = {'book_id_1': {'quantity': 1}, 'shipping_option': 'some_option_id'}
+    cart = {str(book_500g.pk): {'quantity': 1}, 'shipping_option': 'some_option_id'}
     zip_code = '98765-432'
     shipping_options = calculate_shipping_with_melhor_envio(cart, zip_code)
 
@@ -153,3 +234,36 @@ def test_calculate_shipping_with_shipping_option_in_cart(mock_config, mock_reque
     args, kwargs = mock_requests_post.call_args
     assert 'shipping_option' not in kwargs['json']['package']
     assert kwargs['json']['package']['weight'] == 0.5
+
+
+def test_calculate_shipping_sends_packed_dimensions(mock_config, mock_requests_post):
+    mock_requests_post.return_value.json.return_value = [{'id': '1', 'name': 'Option A'}]
+    book = make_book(Decimal('420'), height_cm=Decimal('23'), width_cm=Decimal('16'), length_cm=Decimal('2'))
+
+    calculate_shipping_with_melhor_envio({str(book.pk): {'quantity': 3}}, '98765-432')
+
+    package = mock_requests_post.call_args.kwargs['json']['package']
+    assert package == {'width': 16, 'height': 6, 'length': 23, 'weight': 1.3}
+
+
+def test_calculate_shipping_sends_one_product_per_volume(mock_config, mock_requests_post):
+    mock_requests_post.return_value.json.return_value = [{'id': '1', 'name': 'Option A'}]
+    book = make_book(Decimal('500'), height_cm=Decimal('23'), width_cm=Decimal('16'), length_cm=Decimal('3'))
+
+    calculate_shipping_with_melhor_envio({str(book.pk): {'quantity': 50}}, '98765-432')
+
+    body = mock_requests_post.call_args.kwargs['json']
+    assert 'package' not in body
+    assert len(body['products']) == 2
+    assert all(product['quantity'] == 1 for product in body['products'])
+
+
+def test_label_payload_sends_multiple_volumes(user):
+    book = make_book(Decimal('1000'), height_cm=Decimal('23'), width_cm=Decimal('16'), length_cm=Decimal('1'))
+    order = make_order(user, [book])
+    order.items.update(quantity=40)
+
+    volumes = build_label_cart_payload(order)['volumes']
+
+    assert len(volumes) == 2
+    assert sum(volume['weight'] for volume in volumes) == pytest.approx(40)
@@ -0,0 +1,110 @@
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from addresses.models import AddressModel
+from books.models import BookModel
+from orders.models import OrderModel, OrderItemModel
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username='testuser', password='password123')
+
+@pytest.fixture
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+@pytest.fixture
+def book(db):
+    return BookModel.objects.create(title='Test Book', price=50.00, stock=10)
+
+@pytest.fixture
+def address(db, user):
+    return AddressModel.objects.create(user=user, street='123 Test St', city='Testville', zip_code='12345')
+
+@pytest.fixture
+def order(db, user, address, book):
+    order = OrderModel.objects.create(user=user, address=address, total_items_price=50.00, shipping_cost=15.00)
+    OrderItemModel.objects.create(order=order, book=book, quantity=1, price_at_purchase=50.00)
+    return order
+
+
+def test_unchanged_list_returns_304_without_serializing(api_client, order, django_assert_num_queries):
+    url = reverse('order-api-list')
+    etag = api_client.get(url)['ETag']
+
+    # Só o aggregate que monta o ETag
+    with django_assert_num_queries(1):
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response['ETag'] == etag
+
+
+def test_detail_sends_last_modified(api_client, order):
+    url = reverse('order-api-detail', kwargs={'pk': order.pk})
+    response = api_client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response['ETag']
+    assert response['Last-Modified']
+
+    response = api_client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.parametrize('change', ['status', 'address', 'stock'])
+def test_nested_changes_change_the_etag(api_client, order, address, book, change):
+    url = reverse('order-api-detail', kwargs={'pk': order.pk})
+    etag = api_client.get(url)['ETag']
+
+    if change == 'status':
+        order.status = OrderModel.OrderStatus.CANCELED
+        order.save()
+    elif change == 'address':
+        address.street = '456 Outra Rua'
+        address.save()
+    else:
+        book.stock = 3
+        book.save(update_fields=['stock', 'updated_at'])
+
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response['ETag'] != etag
+
+
+def test_unrelated_catalog_changes_keep_the_etag(api_client, order, django_capture_on_commit_callbacks):
+    url = reverse('order-api-detail', kwargs={'pk': order.pk})
+    etag = api_client.get(url)['ETag']
+
+    with django_capture_on_commit_callbacks(execute=True):
+        BookModel.objects.create(title='Outro Livro', price=20.00, stock=3)
+
+    assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+
+def test_etag_is_per_user(api_client, order):
+    url = reverse('order-api-list')
+    etag = api_client.get(url)['ETag']
+    api_client.force_authenticate(user=User.objects.create_user(username='other', password='password123'))
+
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['results'] == []
+
+
+def test_other_users_order_is_still_404(api_client, order):
+    api_client.force_authenticate(user=User.objects.create_user(username='other', password='password123'))
+
+    response = api_client.get(reverse('order-api-detail', kwargs={'pk': order.pk}))
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert 'ETag' not in response
@@ -0,0 +1,106 @@
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from orders.services.packing import (
+    DEFAULT_BOOK_DIMENSIONS,
+    MAX_VOLUME_SIDE_CM,
+    MAX_VOLUME_SUM_CM,
+    MAX_VOLUME_WEIGHT_KG,
+    _pack_composition,
+    pack_shipping_items,
+)
+from orders.services.shipping_items import ShippingItem
+
+
+def book(height=None, width=None, length=None, weight=None):
+    def to_decimal(value):
+        return Decimal(str(value)) if value is not None else None
+    return SimpleNamespace(
+        height_cm=to_decimal(height), width_cm=to_decimal(width),
+        length_cm=to_decimal(length), weight_g=to_decimal(weight)
+    )
+
+
+def assert_within_limits(volume):
+    assert max(volume.length, volume.width, volume.height) <= MAX_VOLUME_SIDE_CM
+    assert volume.length + volume.width + volume.height <= MAX_VOLUME_SUM_CM
+    assert volume.weight_kg <= MAX_VOLUME_WEIGHT_KG
+
+
+def test_empty_cart_has_no_volumes():
+    assert pack_shipping_items([]) == ()
+
+
+def test_single_book_uses_its_own_dimensions():
+    volumes = pack_shipping_items([ShippingItem(book(23, 16, 2.5, 350), 1)])
+
+    assert len(volumes) == 1
+    volume = volumes[0]
+    assert (volume.length, volume.width, volume.height) == (23, 16, 3)
+    assert volume.weight_kg == 0.35
+    assert volume.cubic_weight_kg == round(23 * 16 * 3 / 6000, 3)
+    assert volume.as_payload() == {'width': 16, 'height': 3, 'length': 23, 'weight': 0.35}
+
+
+def test_books_are_stacked_into_one_volume():
+    volumes = pack_shipping_items([
+        ShippingItem(book(23, 16, 2, 300), 3),
+        ShippingItem(book(21, 14, 1.5, 200), 2),
+    ])
+
+    assert len(volumes) == 1
+    volume = volumes[0]
+    assert (volume.length, volume.width, volume.height) == (23, 16, 9)
+    assert volume.weight_kg == 1.3
+    assert volume.books == 5
+
+
+def test_book_without_dimensions_uses_default_box():
+    volume, = pack_shipping_items([ShippingItem(book(weight=500), 1)])
+    assert volume.width == DEFAULT_BOOK_DIMENSIONS['width']
+    assert volume.length == DEFAULT_BOOK_DIMENSIONS['height']
+
+
+def test_small_book_is_raised_to_minimum_box():
+    volume, = pack_shipping_items([ShippingItem(book(10, 8, 0.5, 80), 1)])
+    assert (volume.length, volume.width, volume.height) == (16, 11, 2)
+
+
+def test_tall_stack_is_split_by_side_limit():
+    volumes = pack_shipping_items([ShippingItem(book(23, 16, 3, 500), 50)])
+
+    assert len(volumes) == 2
+    assert sum(volume.books for volume in volumes) == 50
+    for volume in volumes:
+        assert_within_limits(volume)
+
+
+def test_heavy_cart_is_split_by_weight_limit():
+    volumes = pack_shipping_items([ShippingItem(book(23, 16, 1, 1000), 40)])
+
+    assert len(volumes) == 2
+    assert sum(volume.weight_kg for volume in volumes) == pytest.approx(40)
+    for volume in volumes:
+        assert_within_limits(volume)
+
+
+def test_oversized_book_still_ships_alone():
+    volumes = pack_shipping_items([
+        ShippingItem(book(120, 80, 10, 5000), 1),
+        ShippingItem(book(23, 16, 2, 300), 1),
+    ])
+    assert len(volumes) == 2
+
+
+def test_packing_is_memoized_by_cart_composition():
+    items = [ShippingItem(book(23, 16, 2, 300), 2), ShippingItem(book(21, 14, 1, 200), 1)]
+    same_cart_other_order = [ShippingItem(book(21, 14, 1, 200), 1), ShippingItem(book(23, 16, 2, 300), 2)]
+
+    first = pack_shipping_items(items)
+    hits = _pack_composition.cache_info().hits
+    second = pack_shipping_items(same_cart_other_order)
+
+    assert second is first
+    assert _pack_composition.cache_info().hits == hits + 1
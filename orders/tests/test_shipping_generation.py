@@ -1,101 +1,125 @@
-
 import pytest
 from unittest.mock import MagicMock, patch
 from decimal import Decimal
+from datetime import timedelta
 import requests
 import re
 
-from orders.services.melhor_envio import generate_shipping_label_service
-from orders.models import OrderModel, OrderItemModel
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from orders.services.melhor_envio import MelhorEnvioError, add_order_to_melhor_envio_cart
+from orders.services.melhor_envio_stub import MelhorEnvioStubServer
+from orders.services.shipping_label_queue import (
+    enqueue_shipping_label,
+    enqueue_shipping_labels,
+    run_pending_jobs,
+    backoff_delay,
+    MAX_ATTEMPTS,
+)
+from orders.models import OrderModel, OrderItemModel, ShippingLabelJobModel
 from django.contrib.auth.models import User
 from addresses.models import AddressModel
 from books.models.book_model import BookModel
 
-@pytest.mark.django_db
-def test_generate_shipping_label_happy_path(mocker):
-    """
-    Testa o caminho feliz da geração de etiqueta de envio.
-    """
-    # Mocks
-    mock_requests_post = mocker.patch('requests.post')
-    mock_requests_get = mocker.patch('requests.get')
-    mocker.patch('time.sleep', return_value=None)  # Evita a espera real
-
-    # Configuração das respostas mockadas da API
-    mock_cart_response = MagicMock()
-    mock_cart_response.status_code = 200
-    mock_cart_response.json.return_value = {'id': 'test-order-id'}
-
-    mock_checkout_response = MagicMock()
-    mock_checkout_response.status_code = 200
-
-    mock_generate_response = MagicMock()
-    mock_generate_response.status_code = 200
-
-    mock_order_details_response = MagicMock()
-    mock_order_details_response.status_code = 200
-    mock_order_details_response.json.return_value = {'tracking': 'TEST-TRACKING-123'}
-
-    # Define a sequência de respostas para as chamadas POST e GET
-    mock_requests_post.side_effect = [
-        mock_cart_response, 
-        mock_checkout_response, 
-        mock_generate_response
-    ]
-    mock_requests_get.return_value = mock_order_details_response
+pytestmark = pytest.mark.django_db
 
-    # Dados de teste
-    user = User.objects.create_user(username='testuser', email='test@example.com', password='password')
+
+@pytest.fixture
+def user():
+    user = User.objects.create_user(username='testuser', email='test@example.com', password='password', is_staff=True)
     user.profile.cpf = '123.456.789-00'
     user.profile.phone_number = '+5511999999999'
     user.profile.save()
+    return user
+
+
+@pytest.fixture
+def order(user):
     address = AddressModel.objects.create(user=user, zip_code='12345-678', street='Test Street', number='123', city='Test City', state='TS')
     book = BookModel.objects.create(title='Test Book', price=Decimal('29.90'), weight_g=Decimal('200'))
-    
     order = OrderModel.objects.create(
-        user=user, 
-        address=address, 
+        user=user,
+        address=address,
+        status=OrderModel.OrderStatus.PROCESSING,
         total_items_price=Decimal('29.90'),
-        shipping_cost=Decimal('5.00'), # Adicionado custo de frete para o teste
+        shipping_cost=Decimal('5.00'),
         shipping_service_id=1 # ID do serviço de frete (ex: PAC)
     )
     OrderItemModel.objects.create(order=order, book=book, quantity=1, price_at_purchase=book.price)
+    return order
+
+
+@pytest.fixture
+def melhor_envio_stub(monkeypatch):
+    with MelhorEnvioStubServer() as stub:
+        monkeypatch.setenv('ME_SANDBOX_URL', stub.url)
+        yield stub
+
+
+def _make_order(user, address, book):
+    order = OrderModel.objects.create(
+        user=user, address=address, status=OrderModel.OrderStatus.PROCESSING,
+        total_items_price=book.price, shipping_cost=Decimal('5.00'), shipping_service_id=1
+    )
+    OrderItemModel.objects.create(order=order, book=book, quantity=1, price_at_purchase=book.price)
+    return order
+
+
+def _make_due(job):
+    ShippingLabelJobModel.objects.filter(pk=job.pk).update(next_run_at=timezone.now() - timedelta(seconds=1))
+
+
+def test_generate_shipping_label_happy_path(mocker, order, melhor_envio_stub):
+    """
+    Testa o caminho feliz: o job envia o pedido ao Melhor Envio e, em uma execução posterior, obtém o rastreio.
+    """
+    sleep = mocker.patch('time.sleep')
+
+    job = enqueue_shipping_label(order)
+    assert run_pending_jobs() == 1
 
-    # Execução
-    updated_order = generate_shipping_label_service(order)
+    job.refresh_from_db()
+    assert job.status == ShippingLabelJobModel.JobStatus.WAITING_TRACKING
+    assert melhor_envio_stub.count('/api/v2/me/cart') == 1
+    assert melhor_envio_stub.count('/api/v2/me/shipment/checkout') == 1
+    assert melhor_envio_stub.count('/api/v2/me/shipment/generate') == 1
+    assert melhor_envio_stub.count('/api/v2/me/shipment/tracking') == 0
 
-    # Asserções
-    assert updated_order.status == OrderModel.OrderStatus.SHIPPED
-    assert updated_order.melhor_envio_order_id == 'test-order-id'
-    assert updated_order.tracking_code == 'TEST-TRACKING-123'
-    
-    # Verifica se o order.save() foi chamado corretamente
+    _make_due(job)
+    assert run_pending_jobs() == 1
+
+    job.refresh_from_db()
     order.refresh_from_db()
+    assert job.status == ShippingLabelJobModel.JobStatus.DONE
     assert order.status == OrderModel.OrderStatus.SHIPPED
-    assert order.tracking_code == 'TEST-TRACKING-123'
+    assert order.melhor_envio_order_id in melhor_envio_stub.orders
+    assert order.tracking_code == melhor_envio_stub.orders[order.melhor_envio_order_id]['tracking']
+    sleep.assert_not_called()
 
 
-@pytest.mark.django_db
-def test_generate_shipping_label_missing_service_id():
+def test_generate_shipping_label_missing_service_id(user):
     """
     Testa se um ValueError é levantado se o ID do serviço de frete não for fornecido.
     """
-    user = User.objects.create_user(username='testuser', email='test@example.com', password='password')
-    user.profile.cpf = '123.456.789-00'
-    user.profile.phone_number = '+5511999999999'
-    user.profile.save()
     order = OrderModel.objects.create(
-    user=user, 
-    total_items_price=Decimal('50.00'), 
-    shipping_cost=Decimal('0.00'),
-    shipping_service_id=None
+        user=user,
+        total_items_price=Decimal('50.00'),
+        shipping_cost=Decimal('0.00'),
+        shipping_service_id=None
     )
 
     with pytest.raises(ValueError, match='O pedido deve conter um servico de frete selecionado'):
-        generate_shipping_label_service(order)
+        enqueue_shipping_label(order)
+
+
+def test_enqueue_reuses_active_job(order):
+    assert enqueue_shipping_label(order) == enqueue_shipping_label(order)
+    assert ShippingLabelJobModel.objects.count() == 1
 
 
-@pytest.mark.django_db
 @pytest.mark.parametrize(
     "status_code, error_json, expected_message",
     [
@@ -104,53 +128,216 @@ def test_generate_shipping_label_missing_service_id():
         (500, {'error': 'Internal Server Error'}, "Erro de validação do Melhor Envio: ")
     ]
 )
-def test_generate_shipping_label_api_error(mocker, status_code, error_json, expected_message):
+def test_generate_shipping_label_api_error(mocker, order, status_code, error_json, expected_message):
     """
     Testa o tratamento de diferentes erros HTTP da API.
     """
-    mock_requests_post = mocker.patch('requests.post')
+    mock_requests_post = mocker.patch('common.http_client.post')
     mock_response = MagicMock()
     mock_response.status_code = status_code
     mock_response.json.return_value = error_json
     mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=mock_response)
     mock_requests_post.return_value = mock_response
 
-    user = User.objects.create_user(username='testuser', email='test@example.com', password='password')
-    user.profile.cpf = '123.456.789-00'
-    user.profile.phone_number = '+5511999999999'
-    user.profile.save()
-    address = AddressModel.objects.create(user=user, zip_code='12345-678', city='Test City', state='TS')
-    order = OrderModel.objects.create(user=user, address=address, total_items_price=Decimal('10.00'), shipping_cost=Decimal('2.00'), shipping_service_id=1)
-
     with pytest.raises(Exception, match=expected_message):
-        generate_shipping_label_service(order)
+        add_order_to_melhor_envio_cart(order)
+
 
+def test_non_json_api_error_uses_the_response_text(mocker, order, caplog):
+    mock_response = MagicMock(status_code=502, text='<html>502 Bad Gateway</html>')
+    mock_response.json.side_effect = requests.exceptions.JSONDecodeError('Expecting value', '<html>', 0)
+    mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=mock_response)
+    mocker.patch('common.http_client.post', return_value=mock_response)
 
-@pytest.mark.django_db
-def test_generate_shipping_label_no_tracking_code(mocker):
+    with pytest.raises(MelhorEnvioError, match='502 Bad Gateway') as error:
+        add_order_to_melhor_envio_cart(order)
+
+    assert error.value.status_code == 502
+    assert '502 Bad Gateway' in caplog.text
+
+
+def test_api_error_is_retried_with_backoff(mocker, order):
+    mock_response = MagicMock(status_code=500)
+    mock_response.json.return_value = {'error': 'Internal Server Error'}
+    mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=mock_response)
+    mocker.patch('common.http_client.post', return_value=mock_response)
+
+    job = enqueue_shipping_label(order)
+    run_pending_jobs()
+
+    job.refresh_from_db()
+    assert job.status == ShippingLabelJobModel.JobStatus.PENDING
+    assert job.attempts == 1
+    assert 'Erro de validação do Melhor Envio' in job.last_error
+    assert job.next_run_at > timezone.now()
+    assert job.locked_until is None
+
+
+def test_generate_shipping_label_no_tracking_code(order, melhor_envio_stub):
     """
-    Testa o caso onde a API não retorna o código de rastreamento após a espera.
+    Testa o caso onde a API nunca retorna o código de rastreamento: o job é reagendado
+    com backoff exponencial e falha ao atingir o limite de tentativas.
     """
-    # Mocks (semelhante ao happy path, mas sem 'tracking' na resposta final)
-    mock_requests_post = mocker.patch('requests.post')
-    mock_requests_get = mocker.patch('requests.get')
-    mocker.patch('time.sleep', return_value=None)
+    melhor_envio_stub.tracking_after_polls = MAX_ATTEMPTS + 1
 
-    mock_cart_response = MagicMock()
-    mock_cart_response.json.return_value = {'id': 'test-order-id'}
-    mock_requests_post.side_effect = [mock_cart_response, MagicMock(), MagicMock()]
+    job = enqueue_shipping_label(order)
+    run_pending_jobs()
 
-    mock_order_details_response = MagicMock()
-    mock_order_details_response.json.return_value = {'status': 'released'} # Sem a chave 'tracking'
-    mock_requests_get.return_value = mock_order_details_response
+    for _ in range(MAX_ATTEMPTS):
+        _make_due(job)
+        run_pending_jobs()
 
-    user = User.objects.create_user(username='testuser', email='test@example.com', password='password')
-    user.profile.cpf = '123.456.789-00'
-    user.profile.phone_number = '+5511999999999'
-    user.profile.save()
-    address = AddressModel.objects.create(user=user, zip_code='12345-678', city='Test City', state='TS')
-    order = OrderModel.objects.create(user=user, address=address, total_items_price=Decimal('10.00'), shipping_cost=Decimal('2.00'), shipping_service_id=1)
+    job.refresh_from_db()
+    order.refresh_from_db()
+    assert job.status == ShippingLabelJobModel.JobStatus.FAILED
+    assert job.attempts == MAX_ATTEMPTS
+    assert job.last_error == 'Código de rastreamento não encontrado na resposta da API após aguardar.'
+    assert melhor_envio_stub.count('/api/v2/me/shipment/tracking') == MAX_ATTEMPTS
+    assert order.status == OrderModel.OrderStatus.PROCESSING
+
+
+def test_backoff_delay_is_exponential_and_capped():
+    assert backoff_delay(1) == 2 * backoff_delay(0)
+    assert backoff_delay(2) == 4 * backoff_delay(0)
+    assert backoff_delay(50) == backoff_delay(60)
+
+
+def test_ship_endpoint_enqueues_and_returns_202(order, user):
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+
+    with patch('common.http_client.post') as mock_post:
+        response = api_client.post(reverse('order-api-ship-order', kwargs={'pk': order.pk}))
+        mock_post.assert_not_called()
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.data['job_status'] == ShippingLabelJobModel.JobStatus.PENDING
+    assert ShippingLabelJobModel.objects.filter(order=order).exists()
+
+
+def test_batch_labels_use_one_checkout_generate_and_tracking_call(order, melhor_envio_stub, django_assert_max_num_queries):
+    orders = [order] + [_make_order(order.user, order.address, order.items.first().book) for _ in range(9)]
+    jobs, rejected = enqueue_shipping_labels(OrderModel.objects.filter(pk__in=[o.pk for o in orders]))
+    assert len(jobs) == 10 and rejected == {}
+
+    # +1 em relação ao fluxo sem progresso: o purchased_at é gravado logo após o checkout
+    with django_assert_max_num_queries(16):
+        assert run_pending_jobs(limit=50) == 10
+
+    assert melhor_envio_stub.count('/api/v2/me/cart') == 10
+    assert melhor_envio_stub.count('/api/v2/me/shipment/checkout') == 1
+    assert melhor_envio_stub.count('/api/v2/me/shipment/generate') == 1
+
+    ShippingLabelJobModel.objects.update(next_run_at=timezone.now() - timedelta(seconds=1))
+    assert run_pending_jobs(limit=50) == 10
+
+    assert melhor_envio_stub.count('/api/v2/me/shipment/tracking') == 1
+    assert OrderModel.objects.filter(status=OrderModel.OrderStatus.SHIPPED, tracking_code__isnull=False).count() == 10
+    assert not ShippingLabelJobModel.objects.exclude(status=ShippingLabelJobModel.JobStatus.DONE).exists()
+
+
+def test_one_invalid_order_does_not_fail_the_batch(order, melhor_envio_stub):
+    orders = [order] + [_make_order(order.user, order.address, order.items.first().book) for _ in range(9)]
+    invalid = orders[4]
+    # Pedido que o Melhor Envio não reconhece: o checkout em lote responde 422 para o lote inteiro
+    OrderModel.objects.filter(pk=invalid.pk).update(melhor_envio_order_id='pedido-invalido')
+    enqueue_shipping_labels(OrderModel.objects.filter(pk__in=[o.pk for o in orders]))
+
+    assert run_pending_jobs(limit=50) == 10
+
+    jobs = {job.order_id: job for job in ShippingLabelJobModel.objects.all()}
+    bad_job = jobs.pop(invalid.pk)
+    assert bad_job.status == ShippingLabelJobModel.JobStatus.PENDING
+    assert bad_job.attempts == 1 and bad_job.purchased_at is None
+    assert 'pedido-invalido' in bad_job.last_error
+    assert all(job.status == ShippingLabelJobModel.JobStatus.WAITING_TRACKING for job in jobs.values())
+    assert all(job.purchased_at and job.generated_at for job in jobs.values())
+    assert melhor_envio_stub.count('/api/v2/me/shipment/generate') == 1
+    assert [o['status'] for o in melhor_envio_stub.orders.values()] == ['generated'] * 9
+
+
+def test_generate_failure_after_checkout_does_not_pay_again(order, melhor_envio_stub):
+    melhor_envio_stub.fail_next('/api/v2/me/shipment/generate')
+
+    job = enqueue_shipping_label(order)
+    run_pending_jobs()
+
+    job.refresh_from_db()
+    assert job.status == ShippingLabelJobModel.JobStatus.PENDING
+    assert job.attempts == 1
+    assert job.purchased_at is not None and job.generated_at is None
+
+    _make_due(job)
+    run_pending_jobs()
+
+    job.refresh_from_db()
+    assert job.status == ShippingLabelJobModel.JobStatus.WAITING_TRACKING
+    assert job.generated_at is not None
+    assert melhor_envio_stub.count('/api/v2/me/shipment/checkout') == 1
+    assert melhor_envio_stub.count('/api/v2/me/shipment/generate') == 2
+
+
+def test_enqueue_shipping_labels_rejects_non_processing_orders(order):
+    delivered = _make_order(order.user, order.address, order.items.first().book)
+    delivered.status = OrderModel.OrderStatus.DELIVERED
+    delivered.save()
+
+    jobs, rejected = enqueue_shipping_labels(OrderModel.objects.all())
+
+    assert [job.order_id for job in jobs] == [order.pk]
+    assert list(rejected) == [delivered.pk]
+
+
+def test_ship_batch_endpoint(order, user):
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+
+    response = api_client.post(reverse('order-api-ship-batch'), data={'order_ids': [order.pk, 999999]}, format='json')
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert [job['order_id'] for job in response.data['jobs']] == [order.pk]
+    assert 999999 in response.data['rejected']
+
+
+def test_ship_batch_endpoint_accepts_string_ids(order, user):
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+
+    response = api_client.post(reverse('order-api-ship-batch'), data={'order_ids': [str(order.pk)]}, format='json')
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert [job['order_id'] for job in response.data['jobs']] == [order.pk]
+    assert response.data['rejected'] == {}
+
+
+@pytest.mark.parametrize('order_ids', [['abc'], [None], [True], [1.5], [{'id': 1}]])
+def test_ship_batch_endpoint_rejects_invalid_ids(order, user, order_ids):
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+
+    response = api_client.post(reverse('order-api-ship-batch'), data={'order_ids': order_ids}, format='json')
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert not ShippingLabelJobModel.objects.exists()
+
+
+def test_ship_batch_endpoint_requires_staff(order):
+    api_client = APIClient()
+    api_client.force_authenticate(user=User.objects.create_user(username='cliente'))
+
+    response = api_client.post(reverse('order-api-ship-batch'), data={'order_ids': [order.pk]}, format='json')
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_admin_bulk_action_enqueues_labels(client, order):
+    admin_user = User.objects.create_superuser(username='admin', password='password', email='admin@example.com')
+    client.force_login(admin_user)
 
-    with pytest.raises(Exception, match='Código de rastreamento não encontrado na resposta da API após aguardar.'):
-        generate_shipping_label_service(order)
+    response = client.post(reverse('admin:orders_ordermodel_changelist'), {
+        'action': 'generate_shipping_labels',
+        '_selected_action': [order.pk],
+    })
 
+    assert response.status_code == 302
+    assert ShippingLabelJobModel.objects.filter(order=order).exists()
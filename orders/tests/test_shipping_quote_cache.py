@@ -0,0 +1,118 @@
+import threading
+import time
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.cache import cache
+
+from books.models import BookModel
+from orders.services import shipping_quote_cache
+from orders.services.melhor_envio import calculate_shipping_with_melhor_envio
+from orders.services.shipping_quote_cache import (
+    bucket_weight_kg,
+    get_or_fetch_quote,
+    quote_cache_key,
+)
+
+PAYLOAD = {
+    'from': {'postal_code': '01001-000'},
+    'to': {'postal_code': '88000-000'},
+    'package': {'weight': 0.5, 'width': 16, 'height': 23, 'length': 5},
+}
+
+
+@pytest.fixture
+def mock_requests_post():
+    with patch('common.http_client.post') as mock_post:
+        mock_post.return_value.json.return_value = [{'id': 1, 'name': 'PAC', 'price': '20.00'}]
+        yield mock_post
+
+
+def make_book(weight_g):
+    return BookModel.objects.create(title='Livro', price=Decimal('10.00'), weight_g=Decimal(weight_g))
+
+
+def test_bucket_weight_rounds_up_to_bucket():
+    assert bucket_weight_kg(Decimal('0.42')) == 0.5
+    assert bucket_weight_kg(Decimal('0.5')) == 0.5
+    assert bucket_weight_kg(Decimal('0.501')) == 0.6
+    assert bucket_weight_kg(Decimal('0')) == 0
+
+
+def test_cache_key_ignores_zip_code_formatting():
+    same_zip = {**PAYLOAD, 'to': {'postal_code': '88000000'}}
+    other_zip = {**PAYLOAD, 'to': {'postal_code': '88000001'}}
+
+    assert quote_cache_key(PAYLOAD) == quote_cache_key(same_zip)
+    assert quote_cache_key(PAYLOAD) != quote_cache_key(other_zip)
+
+
+@pytest.mark.django_db
+def test_repeated_quote_is_served_from_cache(mock_requests_post):
+    cart = {str(make_book('420').pk): {'quantity': 1}}
+
+    first = calculate_shipping_with_melhor_envio(cart, '88000-000')
+    second = calculate_shipping_with_melhor_envio(cart, '88000000')
+
+    assert first == second
+    mock_requests_post.assert_called_once()
+    assert mock_requests_post.call_args.kwargs['json']['package']['weight'] == 0.5
+    assert mock_requests_post.call_args.kwargs['timeout']
+
+
+@pytest.mark.django_db
+def test_carts_in_the_same_weight_bucket_share_the_quote(mock_requests_post):
+    calculate_shipping_with_melhor_envio({str(make_book('420').pk): {'quantity': 1}}, '88000-000')
+    calculate_shipping_with_melhor_envio({str(make_book('480').pk): {'quantity': 1}}, '88000-000')
+
+    mock_requests_post.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_errors_are_not_cached(mock_requests_post):
+    cart = {str(make_book('500').pk): {'quantity': 1}}
+    mock_requests_post.return_value.json.side_effect = [[{'error': 'sem servico'}], [{'id': 1, 'name': 'PAC'}]]
+
+    with pytest.raises(Exception, match='Nenhuma opção de frete'):
+        calculate_shipping_with_melhor_envio(cart, '88000-000')
+
+    assert calculate_shipping_with_melhor_envio(cart, '88000-000') == [{'id': 1, 'name': 'PAC'}]
+
+
+def test_stale_quote_is_served_while_revalidating():
+    key = quote_cache_key(PAYLOAD)
+    cache.set(key, {'options': ['antiga'], 'fresh_until': time.time() - 1})
+    fetch = MagicMock(return_value=['nova'])
+
+    with patch.object(shipping_quote_cache, '_start_background', side_effect=lambda target: target()):
+        assert get_or_fetch_quote(PAYLOAD, fetch) == ['antiga']
+
+    fetch.assert_called_once()
+    assert get_or_fetch_quote(PAYLOAD, fetch) == ['nova']
+    fetch.assert_called_once()
+
+
+def test_concurrent_identical_quotes_are_coalesced():
+    calls = []
+
+    def slow_fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return ['PAC']
+
+    barrier = threading.Barrier(10)
+    results = []
+
+    def request_quote():
+        barrier.wait()
+        results.append(get_or_fetch_quote(PAYLOAD, slow_fetch))
+
+    threads = [threading.Thread(target=request_quote) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [['PAC']] * 10
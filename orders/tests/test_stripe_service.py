@@ -1,11 +1,14 @@
 import pytest
+from datetime import timedelta
 from decimal import Decimal
 from unittest.mock import patch, MagicMock
 
 import stripe
 from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.db import transaction, IntegrityError
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 
 from books.models import BookModel
 from addresses.models import AddressModel
@@ -16,6 +19,9 @@ from orders.services.stripe_service import (
     create_order_from_cart,
     refound_stripe_payment,
     cancel_order_service,
+    confirm_order_payment,
+    expire_pending_orders,
+    PaymentReconciliationRequired,
 )
 
 pytestmark = pytest.mark.django_db
@@ -121,10 +127,7 @@ def test_process_payment_with_stripe_not_succeeded(mock_create):
 
 # Tests for create_order_from_cart
 @patch('orders.services.stripe_service.process_payment_with_stripe')
-@patch('orders.services.stripe_service.get_object_or_404')
-def test_create_order_success(mock_get_object_or_404, mock_process_payment, user, cart, validated_data, book):
-    mock_get_object_or_404.return_value = book
-
+def test_create_order_success(mock_process_payment, user, cart, validated_data, book):
     mock_payment_intent = MagicMock(id='pi_12345_success', status='succeeded')
     mock_process_payment.return_value = mock_payment_intent
 
@@ -133,9 +136,45 @@ def test_create_order_success(mock_get_object_or_404, mock_process_payment, user
     assert order.status == OrderModel.OrderStatus.PROCESSING
     assert order.stripe_payment_intent_id == 'pi_12345_success'
     assert order.items.count() == 1
-    
-    
-    
+
+    book.refresh_from_db()
+    assert book.stock == 8
+
+
+@patch('orders.services.stripe_service.process_payment_with_stripe')
+def test_create_order_locks_all_books_in_one_query(mock_process_payment, user, validated_data, django_assert_max_num_queries):
+    mock_process_payment.return_value = MagicMock(id='pi_many_lines', status='succeeded')
+    books = [BookModel.objects.create(title=f'Livro {i}', price='10.00', stock=5) for i in range(30)]
+    cart = {
+        'items': {str(b.id): {'quantity': 1, 'price': '10.00', 'title': b.title} for b in books},
+        'shipping_option': {'name': 'PAC', 'price': '10.00'},
+    }
+
+    # Savepoints + INSERT pedido + bulk INSERT itens + 1 UPDATE condicional por livro + UPDATE status
+    with django_assert_max_num_queries(len(books) + 10) as captured:
+        create_order_from_cart(user=user, cart=cart, validated_data=validated_data)
+
+    book_selects = [
+        q['sql'] for q in captured.captured_queries
+        if q['sql'].startswith('SELECT') and 'books_bookmodel' in q['sql']
+    ]
+    assert len(book_selects) == 1
+
+    assert BookModel.objects.filter(stock=4).count() == 30
+
+
+def test_create_order_book_not_found(user, validated_data):
+    cart = {
+        'items': {'999999': {'quantity': 1, 'price': '10.00', 'title': 'Fantasma'}},
+        'shipping_option': {'name': 'PAC', 'price': '10.00'},
+    }
+
+    with pytest.raises(ValueError, match='Livro não encontrado'):
+        create_order_from_cart(user=user, cart=cart, validated_data=validated_data)
+
+    assert OrderModel.objects.count() == 0
+
+
 
 
 @patch('orders.services.stripe_service.process_payment_with_stripe')
@@ -145,12 +184,106 @@ def test_create_order_payment_fails(mock_process_payment, user, cart, validated_
     with pytest.raises(ValueError, match="Pagamento recusado pelo emissor."):
         create_order_from_cart(user=user, cart=cart, validated_data=validated_data)
 
-    assert OrderModel.objects.count() == 0
+    order = OrderModel.objects.get()
+    assert order.status == OrderModel.OrderStatus.FAILED
     
     book.refresh_from_db()
     assert book.stock == 10
 
 
+@pytest.mark.django_db(transaction=True)
+@patch('orders.services.stripe_service.process_payment_with_stripe')
+def test_create_order_calls_stripe_outside_transaction(mock_process_payment, user, cart, validated_data, book):
+    def fake_stripe(**kwargs):
+        # O estoque ja deve estar reservado e nenhum lock pode estar preso durante a chamada de rede
+        assert not transaction.get_connection().in_atomic_block
+        assert BookModel.objects.get(pk=book.pk).stock == 8
+        assert OrderModel.objects.get().status == OrderModel.OrderStatus.PENDING_PAYMENT
+        return MagicMock(id='pi_outside_tx', status='succeeded')
+
+    mock_process_payment.side_effect = fake_stripe
+
+    order = create_order_from_cart(user=user, cart=cart, validated_data=validated_data)
+
+    assert order.status == OrderModel.OrderStatus.PROCESSING
+    mock_process_payment.assert_called_once()
+
+
+@patch('orders.services.stripe_service.confirm_order_payment')
+@patch('orders.services.stripe_service.process_payment_with_stripe')
+def test_confirm_failure_after_charge_keeps_the_reservation(mock_process_payment, mock_confirm, user, cart, validated_data, book):
+    mock_process_payment.return_value = MagicMock(id='pi_charged', status='succeeded')
+    mock_confirm.side_effect = Exception('database is locked')
+
+    with pytest.raises(PaymentReconciliationRequired):
+        create_order_from_cart(user=user, cart=cart, validated_data=validated_data)
+
+    assert mock_confirm.call_count == 2
+    order = OrderModel.objects.get()
+    assert order.status == OrderModel.OrderStatus.PENDING_PAYMENT
+    assert order.stripe_payment_intent_id == 'pi_charged'
+    book.refresh_from_db()
+    assert book.stock == 8
+
+
+@patch('orders.services.stripe_service.process_payment_with_stripe')
+def test_confirm_is_retried_once_after_charge(mock_process_payment, user, cart, validated_data):
+    mock_process_payment.return_value = MagicMock(id='pi_retry', status='succeeded')
+
+    calls = []
+
+    def flaky_confirm(order, payment_intent):
+        calls.append(order.pk)
+        if len(calls) == 1:
+            raise Exception('deadlock detected')
+        return confirm_order_payment(order, payment_intent)
+
+    with patch('orders.services.stripe_service.confirm_order_payment', side_effect=flaky_confirm):
+        order = create_order_from_cart(user=user, cart=cart, validated_data=validated_data)
+
+    assert len(calls) == 2
+    order.refresh_from_db()
+    assert order.status == OrderModel.OrderStatus.PROCESSING
+    assert order.stripe_payment_intent_id == 'pi_retry'
+
+
+def _pending_order(user, address, book, quantity=2, payment_intent_id=None, minutes_ago=60):
+    order = OrderModel.objects.create(
+        user=user, address=address, total_items_price=Decimal('100.00'), shipping_cost=Decimal('25.00'),
+        stripe_payment_intent_id=payment_intent_id
+    )
+    OrderItemModel.objects.create(order=order, book=book, book_title_snapshot=book.title, quantity=quantity, price_at_purchase=book.price)
+    BookModel.objects.filter(pk=book.pk).update(stock=book.stock - quantity)
+    book.refresh_from_db()
+    OrderModel.objects.filter(pk=order.pk).update(updated_at=timezone.now() - timedelta(minutes=minutes_ago))
+    return order
+
+
+def test_expire_pending_orders_releases_stale_reservations(user, address, book):
+    stale = _pending_order(user, address, book, quantity=2)
+    fresh = _pending_order(user, address, book, quantity=1, minutes_ago=1)
+
+    assert expire_pending_orders(timeout_minutes=30) == (1, 0)
+
+    stale.refresh_from_db()
+    fresh.refresh_from_db()
+    book.refresh_from_db()
+    assert stale.status == OrderModel.OrderStatus.FAILED
+    assert fresh.status == OrderModel.OrderStatus.PENDING_PAYMENT
+    assert book.stock == 9
+
+
+def test_expire_pending_orders_confirms_charged_orders(user, address, book):
+    charged = _pending_order(user, address, book, payment_intent_id='pi_reconcile')
+
+    call_command('expire_pending_orders', timeout_minutes=30)
+
+    charged.refresh_from_db()
+    book.refresh_from_db()
+    assert charged.status == OrderModel.OrderStatus.PROCESSING
+    assert book.stock == 8
+
+
 def test_create_order_insufficient_stock(user, cart, validated_data, book):
     book.stock = 1
     book.save()
@@ -210,6 +343,23 @@ def test_cancel_order_success(mock_refound_payment, user, address, book):
     mock_refound_payment.assert_called_once_with('pi_12345_success')
 
 
+@patch('orders.services.stripe_service.refound_stripe_payment')
+def test_cancel_order_does_not_overwrite_concurrent_stock_changes(mock_refound_payment, user, address, book):
+    order = OrderModel.objects.create(
+        user=user, address=address, status=OrderModel.OrderStatus.PROCESSING,
+        stripe_payment_intent_id='pi_concurrent', total_items_price=100, shipping_cost=20
+    )
+    OrderItemModel.objects.create(order=order, book=book, quantity=2, price_at_purchase=50)
+    order = OrderModel.objects.prefetch_related('items__book').get(pk=order.pk)
+    # Outra venda baixa o estoque depois que os itens do pedido foram carregados
+    BookModel.objects.filter(pk=book.pk).update(stock=7)
+
+    cancel_order_service(order=order)
+
+    book.refresh_from_db()
+    assert book.stock == 9
+
+
 def test_cancel_order_no_payment_intent_id(user, address, book):
     order = OrderModel.objects.create(
         user=user, address=address, status=OrderModel.OrderStatus.PENDING_PAYMENT,
@@ -243,4 +393,44 @@ def test_cancel_order_refund_failure(mock_refound_payment, user, address, book):
     order.refresh_from_db()
     book.refresh_from_db()
     assert order.status == OrderModel.OrderStatus.PROCESSING # Status should not change
-    assert book.stock == 8 # Stock should still be reverted
\ No newline at end of file
+    assert book.stock == 8 # Stock should still be reverted
+
+
+@pytest.mark.django_db(transaction=True)
+@patch('orders.services.stripe_service.refound_stripe_payment')
+def test_cancel_order_calls_stripe_outside_transaction(mock_refound_payment, user, address, book):
+    order = OrderModel.objects.create(
+        user=user, address=address, status=OrderModel.OrderStatus.PROCESSING,
+        stripe_payment_intent_id='pi_outside_tx_cancel', total_items_price=100, shipping_cost=20
+    )
+    OrderItemModel.objects.create(order=order, book=book, quantity=2, price_at_purchase=50)
+
+    def fake_refund(payment_intent_id):
+        # O cancelamento já foi confirmado e nenhum lock pode estar preso durante a chamada de rede
+        assert not transaction.get_connection().in_atomic_block
+        assert OrderModel.objects.get(pk=order.pk).status == OrderModel.OrderStatus.CANCELED
+        assert BookModel.objects.get(pk=book.pk).stock == 12
+
+    mock_refound_payment.side_effect = fake_refund
+
+    cancel_order_service(order=order)
+
+    mock_refound_payment.assert_called_once_with('pi_outside_tx_cancel')
+
+
+@patch('orders.services.stripe_service.refound_stripe_payment')
+def test_cancel_order_twice_is_rejected(mock_refound_payment, user, address, book):
+    order = OrderModel.objects.create(
+        user=user, address=address, status=OrderModel.OrderStatus.PROCESSING,
+        stripe_payment_intent_id='pi_twice', total_items_price=100, shipping_cost=20
+    )
+    OrderItemModel.objects.create(order=order, book=book, quantity=2, price_at_purchase=50)
+    stale_copy = OrderModel.objects.get(pk=order.pk)
+    cancel_order_service(order=order)
+
+    with pytest.raises(ValueError, match='já foi cancelado'):
+        cancel_order_service(order=stale_copy)
+
+    book.refresh_from_db()
+    assert book.stock == 12
+    mock_refound_payment.assert_called_once()
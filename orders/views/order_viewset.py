@@ -1,24 +1,49 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from orders.models import OrderModel
+from django.db.models import Count, Max
+from common.conditional import conditional_response, make_etag
+from common.pagination import KeysetPagination
+from orders.models import OrderModel, IdempotencyKeyModel
 from orders.serializer import OrderReadSerializer, OrderCreateSerializer
-from orders.services.stripe_service import create_order_from_cart, cancel_order_service
-from orders.services.melhor_envio import generate_shipping_label_service
+from orders.services.stripe_service import create_order_from_cart, cancel_order_service, PaymentReconciliationRequired
+from orders.services.shipping_label_queue import enqueue_shipping_label, enqueue_shipping_labels
+from orders.services.idempotency import (
+    IDEMPOTENCY_HEADER,
+    IdempotencyConflict,
+    IdempotencyInProgress,
+    hash_request,
+    get_stored_response,
+    claim_key,
+    store_response,
+    release_key,
+    stripe_idempotency_key,
+)
 
 
 
+def _parse_order_ids(values: list) -> list:
+    """Ids inteiros ("12" e 12 são o mesmo pedido), sem repetição. Lança ValueError/TypeError para valores inválidos."""
+    order_ids = []
+    for value in values:
+        if isinstance(value, (bool, float)):
+            raise ValueError(value)
+        order_ids.append(int(value))
+    return list(dict.fromkeys(order_ids))
+
+
 class OrderViewSet(viewsets.ModelViewSet):
     queryset = OrderModel.objects.all()
     permission_classes = [permissions.IsAuthenticated]
     http_method_names = ['get', 'post', 'head', 'options']
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return self.request.user.orders.select_related(
             'address'
         ).prefetch_related(
             'items__book'
-        ).order_by('-created_at')
+        ).order_by('-created_at', '-id')
 
 
     def get_serializer_class(self):
@@ -27,7 +52,55 @@ class OrderViewSet(viewsets.ModelViewSet):
         return OrderReadSerializer
     
 
+    def _content_summary(self, queryset) -> dict:
+        # O pedido exibe o endereço e os livros (com estoque) aninhados: as alterações deles também contam
+        return queryset.aggregate(
+            count=Count('pk', distinct=True),
+            orders=Max('updated_at'),
+            books=Max('items__book__updated_at'),
+            addresses=Max('address__updated_at'),
+        )
+
+    def list(self, request, *args, **kwargs):
+        summary = self._content_summary(self.get_queryset())
+        etag = make_etag(request.user.pk, request.get_full_path(), *summary.values())
+        return conditional_response(request, etag, lambda: super(OrderViewSet, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            summary = self._content_summary(self.get_queryset().filter(pk=kwargs[self.lookup_field]))
+        except (TypeError, ValueError):
+            summary = {'count': 0}
+        if not summary['count']:
+            # 404 do próprio retrieve
+            return super().retrieve(request, *args, **kwargs)
+
+        last_modified = max(value for key, value in summary.items() if key != 'count' and value)
+        etag = make_etag(request.user.pk, request.get_full_path(), *summary.values())
+        return conditional_response(
+            request, etag, lambda: super(OrderViewSet, self).retrieve(request, *args, **kwargs), last_modified
+        )
+
     def create(self, request, *args, **kwargs):
+        idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+        request_hash = hash_request(request.data)
+
+        if idempotency_key:
+            if len(idempotency_key) > IdempotencyKeyModel._meta.get_field('key').max_length:
+                return Response({
+                    'detail': 'Idempotency-Key muito longa.'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            # Replay: devolve a resposta armazenada sem tocar em estoque ou Stripe
+            try:
+                record = get_stored_response(request.user, idempotency_key, request_hash)
+            except IdempotencyConflict as e:
+                return Response({'detail': str(e)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            except IdempotencyInProgress as e:
+                return Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
+            if record:
+                return Response(record.response_body, status=record.response_status)
+
         serializer = self.get_serializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
         validated_data = serializer.validated_data
@@ -37,28 +110,56 @@ class OrderViewSet(viewsets.ModelViewSet):
             return Response({
                 'detail': 'Seu carrinho esta vazio.'
             }, status=status.HTTP_400_BAD_REQUEST)
-    
+
+        record = None
+        if idempotency_key:
+            try:
+                record, created = claim_key(request.user, idempotency_key, request_hash)
+            except IdempotencyConflict as e:
+                return Response({'detail': str(e)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            except IdempotencyInProgress as e:
+                return Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
+            if not created:
+                return Response(record.response_body, status=record.response_status)
+
+        order = None
         try:
             order = create_order_from_cart(
                 user=request.user,
                 cart=cart,
-                validated_data=validated_data
+                validated_data=validated_data,
+                idempotency_key=stripe_idempotency_key(record) if record else None
             )
             del request.session['cart']
 
             read_serializer = OrderReadSerializer(order, context={'request': request})
-            return Response(read_serializer.data, status=status.HTTP_201_CREATED)
+            response = Response(read_serializer.data, status=status.HTTP_201_CREATED)
         
-        except (ValueError, Exception) as e:
-            return Response({
+        except PaymentReconciliationRequired as e:
+            # O cartão foi cobrado: o pedido existe (PENDING_PAYMENT) e será confirmado pelo expire_pending_orders
+            order = e.order
+            del request.session['cart']
+            response = Response(
+                OrderReadSerializer(order, context={'request': request}).data, status=status.HTTP_202_ACCEPTED
+            )
+
+        except ValueError as e:
+            # Recusa determinística (cartão recusado, estoque, frete): repetir daria o mesmo resultado, então é armazenada
+            response = Response({
                 'detail': str(e)
             }, status=status.HTTP_400_BAD_REQUEST)
-        
-        except IntegrityError as e:
-            return Response(
-                {"detail": "Erro ao salvar no banco: um valor é muito longo ou uma chave única foi duplicada."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+
+        except Exception as e:
+            # Falha transitória (rede, Stripe indisponível): nada é armazenado e a chave fica livre para a nova tentativa
+            if record:
+                release_key(record)
+            return Response({
+                'detail': str(e)
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        if record:
+            store_response(record, response.status_code, response.data, order=order)
+        return response
     
     @action(detail=True, methods=['post'], url_path='cancel')
     def cancel_order(self, request, pk=None):
@@ -89,11 +190,42 @@ class OrderViewSet(viewsets.ModelViewSet):
             })
         
         try:
-            updated_order = generate_shipping_label_service(order=order)
-            serializer = self.get_serializer(updated_order)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            job = enqueue_shipping_label(order=order)
+            return Response({
+                'detail': 'Geração da etiqueta agendada.',
+                'job_id': job.id,
+                'job_status': job.status,
+            }, status=status.HTTP_202_ACCEPTED)
         except Exception as e:
             return Response({
                 'detail': str(e)
             }, status=status.HTTP_400_BAD_REQUEST
-            )
\ No newline at end of file
+            )
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser], url_path='ship-batch')
+    def ship_batch(self, request):
+        order_ids = request.data.get('order_ids')
+        if not isinstance(order_ids, list) or not order_ids:
+            return Response({
+                'detail': "Campo 'order_ids' deve ser uma lista não vazia."
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            order_ids = _parse_order_ids(order_ids)
+        except (TypeError, ValueError):
+            return Response({
+                'detail': "Campo 'order_ids' deve conter apenas ids inteiros."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        orders = OrderModel.objects.filter(pk__in=order_ids)
+        jobs, rejected = enqueue_shipping_labels(orders)
+
+        found_ids = {order.pk for order in orders}
+        for order_id in order_ids:
+            if order_id not in found_ids:
+                rejected[order_id] = 'Pedido não encontrado.'
+
+        return Response({
+            'detail': f'{len(jobs)} etiquetas agendadas.',
+            'jobs': [{'order_id': job.order_id, 'job_id': job.id, 'job_status': job.status} for job in jobs],
+            'rejected': rejected,
+        }, status=status.HTTP_202_ACCEPTED)
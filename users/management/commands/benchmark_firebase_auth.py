@@ -0,0 +1,79 @@
+import statistics
+import time
+import uuid
+from unittest.mock import patch
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from google.auth import crypt, jwt
+from rest_framework.test import APIRequestFactory
+
+from users.services import backends, token_cache, user_resolution
+from users.services.backends import FirebaseAuthentication
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks FirebaseAuthentication with and without the verified token and user caches. '
+        'Tokens are real RS256 JWTs signed with a local key, so verification costs the same '
+        'signature check the Firebase SDK does (without the certificate download). '
+        'Creates a temporary user and removes it at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Authenticated requests per mode.')
+
+    def handle(self, *args, **options):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        signer = crypt.RSASigner.from_string(
+            private_key.private_bytes(
+                serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+            ),
+            key_id='benchmark'
+        )
+        public_key = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+
+        uid = f'benchmark-auth-{uuid.uuid4().hex[:8]}'
+        now = int(time.time())
+        token = jwt.encode(signer, {'uid': uid, 'sub': uid, 'name': 'Benchmark User', 'iat': now, 'exp': now + 3600}).decode()
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        def verify_id_token(id_token, check_revoked=False):
+            return jwt.decode(id_token, certs={'benchmark': public_key}, verify=True)
+
+        authentication = FirebaseAuthentication()
+        try:
+            with patch.object(backends.firebase_auth, 'verify_id_token', verify_id_token):
+                for mode, cache_seconds in (('no cache', 0), ('cached', 300)):
+                    with patch.object(token_cache, 'TOKEN_CACHE_SECONDS', cache_seconds), \
+                            patch.object(user_resolution, 'USER_CACHE_SECONDS', cache_seconds):
+                        token_cache.clear_token_cache()
+                        user_resolution.clear_user_cache()
+                        authentication.authenticate(request)  # aquece (cria o usuário e preenche o cache)
+
+                        verify = self._measure(lambda: authentication._verify_firebase_token(token), options['requests'])
+                        full = self._measure(lambda: authentication.authenticate(request), options['requests'])
+
+                    self.stdout.write(f'{mode:>9}: token verification {self._format(verify)} | authenticate() {self._format(full)}')
+        finally:
+            token_cache.clear_token_cache()
+            user_resolution.clear_user_cache()
+            User.objects.filter(username=uid).delete()
+
+    def _measure(self, call, count):
+        timings = []
+        for _ in range(count):
+            started = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - started)
+        return sorted(timings)
+
+    def _format(self, timings):
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        return f'mean {statistics.mean(timings) * 1e6:.0f}us, p95 {p95 * 1e6:.0f}us'
@@ -1,10 +1,14 @@
+from decouple import config
 from rest_framework.authentication import BaseAuthentication
 from rest_framework import exceptions
-from django.contrib.auth import get_user_model
 from firebase_admin import auth as firebase_auth
-from users.models import ProfileModel
+from users.services.token_cache import cache_claims, get_cached_claims
+from users.services.user_resolution import resolve_user
+
+# Consulta o Firebase para recusar tokens revogados. Com o cache de tokens ligado,
+# uma revogação passa a valer em até FIREBASE_TOKEN_CACHE_SECONDS.
+CHECK_REVOKED_TOKENS = config('FIREBASE_CHECK_REVOKED', default=False, cast=bool)
 
-User = get_user_model()
 
 class FirebaseAuthentication(BaseAuthentication):
     def get_token_from_header(self, request):
@@ -16,8 +20,12 @@ class FirebaseAuthentication(BaseAuthentication):
         return parts[1]
 
     def _verify_firebase_token(self, token):
+        cached_claims = get_cached_claims(token)
+        if cached_claims is not None:
+            return cached_claims
+
         try:
-            decode = firebase_auth.verify_id_token(token)
+            decode = firebase_auth.verify_id_token(token, check_revoked=CHECK_REVOKED_TOKENS)
         except firebase_auth.ExpiredIdTokenError:
             raise exceptions.AuthenticationFailed("Token expirado")
         except firebase_auth.RevokedIdTokenError:
@@ -27,31 +35,12 @@ class FirebaseAuthentication(BaseAuthentication):
         
         if not decode or "uid" not in decode:
             raise exceptions.AuthenticationFailed('Token malformado ou sem UID.')
-        
+
+        cache_claims(token, decode)
         return decode
     
     def _get_or_create_local_user(self, decoded_token):
-        uid = decoded_token.get("uid")
-        email = decoded_token.get("email", "")
-        name = decoded_token.get("name", "")
-        first_name = name.split(" ")[0] if name else ""
-        last_name = " ".join(name.split(" ")[1:]) if name and " " in name else ""
-        email_verified = decoded_token.get("email_verified", False)
-
-        user, _ =User.objects.get_or_create(
-            username=uid,
-            defaults={
-                "email": email,
-                "first_name": first_name,
-                "last_name": last_name
-            }
-        )
-
-        if hasattr(user, 'profile'):
-            user.profile.email_verified = email_verified
-            user.profile.save()
-
-        return user
+        return resolve_user(decoded_token)
     
     def authenticate(self, request):
         token = self.get_token_from_header(request=request)
@@ -0,0 +1,69 @@
+import hashlib
+import time
+
+from decouple import config
+from django.core.cache import cache
+
+from common.lru import LRUCache
+
+# Tempo máximo que um token verificado fica em cache (nunca passa do "exp" do token).
+# Com 0 todo request verifica o token no Firebase de novo.
+TOKEN_CACHE_SECONDS = config('FIREBASE_TOKEN_CACHE_SECONDS', default=300, cast=int)
+TOKEN_CACHE_SIZE = config('FIREBASE_TOKEN_CACHE_SIZE', default=10000, cast=int)
+# Compartilha os tokens verificados entre os workers pelo cache do Django (CACHES)
+TOKEN_CACHE_SHARED = config('FIREBASE_TOKEN_CACHE_SHARED', default=False, cast=bool)
+
+_local = LRUCache(TOKEN_CACHE_SIZE)
+
+
+def _token_key(token: str) -> str:
+    # O token nunca é guardado em claro, só o hash dele
+    return 'firebase-token:' + hashlib.sha256(token.encode()).hexdigest()
+
+
+def _ttl_for(claims: dict) -> float:
+    expires_in = claims.get('exp', 0) - time.time()
+    return min(TOKEN_CACHE_SECONDS, expires_in)
+
+
+def get_cached_claims(token: str):
+    """
+    Retorna:
+        dict | None: As claims do token, se ele já foi verificado e ainda não venceu no cache.
+    """
+    if TOKEN_CACHE_SECONDS <= 0:
+        return None
+
+    key = _token_key(token)
+    claims = _local.get(key)
+    if claims is None and TOKEN_CACHE_SHARED:
+        claims = cache.get(key)
+        if claims is not None:
+            ttl = _ttl_for(claims)
+            if ttl <= 0:
+                return None
+            _local.set(key, claims, ttl=ttl)
+    return claims
+
+
+def cache_claims(token: str, claims: dict) -> None:
+    """Guarda as claims de um token recém verificado, por no máximo TOKEN_CACHE_SECONDS e nunca além do exp."""
+    ttl = _ttl_for(claims)
+    if TOKEN_CACHE_SECONDS <= 0 or ttl <= 0:
+        return
+
+    key = _token_key(token)
+    _local.set(key, claims, ttl=ttl)
+    if TOKEN_CACHE_SHARED:
+        cache.set(key, claims, timeout=max(1, int(ttl)))
+
+
+def forget_token(token: str) -> None:
+    key = _token_key(token)
+    _local.delete(key)
+    if TOKEN_CACHE_SHARED:
+        cache.delete(key)
+
+
+def clear_token_cache() -> None:
+    _local.clear()
@@ -0,0 +1,127 @@
+import pickle
+
+from decouple import config
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+
+from common.lru import LRUCache
+
+User = get_user_model()
+
+# Por quanto tempo o usuário (com o perfil) de um uid fica no cache compartilhado (CACHES)
+USER_CACHE_SECONDS = config('FIREBASE_USER_CACHE_SECONDS', default=300, cast=int)
+# Cópia em memória de cada processo. Alterações feitas em outro processo aparecem em até este tempo;
+# no próprio processo o cache é invalidado na hora (signals de User e ProfileModel)
+USER_LOCAL_CACHE_SECONDS = config('FIREBASE_USER_LOCAL_CACHE_SECONDS', default=5, cast=int)
+USER_CACHE_SIZE = config('FIREBASE_USER_CACHE_SIZE', default=10000, cast=int)
+
+_local = LRUCache(USER_CACHE_SIZE)
+
+
+def _user_key(uid: str) -> str:
+    return f'firebase-user:{uid}'
+
+
+def _split_name(name: str) -> tuple:
+    first_name = name.split(" ")[0] if name else ""
+    last_name = " ".join(name.split(" ")[1:]) if name and " " in name else ""
+    return first_name, last_name
+
+
+def _cache_user(uid: str, user) -> bytes:
+    # Guardado serializado: cada requisição recebe a sua própria instância (pickle.loads é bem mais rápido que deepcopy)
+    data = pickle.dumps(user, protocol=pickle.HIGHEST_PROTOCOL)
+    if USER_CACHE_SECONDS > 0:
+        _local.set(uid, data, ttl=min(USER_LOCAL_CACHE_SECONDS, USER_CACHE_SECONDS))
+        cache.set(_user_key(uid), data, timeout=USER_CACHE_SECONDS)
+    return data
+
+
+def invalidate_user(uid: str) -> None:
+    _local.delete(uid)
+    cache.delete(_user_key(uid))
+
+
+def clear_user_cache() -> None:
+    _local.clear()
+
+
+def _cached_user(uid: str):
+    if USER_CACHE_SECONDS <= 0:
+        return None
+    data = _local.get(uid)
+    if data is None:
+        data = cache.get(_user_key(uid))
+        if data is not None:
+            _local.set(uid, data, ttl=min(USER_LOCAL_CACHE_SECONDS, USER_CACHE_SECONDS))
+    return data
+
+
+def _load_or_create_user(uid: str, email: str, first_name: str, last_name: str):
+    user = User.objects.select_related('profile').filter(username=uid).first()
+    if user is not None:
+        return user
+
+    try:
+        with transaction.atomic():
+            # O perfil é criado pelo signal post_save de User
+            return User.objects.create(username=uid, email=email, first_name=first_name, last_name=last_name)
+    except IntegrityError:
+        # Outra requisição criou o mesmo usuário ao mesmo tempo
+        return User.objects.select_related('profile').get(username=uid)
+
+
+def _sync_with_token(user, email: str, first_name: str, last_name: str, email_verified: bool) -> bool:
+    """
+    Grava no banco só o que o token realmente mudou:
+        - email_verified do perfil, quando diferente do token.
+        - e-mail e nome do usuário, apenas se estiverem vazios (o nome pode ter sido editado em /users/me/).
+    Retorna:
+        bool: Se algo foi gravado.
+    """
+    changed = False
+
+    user_fields = []
+    if email and not user.email:
+        user.email = email
+        user_fields.append('email')
+    if first_name and not user.first_name and not user.last_name:
+        user.first_name, user.last_name = first_name, last_name
+        user_fields += ['first_name', 'last_name']
+    if user_fields:
+        user.save(update_fields=user_fields)
+        changed = True
+
+    profile = getattr(user, 'profile', None)
+    if profile is not None and profile.email_verified != email_verified:
+        profile.email_verified = email_verified
+        profile.save(update_fields=['email_verified', 'updated_at'])
+        changed = True
+
+    return changed
+
+
+def resolve_user(decoded_token: dict):
+    """
+    Retorna o usuário local (com o perfil já carregado) do uid do token do Firebase.
+    Procura primeiro no cache em memória, depois no cache compartilhado e só então no banco
+    (criando o usuário no primeiro acesso). Em um acerto de cache nenhuma query é feita,
+    a não ser que o token traga uma mudança (ex: e-mail verificado).
+    Cada chamada recebe a sua própria cópia do usuário, então alterá-la não afeta o cache.
+    """
+    uid = decoded_token.get("uid")
+    email = decoded_token.get("email", "")
+    first_name, last_name = _split_name(decoded_token.get("name", ""))
+    email_verified = decoded_token.get("email_verified", False)
+
+    cached = _cached_user(uid)
+    if cached is None:
+        user = _load_or_create_user(uid, email, first_name, last_name)
+    else:
+        user = pickle.loads(cached)
+
+    changed = _sync_with_token(user, email, first_name, last_name, email_verified)
+    if cached is None or changed:
+        return pickle.loads(_cache_user(uid, user))
+    return user
@@ -1,10 +1,23 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.conf import settings
 from .models import ProfileModel
+from .services.user_resolution import invalidate_user
 
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_profile_for_new_user(sender, instance, created, **kwargs):
     if created:
-        ProfileModel.objects.create(user=instance)
\ No newline at end of file
+        ProfileModel.objects.create(user=instance)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.username)
+
+
+@receiver(post_save, sender=ProfileModel)
+@receiver(post_delete, sender=ProfileModel)
+def invalidate_cached_profile_user(sender, instance, **kwargs):
+    invalidate_user(instance.user.username)
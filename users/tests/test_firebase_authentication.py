@@ -0,0 +1,96 @@
+import time
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from rest_framework import exceptions
+from rest_framework.test import APIRequestFactory
+
+from firebase_admin import auth as firebase_auth
+from users.services import backends, token_cache
+from users.services.backends import FirebaseAuthentication
+
+pytestmark = pytest.mark.django_db
+
+TOKEN = 'header.payload.signature'
+
+
+def claims(expires_in=3600, **extra):
+    return {'uid': 'firebase-uid-1', 'email': 'leitor@example.com', 'name': 'Ana Souza', 'exp': time.time() + expires_in, **extra}
+
+
+def authenticate(token=TOKEN):
+    request = APIRequestFactory().get('/api/v1/users/me/', HTTP_AUTHORIZATION=f'Bearer {token}')
+    return FirebaseAuthentication().authenticate(request)
+
+
+@pytest.fixture
+def mock_verify():
+    with patch.object(backends.firebase_auth, 'verify_id_token') as mock_verify:
+        mock_verify.return_value = claims()
+        yield mock_verify
+
+
+def test_verified_token_is_cached(mock_verify):
+    first_user, _ = authenticate()
+    second_user, _ = authenticate()
+
+    assert first_user == second_user
+    assert first_user.username == 'firebase-uid-1'
+    mock_verify.assert_called_once()
+
+
+def test_different_tokens_are_verified_separately(mock_verify):
+    authenticate('token-a')
+    authenticate('token-b')
+    assert mock_verify.call_count == 2
+
+
+def test_cache_never_outlives_token_expiration(mock_verify):
+    mock_verify.return_value = claims(expires_in=-1)
+
+    authenticate()
+    authenticate()
+
+    assert mock_verify.call_count == 2
+
+
+def test_cache_ttl_is_bounded_by_token_exp():
+    assert token_cache._ttl_for(claims(expires_in=30)) == pytest.approx(30, abs=1)
+    assert token_cache._ttl_for(claims(expires_in=3600)) == token_cache.TOKEN_CACHE_SECONDS
+
+
+def test_failed_verification_is_not_cached(mock_verify):
+    mock_verify.side_effect = [firebase_auth.ExpiredIdTokenError('expirado', cause=None), claims()]
+
+    with pytest.raises(exceptions.AuthenticationFailed, match='Token expirado'):
+        authenticate()
+    user, _ = authenticate()
+
+    assert user.username == 'firebase-uid-1'
+    assert mock_verify.call_count == 2
+
+
+def test_cache_can_be_disabled(mock_verify):
+    with patch.object(token_cache, 'TOKEN_CACHE_SECONDS', 0):
+        authenticate()
+        authenticate()
+    assert mock_verify.call_count == 2
+
+
+def test_shared_cache_is_used_by_other_workers(mock_verify):
+    with patch.object(token_cache, 'TOKEN_CACHE_SHARED', True):
+        authenticate()
+        token_cache.clear_token_cache()  # Simula outro processo, com o cache em memória vazio
+        authenticate()
+
+    mock_verify.assert_called_once()
+    key = token_cache._token_key(TOKEN)
+    assert TOKEN not in key
+    assert cache.get(key)['uid'] == 'firebase-uid-1'
+
+
+def test_revocation_check_is_configurable(mock_verify):
+    with patch.object(backends, 'CHECK_REVOKED_TOKENS', True):
+        authenticate()
+    assert mock_verify.call_args.kwargs['check_revoked'] is True
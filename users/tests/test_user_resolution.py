@@ -0,0 +1,97 @@
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+
+from users.services import user_resolution
+from users.services.user_resolution import resolve_user
+
+pytestmark = pytest.mark.django_db
+
+
+def claims(**extra):
+    return {'uid': 'firebase-uid-1', 'email': 'leitor@example.com', 'name': 'Ana Souza', 'email_verified': False, **extra}
+
+
+def writes(captured):
+    return [query['sql'] for query in captured.captured_queries if query['sql'].startswith(('UPDATE', 'INSERT'))]
+
+
+def test_first_request_creates_user_with_profile():
+    user = resolve_user(claims(email_verified=True))
+
+    assert (user.username, user.email, user.first_name, user.last_name) == ('firebase-uid-1', 'leitor@example.com', 'Ana', 'Souza')
+    assert user.profile.email_verified is True
+    assert User.objects.get(username='firebase-uid-1').profile.email_verified is True
+
+
+def test_cached_user_needs_no_queries(django_assert_num_queries):
+    resolve_user(claims())
+
+    with django_assert_num_queries(0):
+        user = resolve_user(claims())
+        assert user.profile.email_verified is False
+
+
+def test_shared_cache_is_used_when_process_cache_is_empty(django_assert_num_queries):
+    resolve_user(claims())
+    user_resolution.clear_user_cache()
+
+    with django_assert_num_queries(0):
+        assert resolve_user(claims()).username == 'firebase-uid-1'
+
+
+def test_unchanged_token_does_not_write(django_assert_max_num_queries):
+    resolve_user(claims())
+    user_resolution.clear_user_cache()
+    user_resolution.invalidate_user('firebase-uid-1')
+
+    # Sem cache: só a leitura do usuário com o perfil
+    with django_assert_max_num_queries(1) as captured:
+        resolve_user(claims())
+    assert writes(captured) == []
+
+
+def test_email_verified_change_updates_only_that_field(django_assert_max_num_queries):
+    resolve_user(claims())
+
+    with django_assert_max_num_queries(1) as captured:
+        user = resolve_user(claims(email_verified=True))
+
+    [update] = writes(captured)
+    assert 'users_profilemodel' in update
+    assert 'email_verified' in update and 'cpf' not in update
+    assert user.profile.email_verified is True
+    assert resolve_user(claims(email_verified=True)).profile.email_verified is True
+
+
+def test_token_name_does_not_overwrite_edited_name():
+    user = resolve_user(claims())
+    User.objects.filter(pk=user.pk).update(first_name='Aninha', last_name='')
+    user_resolution.invalidate_user('firebase-uid-1')
+
+    assert resolve_user(claims(name='Ana Maria Souza')).first_name == 'Aninha'
+
+
+def test_missing_name_is_filled_from_token():
+    User.objects.create(username='firebase-uid-1')
+
+    user = resolve_user(claims())
+
+    assert (user.first_name, user.email) == ('Ana', 'leitor@example.com')
+
+
+def test_each_call_gets_its_own_copy():
+    first = resolve_user(claims())
+    first.first_name = 'Alterado sem salvar'
+
+    assert resolve_user(claims()).first_name == 'Ana'
+
+
+def test_saving_the_user_invalidates_the_cache():
+    user = resolve_user(claims())
+
+    client = APIClient()
+    client.force_authenticate(user=user)
+    client.patch('/api/v1/users/me/', data={'first_name': 'Ana Paula'}, format='json')
+
+    assert resolve_user(claims()).first_name == 'Ana Paula'